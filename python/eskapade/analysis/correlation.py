@@ -0,0 +1,454 @@
+# ********************************************************************************
+# * Project: Eskapade - A python-based package for data analysis                 *
+# * Created: 2017/07/21                                                          *
+# * Description:                                                                 *
+# *      Vectorized computation of correlation matrices of binned columns:       *
+# *      correlation ratios and mutual information, optionally in parallel,      *
+# *      and chunk-wise accumulation of correlation matrices.                    *
+# *                                                                              *
+# * Authors:                                                                     *
+# *      KPMG Big Data team, Amstelveen, The Netherlands                         *
+# *                                                                              *
+# * Redistribution and use in source and binary forms, with or without           *
+# * modification, are permitted according to the terms listed in the file        *
+# * LICENSE.                                                                     *
+# ********************************************************************************
+
+import copy
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from eskapade.mixins import LoggingMixin
+
+# default number of bins per column: number of bin edges of numpy.histogram
+N_BINS = 11
+
+# default number of quantile bins per column to approximate ranks with
+N_RANK_BINS = 32
+
+# correlation methods supported by the accumulator
+ACCUMULATED_CORRS = ('pearson', 'spearman', 'correlation_ratio')
+
+# maximum size in bytes of the bin-indicator matrix of a block of columns
+MAX_BLOCK_BYTES = 1 << 27
+
+# function and arrays used by the tasks of a worker process
+_worker_func = None
+_worker_arrays = ()
+
+
+def bin_codes(df, n_bins=N_BINS):
+    """Bin columns into integer codes
+
+    Each column is divided into n_bins bins of equal width over its range,
+    as with pandas.cut().  Null values get code -1.
+
+    :param pandas.DataFrame df: input dataframe with numerical columns
+    :param int n_bins: number of bins per column
+    :returns: bin codes, with shape (number of records, number of columns)
+    :rtype: numpy.ndarray
+    """
+
+    codes = np.empty((len(df.index), len(df.columns)), dtype=np.int64)
+    for i, col in enumerate(df.columns):
+        codes[:, i] = np.nan_to_num(pd.cut(df[col], n_bins, labels=False).astype(np.float64), nan=-1)
+    return codes
+
+
+def _bin_indicators(codes, n_bins):
+    """Create indicator matrix of bins of a block of columns"""
+
+    n_rec, n_cols = codes.shape
+    ind = np.zeros((n_rec, n_cols * n_bins), dtype=np.float64)
+    for i in range(n_cols):
+        rows = np.flatnonzero(codes[:, i] >= 0)
+        ind[rows, i * n_bins + codes[rows, i]] = 1.
+    return ind
+
+
+def correlation_ratios(values, codes, n_bins, x_cols):
+    """Compute correlation ratios of all columns, given the binned values of a block of columns
+
+    The correlation ratio of y given x is the variance of the means of y in
+    the bins of x, weighted with the bin counts, divided by the variance of
+    y.  All bin sums are computed at once, as the product of the bin
+    indicators of the x columns with the values of the y columns.
+
+    :param numpy.ndarray values: column values, with null values as NaN
+    :param numpy.ndarray codes: bin codes of the columns
+    :param int n_bins: number of bins per column
+    :param list x_cols: indices of the x columns
+    :returns: correlation ratios, with shape (number of x columns, number of columns)
+    :rtype: numpy.ndarray
+    """
+
+    mask = ~np.isnan(values)
+    y = np.where(mask, values, 0.)
+    count = mask.sum(axis=0)
+    mean = y.sum(axis=0) / count
+    var_y = (np.where(mask, y - mean, 0.) ** 2).sum(axis=0) / (count - 1)
+
+    # counts and sums of y values in bins of x
+    ind = _bin_indicators(codes[:, x_cols], n_bins).T
+    bin_counts = ind @ mask.astype(np.float64)
+    bin_sums = ind @ y
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bin_means = np.where(bin_counts > 0, bin_sums / bin_counts, 0.)
+        var_y_bar = (bin_counts * (bin_means - mean) ** 2).reshape(len(x_cols), n_bins, -1).sum(axis=1)
+        return var_y_bar / (count * var_y)
+
+
+def mutual_information(codes, n_bins, pairs):
+    """Compute mutual information of pairs of binned columns
+
+    The mutual information, in nats, is computed from the contingency table
+    of the bin codes of each pair, using only records where both columns
+    are not null.
+
+    :param numpy.ndarray codes: bin codes of the columns
+    :param int n_bins: number of bins per column
+    :param list pairs: pairs of column indices
+    :returns: mutual information of each pair
+    :rtype: numpy.ndarray
+    """
+
+    mi = np.zeros(len(pairs))
+    for k, (i, j) in enumerate(pairs):
+        valid = (codes[:, i] >= 0) & (codes[:, j] >= 0)
+        counts = np.bincount(codes[valid, i] * n_bins + codes[valid, j], minlength=n_bins * n_bins)
+        if not counts.any():
+            continue
+        p_xy = counts.reshape(n_bins, n_bins) / counts.sum()
+        p_x_p_y = np.outer(p_xy.sum(axis=1), p_xy.sum(axis=0))
+        nz = p_xy > 0
+        mi[k] = (p_xy[nz] * np.log(p_xy[nz] / p_x_p_y[nz])).sum()
+    return mi
+
+
+def _init_worker(func, arrays):
+    """Set task function and arrays in worker process"""
+
+    global _worker_func, _worker_arrays
+    _worker_func = func
+    _worker_arrays = arrays
+
+
+def _run_task(task):
+    """Run task in worker process"""
+
+    return _worker_func(*_worker_arrays, task)
+
+
+def _run_tasks(func, arrays, tasks, n_jobs):
+    """Run tasks, in parallel processes if requested
+
+    The arrays are passed on to the worker processes at their creation,
+    by forking, such that they are not copied for each task.  The tasks
+    are run serially if processes cannot be forked on this platform.
+    """
+
+    if n_jobs <= 1 or len(tasks) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        return [func(*arrays, t) for t in tasks]
+    ctx = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)), mp_context=ctx, initializer=_init_worker,
+                             initargs=(func, arrays)) as executor:
+        return list(executor.map(_run_task, tasks))
+
+
+def binned_correlations(df, method, n_bins=N_BINS, n_jobs=1):
+    """Compute correlation matrix of binned numerical columns
+
+    The columns are binned once into integer codes, after which the
+    correlations are computed in blocks of columns (correlation ratio) or
+    column pairs (mutual information), in n_jobs parallel processes.
+
+    :param pandas.DataFrame df: input dataframe with numerical columns
+    :param str method: "correlation_ratio" or "mutual_information"
+    :param int n_bins: number of bins per column
+    :param int n_jobs: number of parallel processes
+    :returns: correlation matrix
+    :rtype: pandas.DataFrame
+    """
+
+    cols = df.columns
+    n_cols = len(cols)
+    codes = bin_codes(df, n_bins)
+
+    if method == 'correlation_ratio':
+        values = df.to_numpy(dtype=np.float64, na_value=np.nan)
+        block_size = max(1, min(n_cols, MAX_BLOCK_BYTES // (8 * n_bins * max(1, len(df.index)))))
+        if n_jobs > 1:
+            block_size = max(1, min(block_size, -(-n_cols // n_jobs)))
+        blocks = [list(range(b, min(b + block_size, n_cols))) for b in range(0, n_cols, block_size)]
+        results = _run_tasks(correlation_ratios, (values, codes, n_bins), blocks, n_jobs)
+        cors = np.vstack(results) if results else np.zeros((0, 0))
+    elif method == 'mutual_information':
+        pairs = [(i, j) for i in range(n_cols) for j in range(i, n_cols)]
+        n_tasks = max(1, n_jobs) * 4
+        tasks = [pairs[t::n_tasks] for t in range(n_tasks) if pairs[t::n_tasks]]
+        cors = np.zeros((n_cols, n_cols))
+        for task, mi in zip(tasks, _run_tasks(mutual_information, (codes, n_bins), tasks, n_jobs)):
+            for (i, j), val in zip(task, mi):
+                cors[i, j] = cors[j, i] = val
+    else:
+        raise ValueError('correlation method "%s" is not computed from binned columns' % method)
+
+    return pd.DataFrame(cors, columns=cols, index=cols)
+
+
+class CorrelationAccumulator(LoggingMixin):
+    """Accumulator of correlation matrices over data chunks
+
+    The accumulator updates sufficient statistics of the correlations with
+    each chunk of data, such that correlation matrices of datasets that do
+    not fit in memory can be computed, e.g. in a loop over chunks with a
+    RepeatChain.  Accumulators of different chunks with the same binning
+    can be merged.  The statistics per method are:
+
+    * pearson: co-moments of all column pairs, over records where both columns are not null;
+    * spearman: contingency tables of column pairs in quantile bins, which approximate the ranks;
+    * correlation_ratio: counts and sums of all columns in equal-width bins of each column.
+
+    The bins are determined from the first chunk: quantile bins for the rank
+    approximation and, unless ranges are specified, the value ranges of the
+    correlation-ratio bins.  Values outside the ranges are assigned to the
+    first or last bin.  The contingency tables take memory proportional to
+    the number of column pairs times n_rank_bins squared.
+
+    >>> acc = CorrelationAccumulator(methods=['pearson', 'spearman'])
+    >>> for chunk in pd.read_csv('data.csv', chunksize=100000):
+    ...     acc.update(chunk)
+    >>> cors = acc.correlations('spearman')
+    """
+
+    def __init__(self, methods=ACCUMULATED_CORRS, n_bins=N_BINS, n_rank_bins=N_RANK_BINS, ranges=None):
+        """Initialize CorrelationAccumulator instance
+
+        :param list methods: correlation methods to accumulate statistics for
+        :param int n_bins: number of bins per column for correlation ratios
+        :param int n_rank_bins: number of quantile bins per column to approximate ranks with
+        :param dict ranges: value ranges (min, max) of the correlation-ratio bins per column (optional)
+        """
+
+        for method in methods:
+            if method not in ACCUMULATED_CORRS:
+                raise ValueError('correlation method "%s" cannot be accumulated (options are %s)'
+                                 % (method, ', '.join(ACCUMULATED_CORRS)))
+        self.methods = list(methods)
+        self.n_bins = n_bins
+        self.n_rank_bins = n_rank_bins
+        self.ranges = ranges if ranges is not None else {}
+        self.columns = None
+        self.n_records = 0
+
+    def _init_stats(self, values):
+        """Initialize binning and statistics from first chunk"""
+
+        n_cols = len(self.columns)
+        # sums are taken relative to the means of the first chunk, for numerical accuracy
+        mask = ~np.isnan(values)
+        self._shift = np.where(mask, values, 0.).sum(axis=0) / np.maximum(mask.sum(axis=0), 1)
+
+        # co-moments per column pair, summed over records where both columns are not null
+        self._n = np.zeros((n_cols, n_cols))
+        self._sx = np.zeros((n_cols, n_cols))
+        self._sxx = np.zeros((n_cols, n_cols))
+        self._sxy = np.zeros((n_cols, n_cols))
+
+        # contingency tables of quantile bins per column pair
+        if 'spearman' in self.methods:
+            probs = np.linspace(0., 1., self.n_rank_bins + 1)[1:-1]
+            self._rank_edges = [np.unique(np.nanquantile(values[:, i], probs)) if (~np.isnan(values[:, i])).any()
+                                else np.zeros(0) for i in range(n_cols)]
+            self._pairs = np.array([(i, j) for i in range(n_cols) for j in range(i + 1, n_cols)],
+                                   dtype=np.int64).reshape(-1, 2)
+            self._rank_counts = np.zeros((len(self._pairs), self.n_rank_bins * self.n_rank_bins), dtype=np.int64)
+
+        # counts and sums in equal-width bins
+        if 'correlation_ratio' in self.methods:
+            self._cr_edges = np.zeros((n_cols, 2))
+            for i, col in enumerate(self.columns):
+                lo, hi = self.ranges.get(col, (np.nanmin(values[:, i]), np.nanmax(values[:, i]))
+                                         if (~np.isnan(values[:, i])).any() else (0., 1.))
+                self._cr_edges[i] = lo, hi
+            self._cr_counts = np.zeros((n_cols * self.n_bins, n_cols))
+            self._cr_sums = np.zeros((n_cols * self.n_bins, n_cols))
+            self._y_n = np.zeros(n_cols)
+            self._y_sum = np.zeros(n_cols)
+            self._y_sumsq = np.zeros(n_cols)
+
+    def _cr_codes(self, values):
+        """Assign values to equal-width bins of correlation ratios"""
+
+        lo, hi = self._cr_edges[:, 0], self._cr_edges[:, 1]
+        width = np.where(hi > lo, (hi - lo) / self.n_bins, 1.)
+        with np.errstate(invalid='ignore'):
+            codes = np.clip(np.floor((values - lo) / width), 0, self.n_bins - 1)
+        return np.where(np.isnan(values), -1, codes).astype(np.int64)
+
+    def update(self, df):
+        """Update statistics with chunk of data
+
+        :param pandas.DataFrame df: data chunk; numerical columns of the first chunk are used
+        """
+
+        if self.columns is None:
+            self.columns = list(df.select_dtypes(include=[np.number]).columns)
+            self.log().debug('Accumulating correlations of columns %s', self.columns)
+            values = df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+            self._init_stats(values)
+        else:
+            values = df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.n_records += len(values)
+
+        mask = ~np.isnan(values)
+        mask_f = mask.astype(np.float64)
+        y = np.where(mask, values - self._shift, 0.)
+
+        # co-moments
+        self._n += mask_f.T @ mask_f
+        self._sx += y.T @ mask_f
+        self._sxx += (y * y).T @ mask_f
+        self._sxy += y.T @ y
+
+        # contingency tables of quantile bins
+        if 'spearman' in self.methods:
+            nb = self.n_rank_bins
+            codes = np.full(values.shape, -1, dtype=np.int64)
+            for i, edges in enumerate(self._rank_edges):
+                codes[mask[:, i], i] = np.searchsorted(edges, values[mask[:, i], i], side='right')
+            for p, (i, j) in enumerate(self._pairs):
+                valid = mask[:, i] & mask[:, j]
+                self._rank_counts[p] += np.bincount(codes[valid, i] * nb + codes[valid, j], minlength=nb * nb)
+
+        # bin counts and sums of correlation ratios
+        if 'correlation_ratio' in self.methods:
+            codes = self._cr_codes(values)
+            n_cols = len(self.columns)
+            block_size = max(1, min(n_cols, MAX_BLOCK_BYTES // (8 * self.n_bins * max(1, len(values)))))
+            for b in range(0, n_cols, block_size):
+                ind = _bin_indicators(codes[:, b:b + block_size], self.n_bins).T
+                rows = slice(b * self.n_bins, min(b + block_size, n_cols) * self.n_bins)
+                self._cr_counts[rows] += ind @ mask_f
+                self._cr_sums[rows] += ind @ y
+            self._y_n += mask.sum(axis=0)
+            self._y_sum += y.sum(axis=0)
+            self._y_sumsq += (y * y).sum(axis=0)
+
+    def spawn(self):
+        """Create empty accumulator with the same columns and binning
+
+        Accumulators created this way, e.g. to process chunks in parallel,
+        can be merged with this accumulator.
+
+        :returns: empty accumulator
+        :rtype: CorrelationAccumulator
+        """
+
+        acc = copy.deepcopy(self)
+        acc.n_records = 0
+        if self.columns is not None:
+            for attr in ('_n', '_sx', '_sxx', '_sxy', '_rank_counts', '_cr_counts', '_cr_sums',
+                         '_y_n', '_y_sum', '_y_sumsq'):
+                if hasattr(acc, attr):
+                    getattr(acc, attr)[...] = 0
+        return acc
+
+    def merge(self, other):
+        """Add statistics of other accumulator
+
+        :param CorrelationAccumulator other: accumulator with the same columns, methods and binning, see spawn()
+        :raises: ValueError
+        """
+
+        if other.columns is None:
+            return
+        if self.columns is None:
+            self.__dict__.update(copy.deepcopy(other.__dict__))
+            return
+        if other.columns != self.columns or other.methods != self.methods:
+            raise ValueError('accumulators with different columns or methods cannot be merged')
+        if ('spearman' in self.methods
+                and not all(np.array_equal(e1, e2) for e1, e2 in zip(self._rank_edges, other._rank_edges))) \
+                or ('correlation_ratio' in self.methods and not np.array_equal(self._cr_edges, other._cr_edges)):
+            raise ValueError('accumulators with different binning cannot be merged')
+
+        # sums of other accumulator are shifted by the difference of the shifts
+        d = other._shift - self._shift
+        self._n += other._n
+        self._sx += other._sx + other._n * d[:, None]
+        self._sxx += other._sxx + 2 * d[:, None] * other._sx + other._n * (d ** 2)[:, None]
+        self._sxy += other._sxy + d[:, None] * other._sx.T + d[None, :] * other._sx + other._n * np.outer(d, d)
+        if 'spearman' in self.methods:
+            self._rank_counts += other._rank_counts
+        if 'correlation_ratio' in self.methods:
+            self._cr_counts += other._cr_counts
+            self._cr_sums += other._cr_sums + other._cr_counts * d[None, :]
+            self._y_sumsq += other._y_sumsq + 2 * d * other._y_sum + other._y_n * d ** 2
+            self._y_sum += other._y_sum + other._y_n * d
+            self._y_n += other._y_n
+        self.n_records += other.n_records
+
+    def correlations(self, method):
+        """Compute correlation matrix from accumulated statistics
+
+        :param str method: correlation method
+        :returns: correlation matrix
+        :rtype: pandas.DataFrame
+        """
+
+        if method not in self.methods:
+            raise ValueError('no statistics accumulated for correlation method "%s"' % method)
+        if self.columns is None:
+            return pd.DataFrame()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if method == 'pearson':
+                cors = self._pearson()
+            elif method == 'spearman':
+                cors = self._spearman()
+            else:
+                cors = self._correlation_ratio()
+        return pd.DataFrame(cors, columns=self.columns, index=self.columns)
+
+    def _pearson(self):
+        """Pearson correlations from co-moments"""
+
+        cov = self._sxy - self._sx * self._sx.T / self._n
+        var_x = self._sxx - self._sx ** 2 / self._n
+        return cov / np.sqrt(var_x * var_x.T)
+
+    def _spearman(self):
+        """Spearman correlations from contingency tables of quantile bins
+
+        All records in a bin get the mid rank of the bin, after which the
+        Pearson correlation of the ranks is computed from the tables.
+        """
+
+        nb = self.n_rank_bins
+        tables = self._rank_counts.reshape(-1, nb, nb).astype(np.float64)
+        n = tables.sum(axis=(1, 2))
+        n_x = tables.sum(axis=2)
+        n_y = tables.sum(axis=1)
+        rank_x = np.cumsum(n_x, axis=1) - (n_x - 1) / 2
+        rank_y = np.cumsum(n_y, axis=1) - (n_y - 1) / 2
+        dx = rank_x - ((n_x * rank_x).sum(axis=1) / n)[:, None]
+        dy = rank_y - ((n_y * rank_y).sum(axis=1) / n)[:, None]
+        cov = np.einsum('pij,pi,pj->p', tables, dx, dy)
+        rho = cov / np.sqrt((n_x * dx ** 2).sum(axis=1) * (n_y * dy ** 2).sum(axis=1))
+
+        cors = np.eye(len(self.columns))
+        cors[self._pairs[:, 0], self._pairs[:, 1]] = rho
+        cors[self._pairs[:, 1], self._pairs[:, 0]] = rho
+        return cors
+
+    def _correlation_ratio(self):
+        """Correlation ratios from bin counts and sums"""
+
+        mean = self._y_sum / self._y_n
+        var_y = (self._y_sumsq - self._y_sum * mean) / (self._y_n - 1)
+        bin_means = np.where(self._cr_counts > 0, self._cr_sums / self._cr_counts, 0.)
+        var_y_bar = (self._cr_counts * (bin_means - mean) ** 2).reshape(len(self.columns), self.n_bins, -1).sum(axis=1)
+        return var_y_bar / (self._y_n * var_y)
@@ -0,0 +1,188 @@
+# ********************************************************************************
+# * Project: Eskapade - A python-based package for data analysis                 *
+# * Class  : CategoryEncoder                                                     *
+# * Created: 2017/07/12                                                          *
+# * Description:                                                                 *
+# *      Persistent, growable category dictionary, used to factorize             *
+# *      columns with stable codes over data chunks and runs.                    *
+# *                                                                              *
+# * Authors:                                                                     *
+# *      KPMG Big Data team, Amstelveen, The Netherlands                         *
+# *                                                                              *
+# * Redistribution and use in source and binary forms, with or without           *
+# * modification, are permitted according to the terms listed in the file        *
+# * LICENSE.                                                                     *
+# ********************************************************************************
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from eskapade.mixins import LoggingMixin
+
+
+class CategoryEncoder(LoggingMixin):
+    """Growable category dictionary of a single column
+
+    The encoder maps values to integer codes with a hash-based index of the
+    categories seen so far.  Codes are assigned in order of first appearance
+    and are never changed: values that are encountered in later chunks are
+    appended to the dictionary, so the same value gets the same code in
+    every chunk.  Null values are mapped onto code -1, as with
+    pandas.factorize().
+
+    >>> enc = CategoryEncoder()
+    >>> enc.encode(['apple', 'tree', 'pear', 'apple'])
+    array([0, 1, 2, 0])
+    >>> enc.encode(['pear', 'plum'])
+    array([2, 3])
+    >>> enc.decode([3, 0])
+    array(['plum', 'apple'], dtype=object)
+    """
+
+    def __init__(self, categories=None):
+        """Initialize CategoryEncoder instance
+
+        :param categories: initial categories, mapped onto codes 0, 1, 2, ... (optional)
+        :type categories: iterable
+        """
+
+        self._index = None
+        if categories is not None:
+            self._index = pd.Index(categories)
+            if not self._index.is_unique:
+                raise ValueError('categories of encoder are not unique')
+
+    def __len__(self):
+        """Get number of categories"""
+
+        return len(self._index) if self._index is not None else 0
+
+    def __contains__(self, value):
+        """Check if value is a known category"""
+
+        return self._index is not None and value in self._index
+
+    @property
+    def categories(self):
+        """Categories of the encoder, ordered by code
+
+        :returns: categories
+        :rtype: pandas.Index
+        """
+
+        return self._index if self._index is not None else pd.Index([])
+
+    def encode(self, values, grow=True):
+        """Map values onto integer codes
+
+        :param values: values to encode
+        :type values: iterable
+        :param bool grow: add unknown values to the categories.  If false, unknown values get code -1.
+        :returns: codes of the values
+        :rtype: numpy.ndarray
+        """
+
+        values = values if isinstance(values, (pd.Series, pd.Index)) else pd.Series(values)
+
+        # no categories yet: plain factorization, which determines the codes of the first values
+        if self._index is None:
+            if not grow:
+                return np.full(len(values), -1, dtype=np.int64)
+            codes, uniques = pd.factorize(values)
+            self._index = pd.Index(np.asarray(uniques))
+            return np.asarray(codes, dtype=np.int64)
+
+        # look up codes in hash table of existing categories
+        codes = self._index.get_indexer(values)
+        if not grow:
+            return codes
+
+        # append unseen, non-null values to the categories
+        missing = codes == -1
+        if missing.any():
+            values_missing = values[missing]
+            new_cats = pd.unique(values_missing[values_missing.notnull()])
+            if len(new_cats):
+                self.log().debug('Adding %d new categories to encoder', len(new_cats))
+                self._index = self._index.append(pd.Index(np.asarray(new_cats)))
+                codes[missing] = self._index.get_indexer(values_missing)
+
+        return codes
+
+    def decode(self, codes, as_categorical=False):
+        """Map integer codes back onto original values
+
+        Codes that do not correspond to a category, such as -1, are mapped
+        onto null values.
+
+        :param codes: codes to decode
+        :type codes: iterable
+        :param bool as_categorical: return a pandas.Categorical instead of an array of values
+        :returns: decoded values
+        :rtype: numpy.ndarray or pandas.Categorical
+        """
+
+        codes = np.asarray(codes, dtype=np.int64)
+        valid = (codes >= 0) & (codes < len(self))
+        if not as_categorical and valid.all():
+            return np.asarray(self.categories).take(codes)
+        cat = pd.Categorical.from_codes(np.where(valid, codes, -1), categories=self.categories)
+        return cat if as_categorical else np.asarray(cat)
+
+    def to_dict(self, inverse=False):
+        """Get categories as a dictionary
+
+        :param bool inverse: map categories onto codes instead of codes onto categories
+        :returns: mapping of codes to categories, or inversely
+        :rtype: dict
+        """
+
+        if inverse:
+            return dict((v, i) for i, v in enumerate(self.categories))
+        return dict(enumerate(self.categories))
+
+    @classmethod
+    def from_dict(cls, code_map):
+        """Create encoder from a dictionary of codes to categories
+
+        :param dict code_map: mapping of integer codes 0, 1, 2, ... onto categories
+        :returns: encoder
+        :rtype: CategoryEncoder
+        """
+
+        codes = sorted(code_map.keys())
+        if codes != list(range(len(codes))):
+            raise ValueError('codes in dictionary are not consecutive integers starting at zero')
+        return cls(categories=[code_map[c] for c in codes])
+
+    def persist_in_file(self, file_path):
+        """Persist encoder in Pickle file
+
+        :param str file_path: path of Pickle file
+        """
+
+        self.log().debug('Persisting category encoder in file "%s"', file_path)
+        with open(file_path, 'wb') as enc_file:
+            pickle.dump(self, enc_file)
+
+    @classmethod
+    def import_from_file(cls, file_path):
+        """Import encoder from a Pickle file
+
+        :param str file_path: path of Pickle file
+        :returns: imported encoder
+        :rtype: CategoryEncoder
+        :raises: RuntimeError, TypeError
+        """
+
+        if not os.path.isfile(file_path):
+            cls.log().critical('Specified path for importing category encoder is not a file: "%s"', file_path)
+            raise RuntimeError('invalid file path specified for importing category encoder')
+        with open(file_path, 'rb') as enc_file:
+            inst = pickle.load(enc_file)
+        if not isinstance(inst, cls):
+            raise TypeError('incorrect type for imported category encoder: "%s"' % type(inst).__name__)
+        return inst
@@ -166,10 +166,7 @@ class HistogramFillerBase(Link):
         idf = self.process_columns(df)
 
         # 3. do the actual histogram/counter filling
-        for c in self.columns:
-            name = ':'.join(c)
-            self.log().debug('Processing column(s) "%s"', name)
-            self.fill_histogram(idf, c)
+        self.fill_histograms(idf)
 
         # cleanup temp df
         del idf
@@ -281,6 +278,17 @@ class HistogramFillerBase(Link):
             idf[col] = df[col].apply(to_ns)
         return idf
 
+    def fill_histograms(self, idf):
+        """Fill histograms of all requested columns
+
+        :param idf: input data frame used for filling histograms
+        """
+
+        for c in self.columns:
+            name = ':'.join(c)
+            self.log().debug('Processing column(s) "%s"', name)
+            self.fill_histogram(idf, c)
+
     def fill_histogram(self, idf, c):
         """Fill input histogram with column(s) of input dataframe
 
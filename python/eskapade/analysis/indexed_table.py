@@ -0,0 +1,156 @@
+# ********************************************************************************
+# * Project: Eskapade - A python-based package for data analysis                 *
+# * Class  : IndexedTable                                                        *
+# * Created: 2017/07/14                                                          *
+# * Description:                                                                 *
+# *      Lookup table with a prebuilt index on its key columns, for              *
+# *      repeated merges and lookups of many small dataframes.                   *
+# *                                                                              *
+# * Authors:                                                                     *
+# *      KPMG Big Data team, Amstelveen, The Netherlands                         *
+# *                                                                              *
+# * Redistribution and use in source and binary forms, with or without           *
+# * modification, are permitted according to the terms listed in the file        *
+# * LICENSE.                                                                     *
+# ********************************************************************************
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+from eskapade.mixins import LoggingMixin
+
+INDEX_TYPES = ('hash', 'sorted')
+
+
+class IndexedTable(LoggingMixin):
+    """Reference table with a prebuilt index on its key columns
+
+    The table is typically stored in the data store and used by links that
+    repeatedly merge dataframes with it, such as DfMerger and ApplyFuncToDf,
+    for instance in a loop over data chunks.  The index on the key columns
+    is built once, at construction, after which merges and lookups only
+    locate the keys of the other dataframe in the index.
+
+    Two types of index are supported: a hash index, for one or more key
+    columns, and a sorted index, for a single numeric key column, which
+    locates keys by binary search.  Keys in the table must be unique.
+
+    >>> ref = IndexedTable(customers, on='customer_id')
+    >>> ds['customers'] = ref
+    >>> merged = ref.merge(transactions, how='left')
+    """
+
+    def __init__(self, df, on, index_type='hash'):
+        """Initialize IndexedTable instance
+
+        :param pandas.DataFrame df: reference table
+        :param list on: name(s) of key column(s)
+        :param str index_type: type of index: "hash" or "sorted" (default "hash")
+        :raises: TypeError, ValueError
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError('indexed table requires a pandas DataFrame, got "%s"' % type(df).__name__)
+        self.on = [on] if isinstance(on, str) else list(on)
+        if not self.on:
+            raise ValueError('no key columns specified for indexed table')
+        for col in self.on:
+            if col not in df.columns:
+                raise ValueError('key column "%s" not in table' % col)
+        if index_type not in INDEX_TYPES:
+            raise ValueError('invalid index type "%s" (options are %s)' % (index_type, str(INDEX_TYPES)))
+        if index_type == 'sorted' and (len(self.on) != 1 or not np.issubdtype(df[self.on[0]].dtype, np.number)):
+            raise ValueError('sorted index requires a single numeric key column')
+        self.index_type = index_type
+
+        # build index on key columns
+        self.log().debug('Building %s index on columns %s of table with %d records', index_type, self.on, len(df))
+        if index_type == 'sorted':
+            df = df.sort_values(self.on[0], kind='mergesort')
+            self._keys = df[self.on[0]].values
+            if len(self._keys) > 1 and not (self._keys[1:] != self._keys[:-1]).all():
+                raise ValueError('keys of indexed table are not unique')
+        else:
+            self._keys = pd.MultiIndex.from_frame(df[self.on]) if len(self.on) > 1 else pd.Index(df[self.on[0]])
+            if not self._keys.is_unique:
+                raise ValueError('keys of indexed table are not unique')
+            # build hash table of index now, such that it is reused by all lookups
+            self._keys.get_indexer(self._keys[:1])
+        self.df = df.reset_index(drop=True)
+
+    def __len__(self):
+        """Get number of records in table"""
+
+        return len(self.df.index)
+
+    @property
+    def columns(self):
+        """Columns of the table"""
+
+        return self.df.columns
+
+    def locate(self, keys):
+        """Locate keys in table
+
+        :param keys: key values: a series or array for a single key column, or a dataframe with the key columns
+        :returns: positions of the keys in the table; -1 for keys that are not found
+        :rtype: numpy.ndarray
+        """
+
+        if isinstance(keys, pd.DataFrame):
+            keys = keys[self.on]
+            keys = pd.MultiIndex.from_frame(keys) if len(self.on) > 1 else keys[self.on[0]]
+        if self.index_type == 'hash':
+            return self._keys.get_indexer(keys)
+
+        keys = np.asarray(keys)
+        pos = np.searchsorted(self._keys, keys)
+        pos_c = np.minimum(pos, len(self._keys) - 1)
+        found = (pos < len(self._keys)) & (self._keys[pos_c] == keys) if len(self._keys) else np.zeros(len(keys), bool)
+        return np.where(found, pos_c, -1)
+
+    def lookup(self, keys, column):
+        """Look up column values of keys
+
+        :param keys: key values, as for locate()
+        :param str column: name of table column
+        :returns: values of column; null for keys that are not found
+        :rtype: numpy.ndarray or pandas extension array
+        """
+
+        return take(self.df[column].values, self.locate(keys), allow_fill=True)
+
+    def merge(self, df, how='left', columns=None, suffixes=('_x', '_y')):
+        """Merge dataframe with table on key columns
+
+        The result is equivalent to a pandas merge of the dataframe with the
+        table, with the dataframe as left-hand side.
+
+        :param pandas.DataFrame df: dataframe to merge with table, containing the key columns
+        :param str how: type of merge: "left" or "inner"
+        :param list columns: columns of table to include. If not set, use all columns.
+        :param tuple suffixes: suffixes of overlapping column names of dataframe and table
+        :returns: merged dataframe
+        :rtype: pandas.DataFrame
+        """
+
+        if how not in ('left', 'inner'):
+            raise ValueError('indexed-table merge of type "%s" not supported (options are left, inner)' % how)
+        columns = [c for c in (self.columns if columns is None else columns) if c not in self.on]
+
+        pos = self.locate(df)
+        if how == 'inner':
+            found = pos >= 0
+            df = df[found]
+            pos = pos[found]
+        dfout = df.reset_index(drop=True)
+
+        # add table columns, renaming overlapping columns
+        overlap = set(columns) & set(dfout.columns)
+        if overlap:
+            dfout = dfout.rename(columns=dict((c, c + suffixes[0]) for c in overlap))
+        for col in columns:
+            dfout[col + suffixes[1] if col in overlap else col] = take(self.df[col].values, pos, allow_fill=True)
+
+        return dfout
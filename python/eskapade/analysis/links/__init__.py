@@ -1,6 +1,7 @@
 __all__ = ['ApplyFuncToDf', 'ApplySelectionToDf', 'BasicGenerator', 'DfConcatenator',
            'DfMerger', 'ReadToDf', 'RecordVectorizer', 'WriteFromDf', 'AssignRandomClass',
-           'RandomSampleSplitter', 'RecordFactorizer', 'ValueCounter', 'HistogrammarFiller']
+           'RandomSampleSplitter', 'RecordFactorizer', 'ValueCounter', 'HistogrammarFiller',
+           'StreamToDf']
 from .apply_func_to_df import ApplyFuncToDf
 from .apply_selection_to_df import ApplySelectionToDf
 from .assign_random_class import AssignRandomClass
@@ -14,3 +15,4 @@ from .record_factorizer import RecordFactorizer
 from .write_from_df import WriteFromDf
 from .value_counter import ValueCounter
 from .histogrammar_filler import HistogrammarFiller
+from .stream_to_df import StreamToDf
@@ -15,8 +15,26 @@
 # **********************************************************************************
 
 import collections
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
 
 from eskapade import ProcessManager, StatusCode, DataStore, Link
+from eskapade.analysis.indexed_table import IndexedTable
+
+
+def _apply_chunk(obj, func, args, kwargs):
+    """Apply function to chunk of series or dataframe in worker process"""
+
+    return obj.apply(func, args=args, **kwargs)
+
+
+def _groupby_apply_chunk(df, groupby, func, args, kwargs):
+    """Apply function to groups of dataframe chunk in worker process"""
+
+    return df.groupby(groupby).apply(func, *args, **kwargs)
 
 
 class ApplyFuncToDf(Link):
@@ -25,6 +43,19 @@ class ApplyFuncToDf(Link):
     Applies one or more functions to a (grouped) dataframe column or an
     entire dataframe.  In the latter case, this can be done row wise or
     column wise.  The input dataframe will be overwritten.
+
+    Functions that operate on entire arrays can be declared 'vectorized', in
+    which case they are called once with the input column(s) instead of per
+    element or row.  Numeric functions of a single input column can be
+    compiled with Numba ('jit'), if available.  Other functions can be
+    applied in parallel by setting n_workers: the rows, or groups, are then
+    partitioned over a pool of worker processes.  These functions must be
+    picklable, e.g. defined at module level.
+
+    Instead of a function, an IndexedTable can be specified to look up
+    column values by the keys in the input column(s).  The keys are located
+    in the prebuilt index of the table, so no hashing of the table is done
+    in the execution of the link.
     """
 
     def __init__(self, **kwargs):
@@ -41,19 +72,31 @@ class ApplyFuncToDf(Link):
           - 'kwargs' (dict, optional): kwargs for 'func'
           - 'groupby' (list, optional): column names to group by
           - 'groupbyColout' (string) output column after the split-apply-combine combination
+          - 'lookup' (IndexedTable or string, optional): table or data-store key of table to look up values
+            of the key columns 'colin' instead of applying 'func'
+          - 'lookupCol' (string, optional): table column to look up (default is 'colout')
+          - 'vectorized' (boolean, optional): call 'func' once with the input column(s) or dataframe
+          - 'jit' (boolean, optional): compile 'func' of a numeric input column 'colin' with Numba
         :param dict add_columns: columns to add to output (name, column)
+        :param int n_workers: number of worker processes to apply non-vectorized functions (default is 1)
         """
 
         Link.__init__(self, kwargs.pop('name', 'apply_func_to_dataframe'))
 
         # process keyword arguments
-        self._process_kwargs(kwargs, read_key='', store_key='', apply_funcs=[], add_columns=None)
+        self._process_kwargs(kwargs, read_key='', store_key='', apply_funcs=[], add_columns=None, n_workers=1)
         self.check_extra_kwargs(kwargs)
 
+        # functions compiled with Numba
+        self._jit_funcs = {}
+
     def initialize(self):
         """Initialize link"""
 
         self.check_arg_vals('read_key')
+        self.check_arg_types(n_workers=int)
+        if self.n_workers < 1:
+            raise ValueError('number of workers must be positive')
         if not self.apply_funcs:
             self.log().warning('No functions to apply')
 
@@ -69,6 +112,9 @@ class ApplyFuncToDf(Link):
         for arr in self.apply_funcs:
             # get func input
             keys = list(arr.keys())
+            if 'lookup' in keys:
+                df = self.lookup(ds, df, arr)
+                continue
             assert 'func' in keys, 'function input is insufficient.'
             func = arr['func']
             self.log().debug('Applying function %s' % str(func))
@@ -91,9 +137,9 @@ class ApplyFuncToDf(Link):
                 elif 'colin' in keys:
                     colin = arr['colin']
                     assert colin in df.columns
-                    result = df[colin].apply(func, args=args, **kwargs)
+                    result = self.apply(df[colin], func, args, kwargs, arr)
                 else:
-                    result = df.apply(func, args=args, **kwargs)
+                    result = self.apply(df, func, args, kwargs, arr)
                 ds[arr['storekey']] = result
             else:
                 assert 'colout' in keys, 'function input is insufficient'
@@ -107,9 +153,9 @@ class ApplyFuncToDf(Link):
                             assert c in df.columns
                     else:
                         assert colin in df.columns
-                    df[colout] = df[colin].apply(func, args=args, **kwargs)
+                    df[colout] = self.apply(df[colin], func, args, kwargs, arr)
                 else:
-                    df[colout] = df.apply(func, args=args, **kwargs)
+                    df[colout] = self.apply(df, func, args, kwargs, arr)
 
         # add columns
         if self.add_columns is not None:
@@ -145,15 +191,146 @@ class ApplyFuncToDf(Link):
             self.apply_funcs.append({'colin': inColumn, 'func': func, 'colout': outColumn, 'args': args,
                                      'kwargs': kwargs})
 
+    def addLookup(self, table, outColumn, inColumn, lookupColumn=''):
+        """Add lookup of column values in indexed table
+
+        :param table: IndexedTable or data-store key of IndexedTable
+        :param str outColumn: output column
+        :param inColumn: key column(s) of dataframe
+        :param str lookupColumn: table column to look up (default is outColumn)
+        """
+
+        if not isinstance(table, (IndexedTable, str)):
+            self.log().critical('specified lookup table is not an IndexedTable or data-store key')
+            raise TypeError('lookup tables in ApplyFuncToDf must be IndexedTable objects or data-store keys')
+        if not isinstance(outColumn, str) or not outColumn:
+            self.log().critical('no output column specified')
+            raise RuntimeError('an output column must be specified to look up values in ApplyFuncToDf')
+
+        self.apply_funcs.append({'lookup': table, 'colin': inColumn, 'colout': outColumn,
+                                 'lookupCol': lookupColumn if lookupColumn else outColumn})
+
+    def lookup(self, ds, df, arr):
+        """Look up column values in indexed table"""
+
+        table = arr['lookup']
+        if isinstance(table, str):
+            assert table in ds, 'key <%s> not in DataStore.' % table
+            table = ds[table]
+        assert isinstance(table, IndexedTable), 'lookup table is not an IndexedTable.'
+        assert 'colin' in arr and 'colout' in arr, 'lookup input is insufficient.'
+        colin = [arr['colin']] if isinstance(arr['colin'], str) else list(arr['colin'])
+        missing = [c for c in colin if c not in df.columns]
+        if missing:
+            raise KeyError('lookup input columns %s not in dataframe <%s>' % (str(missing), self.read_key))
+        if len(colin) != len(table.on):
+            raise ValueError('number of lookup input columns (%d) differs from number of table keys %s'
+                             % (len(colin), str(table.on)))
+        col = arr.get('lookupCol', arr['colout'])
+        if col not in table.columns:
+            raise KeyError('column <%s> not in lookup table' % col)
+
+        self.log().debug('Looking up column %s in indexed table' % col)
+        keys = df[colin].rename(columns=dict(zip(colin, table.on)))
+        df[arr['colout']] = table.lookup(keys, col)
+        return df
+
+    def apply(self, obj, func, args, kwargs, arr):
+        """Apply function to series or dataframe
+
+        Depending on the function specification, the function is called once
+        with the input object, compiled with Numba, applied in worker
+        processes or applied serially with pandas.
+
+        :param obj: input series or dataframe
+        :param func: function to apply
+        :param tuple args: positional arguments of function
+        :param dict kwargs: keyword arguments of function
+        :param dict arr: function specification
+        :returns: result of apply
+        """
+
+        if arr.get('vectorized', False):
+            return func(obj, *args, **kwargs)
+
+        if arr.get('jit', False):
+            jit_func = self._get_jit_func(obj, func, kwargs)
+            if jit_func is not None:
+                jit_func, jit_errors = jit_func
+                try:
+                    return pd.Series(jit_func(obj.values, *args), index=obj.index)
+                except jit_errors as exc:
+                    # typing and compilation errors are raised when the function is called
+                    self.log().warning('Numba compilation of function %s failed; applying Python function (%s)'
+                                       % (str(func), str(exc).split('\n')[0]))
+                    self._jit_funcs[func] = None
+
+        # only partition rows if function is applied per element or per row
+        row_wise = isinstance(obj, pd.Series) or kwargs.get('axis', 0) in (1, 'columns')
+        if self.n_workers > 1 and row_wise and len(obj.index) > 1 and self._check_picklable(func):
+            self.log().debug('Applying function %s with %d workers' % (str(func), self.n_workers))
+            chunks = [obj.iloc[inds] for inds in np.array_split(np.arange(len(obj.index)), self.n_workers)]
+            with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+                results = list(executor.map(_apply_chunk, chunks, *zip(*[(func, args, kwargs)] * len(chunks))))
+            return pd.concat(results)
+
+        return obj.apply(func, args=args, **kwargs)
+
+    def _get_jit_func(self, obj, func, kwargs):
+        """Get function compiled with Numba and the Numba errors to catch, or None if not possible"""
+
+        if kwargs or not isinstance(obj, pd.Series) or not np.issubdtype(obj.dtype, np.number):
+            self.log().warning('Numba compilation of function %s requires a numeric input column and no kwargs'
+                               % str(func))
+            return None
+        if func not in self._jit_funcs:
+            try:
+                import numba
+                try:
+                    from numba.core.errors import NumbaError
+                except ImportError:
+                    from numba.errors import NumbaError
+                self._jit_funcs[func] = (numba.vectorize(func), NumbaError)
+            except ImportError:
+                self.log().warning('Numba not available; not compiling function %s' % str(func))
+                self._jit_funcs[func] = None
+        return self._jit_funcs[func]
+
+    def _check_picklable(self, func):
+        """Check if function can be sent to worker processes"""
+
+        try:
+            pickle.dumps(func)
+        except Exception:
+            self.log().warning('Function %s cannot be pickled; applying it without workers' % str(func))
+            return False
+        return True
+
+    def _groupby_apply(self, df, groupbyColumns, applyfunc, *args, **kwargs):
+        """Apply function to groups, optionally partitioning groups over worker processes"""
+
+        if self.n_workers < 2 or not self._check_picklable(applyfunc):
+            return df.groupby(groupbyColumns).apply(applyfunc, *args, **kwargs)
+
+        self.log().debug('Applying function %s to groups with %d workers' % (str(applyfunc), self.n_workers))
+        part = df.groupby(groupbyColumns).ngroup().values % self.n_workers
+        chunks = [df[part == i] for i in range(self.n_workers) if (part == i).any()]
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            results = list(executor.map(_groupby_apply_chunk, chunks,
+                                        *zip(*[(groupbyColumns, applyfunc, args, kwargs)] * len(chunks))))
+        # restore order of groups
+        levels = list(range(len(groupbyColumns))) if isinstance(groupbyColumns, list) else 0
+        return pd.concat(results).sort_index(level=levels, sort_remaining=False, kind='mergesort')
+
     def groupbyapply(self, df, groupbyColumns, applyfunc, *args, **kwargs):
         """Apply groupby to dataframe"""
 
         if 'groupbyColout' not in list(kwargs.keys()):
-            return df.groupby(groupbyColumns).apply(applyfunc, *args, **kwargs).reset_index(drop=True)
+            return self._groupby_apply(df, groupbyColumns, applyfunc, *args, **kwargs).reset_index(drop=True)
         else:
             colout = kwargs['groupbyColout']
             kwargs.pop('groupbyColout')
-            t = df.groupby(groupbyColumns).apply(applyfunc, *args, **kwargs)
+            t = self._groupby_apply(df, groupbyColumns, applyfunc, *args, **kwargs)
             for i in range(0, len(groupbyColumns)):
                 t.index = t.index.droplevel()
             df[colout] = t
@@ -21,6 +21,15 @@ from eskapade import ProcessManager, StatusCode, DataStore, Link
 class ApplySelectionToDf(Link):
     """
     Applies queries with sub-selections to a pandas.DataFrame
+
+    By default the queries are applied one after the other, each producing a
+    filtered dataframe.  With combineQueries set, the queries are combined
+    into a single expression, which is evaluated over the columns of the
+    input dataframe into one boolean mask (with numexpr, if available).  The
+    mask and the column selection are then applied at once, such that only
+    one copy of the data is made.  This is equivalent for element-wise
+    queries, but not for queries that depend on the selected records, such
+    as 'x > x.mean()'.
     """
 
     def __init__(self, **kwargs):
@@ -35,6 +44,7 @@ class ApplySelectionToDf(Link):
         :param list querySet: list of strings, query expressions to evaluate in the same order, see pandas documentation
         :param list selectColumns: column names to select after querying
         :param bool continueIfFailure: if True continues with next query after failure (optional)
+        :param bool combineQueries: if True evaluate all queries as one boolean mask over the input columns (optional)
         :param kwargs: all other key word arguments are passed on to the pandas queries.
         """
 
@@ -47,7 +57,8 @@ class ApplySelectionToDf(Link):
                              storeKey=None,
                              querySet=[],
                              selectColumns=[],
-                             continueIfFailure=False)
+                             continueIfFailure=False,
+                             combineQueries=False)
         
         # pass on remaining kwargs to pandas query
         self.kwargs = copy.deepcopy(kwargs)
@@ -82,6 +93,9 @@ class ApplySelectionToDf(Link):
 
         assert len(self.querySet) or len(self.selectColumns), 'No selections have been provided.'
 
+        if self.combineQueries and self.kwargs.get('inplace'):
+            raise ValueError('inplace queries cannot be combined; set combineQueries or inplace to False.')
+
         self.log().info('kwargs passed on to pandas query function are: %s' % self.kwargs )
         
         return StatusCode.Success
@@ -101,6 +115,16 @@ class ApplySelectionToDf(Link):
         assert self.readKey in list(ds.keys()), 'Key %s not in DataStore.' % self.readKey
         assert isinstance(ds[self.readKey],pd.DataFrame), 'Object with key %s is not a pandas DataFrame.' % self.readKey
 
+        # 0. apply combined queries and column selection in one go.
+        #    if this fails, fall back on applying them one after the other.
+        if self.combineQueries and len(self.querySet):
+            df = self._apply_combined(ds[self.readKey])
+            if df is not None:
+                ds[self.storeKey] = df
+                ds['n_'+self.storeKey] = len(df.index)
+                self.log().info('Stored dataframe with key <%s> and length <%d>.' % (self.storeKey, len(df.index)))
+                return StatusCode.Success
+
         # 1. apply queries to input dataframe.
         #    input dataframe is not overwritten, unless told to do so in kwargs.
         do_continue = True
@@ -151,3 +175,21 @@ class ApplySelectionToDf(Link):
         self.log().info('Stored dataframe with key <%s> and length <%d>.' % (self.storeKey, len(df.index)))
 
         return StatusCode.Success
+
+    def _apply_combined(self, df):
+        """ Apply queries as one boolean mask, together with the column selection
+
+        :param pandas.DataFrame df: input dataframe
+        :returns: selected dataframe, or None if the combined selection failed
+        :rtype: pandas.DataFrame
+        """
+
+        expr = ' & '.join('(%s)' % q for q in self.querySet)
+        try:
+            mask = df.eval(expr, **self.kwargs)
+            cols = self.selectColumns if len(self.selectColumns) else df.columns
+            return df.loc[mask.values, cols]
+        except Exception as exc:
+            self.log().warning('Failed to apply combined query <%s> to dataframe <%s>: %s; applying queries one by one.'
+                               % (expr, self.readKey, exc))
+            return None
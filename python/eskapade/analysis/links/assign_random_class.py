@@ -13,10 +13,10 @@
 # * LICENSE.                                                                       *
 # **********************************************************************************
 
-from numpy.random import RandomState
 from pandas import DataFrame
 
 from eskapade import ProcessManager, ConfigObject, StatusCode, DataStore, Link
+from eskapade.analysis.sampling import class_sizes, random_class_ids
 
 
 class AssignRandomClass(Link):
@@ -24,6 +24,10 @@ class AssignRandomClass(Link):
     AssignRandomClass randomly chooses a number of records that are to be added to the top X records that are
     returned to a client. In this way a top X also has a certain set of randomly chosen records. 
     E.g. these records make any overtraining less likely to happen.
+
+    The classes are assigned in one go, with a single random permutation of
+    the record positions.  Records that are not assigned to a class, e.g.
+    due to rounding of the fractions, get class 0.
     """
 
     def __init__(self, **kwargs):
@@ -47,7 +51,7 @@ class AssignRandomClass(Link):
                              readKey=None,
                              column='randomclass',
                              fractions=None,
-                             nevents=False,
+                             nevents=None,
                              nclasses=None)
         
         # check residual kwargs. exit if any present. 
@@ -124,37 +128,14 @@ class AssignRandomClass(Link):
             raise Exception('Column name <%s> already used: <%s>. Will not overwrite.' % (self.column, str(df.columns)))
 
         # fix final number of events assigned per random class
-        # ... each class gets at least one event
-        if self.nevents is not None:
-            if len(self.nevents) == self.nclasses - 1:
-                self.nevents.append(ndf - sum(n for n in self.nevents)) 
-        if self.nevents is None:
-            self.nevents = [int(ndf*f) for f in self.fractions]
-            pass
-        for i in range(self.nclasses):
-            nsum = sum(n for n in self.nevents[:i + 1])
-            ndiff = 0 if (nsum - ndf < 0) else (nsum - ndf)
-            self.nevents[i] -= ndiff 
-            if self.nevents[i] < 0:
-                self.nevents[i] = 0
-            pass
-        for i, n in enumerate(self.nevents):
-            assert n >= 0, 'Random class <%d> assigned nevents <%d> needs to be greater than zero. %s' % \
-                                                                                        (i, n, str(self.nevents))
+        nevents = class_sizes(ndf, self.nclasses, self.fractions, self.nevents)
+        for i, n in enumerate(nevents):
             self.log().info('Random class <%d> assigned n events <%d>.' % (i, n))
-            
-        # random reshuffling of dataframe indices
+
+        # random assignment of records to the n classes
         settings = ProcessManager().service(ConfigObject)
-        RNG = RandomState(settings['seed'])
-        permute = RNG.permutation(df.index)
-
-        # apply the random reshuffling, and assign records to the n classes
-        df[self.column] = 0
-        for i in range(self.nclasses):
-            ib = sum(n for n in self.nevents[:i])
-            ie = sum(n for n in self.nevents[:i + 1])
-            df.ix[permute[ib:ie],self.column] = i
-            pass
-        
-        return StatusCode.Success
+        ids = random_class_ids(ndf, nevents, settings['seed'])
+        ids[ids < 0] = 0
+        df[self.column] = ids
 
+        return StatusCode.Success
@@ -19,9 +19,80 @@ from eskapade import ProcessManager, Link, StatusCode, DataStore
 import copy
 
 
+class DfAccumulator(object):
+    """
+    Accumulates references to pandas dataframes and concatenates them on demand.
+
+    Chunks are not copied when they are added.  The concatenated dataframe is
+    only created when to_df() is called, and is cached until a new chunk is
+    added.  After materialization, the accumulated chunks are replaced by the
+    concatenated dataframe, such that they are not copied again.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Initialize DfAccumulator instance
+
+        :param kwargs: key word arguments passed on to pandas concat function
+        """
+
+        self.kwargs = kwargs
+        self._chunks = []
+        self._n_rows = 0
+        self._df = None
+
+    def __len__(self):
+        """ Number of accumulated rows """
+
+        return self._n_rows
+
+    @property
+    def n_chunks(self):
+        """ Number of accumulated chunks """
+
+        return len(self._chunks)
+
+    def append(self, df):
+        """
+        Add reference to dataframe
+
+        :param pandas.DataFrame df: dataframe to add
+        """
+
+        self._chunks.append(df)
+        self._n_rows += len(df.index)
+        self._df = None
+
+    def to_df(self):
+        """
+        Concatenate accumulated dataframes
+
+        :returns: concatenated dataframe
+        :rtype: pandas.DataFrame
+        """
+
+        if self._df is None:
+            if not self._chunks:
+                return pd.DataFrame()
+            elif len(self._chunks) == 1:
+                self._df = self._chunks[0].reset_index(drop=True)
+            else:
+                self._df = pd.concat(self._chunks, **self.kwargs).reset_index(drop=True)
+            self._chunks = [self._df]
+        return self._df
+
+
 class DfConcatenator(Link):
     """
     Concatenates multiple pandas datadrames.
+
+    In accumulate mode, e.g. in a repeated chain that processes chunks of
+    data, the input dataframes of every execution are collected as
+    references in a DfAccumulator, which is stored under storeKey.  The
+    collected dataframes are concatenated only once, at finalize, or on
+    demand by calling to_df() of the accumulator.  This avoids copying the
+    growing output in each execution.  The storeKey is skipped if it is one
+    of the readKeys.
     """
 
     def __init__(self, **kwargs):
@@ -32,6 +103,7 @@ class DfConcatenator(Link):
         :param str storeKey: key of data to store in data store
         :param list readKeys: keys of pandas dataframes in the data store
         :param bool ignore_missing_input: Skip missing input datasets. If all missing, store empty dataset. Default is false.
+        :param bool accumulate: accumulate input dataframes over executions and concatenate them at finalize. Default is false.
         :param kwargs: all other key word arguments are passed on to pandas concat function.
         """
         
@@ -42,9 +114,13 @@ class DfConcatenator(Link):
         self._process_kwargs(kwargs, readKeys=[])
         self._process_kwargs(kwargs, storeKey=None)
         self._process_kwargs(kwargs, ignore_missing_input=False)
+        self._process_kwargs(kwargs, accumulate=False)
 
         # pass on remaining kwargs to pandas reader 
         self.kwargs = copy.deepcopy(kwargs)
+
+        # accumulator of input dataframes in accumulate mode
+        self._acc = None
         
         return
 
@@ -69,12 +145,24 @@ class DfConcatenator(Link):
         # check if all input dataframes exist. if so configured, skip missing inputs, else raise e.
         data = []
         for c in self.readKeys:
+            if self.accumulate and c == self.storeKey:
+                continue
             if c not in ds:
                 if self.ignore_missing_input:
                     self.log().warning("<%s> is not a key in the datastore. Configured to skip it." % c)
                     continue
                 raise Exception("<%s> is not a key in the datastore" % c)
-            data.append(ds[c])
+            data.append(ds[c].to_df() if isinstance(ds[c], DfAccumulator) else ds[c])
+
+        # collect references to the dataframes
+        if self.accumulate:
+            if self._acc is None:
+                self._acc = DfAccumulator(**self.kwargs)
+            for df in data:
+                self._acc.append(df)
+            ds[self.storeKey] = self._acc
+            ds['n_'+self.storeKey] = len(self._acc)
+            return StatusCode.Success
 
         # concatenate the dataframes
         if len(data):
@@ -90,3 +178,20 @@ class DfConcatenator(Link):
         ds['n_'+self.storeKey] = len(df.index)
         
         return StatusCode.Success
+
+    def finalize(self):
+        """ Finalize DfConcatenator
+
+        In accumulate mode, concatenate the accumulated dataframes.
+        """
+
+        if self.accumulate and self._acc is not None:
+            ds = ProcessManager().service(DataStore)
+            if not self._acc.n_chunks and not self.ignore_missing_input:
+                raise Exception("Nothing to concatenate. This is not right. Exit.")
+            df = self._acc.to_df()
+            ds[self.storeKey] = df
+            ds['n_'+self.storeKey] = len(df.index)
+            self._acc = None
+
+        return StatusCode.Success
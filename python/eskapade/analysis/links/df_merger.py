@@ -14,13 +14,91 @@
 # **********************************************************************************
 
 import copy
+import itertools
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from eskapade import ProcessManager, Link, StatusCode, DataStore
+from eskapade.analysis.indexed_table import IndexedTable
+
+
+def _load_partition(chunks):
+    """Load partition of a dataframe from its chunks
+
+    :param list chunks: chunks of partition, either dataframes or paths of pickle files
+    :returns: partition
+    :rtype: pandas.DataFrame
+    """
+
+    dfs = [pd.read_pickle(c) if isinstance(c, str) else c for c in chunks]
+    return dfs[0] if len(dfs) == 1 else pd.concat(dfs, ignore_index=True)
+
+
+def _partition_keys(keys):
+    """Normalize merge keys for hashing
+
+    Numeric keys are converted to floats, such that equal values of integer
+    and float columns, e.g. a key column that was read as float because of
+    missing values, get the same hash.
+
+    :param pandas.DataFrame keys: key columns
+    :returns: normalized key columns
+    :rtype: pandas.DataFrame
+    """
+
+    num_cols = [c for c in keys.columns if pd.api.types.is_numeric_dtype(keys[c].dtype)
+                and not pd.api.types.is_bool_dtype(keys[c].dtype)]
+    if not num_cols:
+        return keys
+    return keys.astype(dict((c, np.float64) for c in num_cols))
+
+
+def _merge_partitions(chunks1, chunks2, merge_kwargs, out_path=None):
+    """Merge a pair of partitions of the two input dataframes
+
+    Module-level function, such that it can be executed by worker
+    processes.
+
+    :param list chunks1: chunks of partition of first dataframe
+    :param list chunks2: chunks of partition of second dataframe
+    :param dict merge_kwargs: key word arguments of pandas merge function
+    :param str out_path: path of pickle file to write merged partition to (optional)
+    :returns: merged partition or path of pickle file, and number of records
+    :rtype: tuple
+    """
+
+    dfout = pd.merge(_load_partition(chunks1), _load_partition(chunks2), **merge_kwargs)
+    if out_path:
+        dfout.to_pickle(out_path)
+        return out_path, len(dfout.index)
+    return dfout, len(dfout.index)
 
 
 class DfMerger(Link):
     """
     Merges two pandas DataFrames.
+
+    By default the merge is done in memory, with a single call to the pandas
+    merge function.  For joins that do not fit in memory, set n_partitions.
+    Both inputs are then hash-partitioned on the "on" keys, optionally
+    spilling the partitions to files, and each pair of partitions is merged
+    separately, optionally in parallel worker processes.  In this mode the
+    inputs may also be iterables of DataFrame chunks, e.g. the reader returned
+    by pandas.read_csv with a chunksize, such that neither input has to be in
+    memory as a whole.  The merged partitions are either concatenated or
+    stored as a list.  The order of the output records differs from that of an
+    in-memory merge.
+
+    The second input may also be an IndexedTable, a reference table with a
+    prebuilt index on the merge keys.  Left and inner merges are then done by
+    locating the keys of the first input in the index, without hashing the
+    reference table again.  This is useful when many dataframes, e.g. data
+    chunks, are merged with the same table.  Set index_input2 to let the link
+    build such a table from the second input and reuse it in later executions.
     """
 
     def __init__(self, **kwargs):
@@ -36,6 +114,12 @@ class DfMerger(Link):
         :param list columns1: column names of the first pandas.DataFrame. Only these columns are included in the merge. If not set, use all columns.
         :param list columns2: column names of the second pandas.DataFrame. Only these columns are included in the merge. If not set, use all columns.
         :param bool remove_duplicate_cols2: if True duplicate columns will be taken out before the merge (default=True)
+        :param int n_partitions: number of hash partitions for a partitioned merge. Default is 1: no partitioning.
+        :param str spill_dir: directory in which partitions are spilled to files in partitioned merge. If not set, partitions are kept in memory.
+        :param int n_workers: number of worker processes that merge partitions in parallel (default=1)
+        :param bool concat_output: concatenate merged partitions (default=True). If False, a list of merged partitions is stored, or a list of pickle-file paths if spill_dir is set, which can be read with ReadToDf.
+        :param bool index_input2: build an IndexedTable of the second input on the merge keys once and reuse it in subsequent executions (default=False)
+        :param str index_type: type of index of IndexedTable built from second input: hash or sorted (default=hash)
         :param kwargs: all other key word arguments are passed on to the pandas merge function.
         """
         
@@ -52,10 +136,20 @@ class DfMerger(Link):
                              on=['record_id'],
                              columns1=[],
                              columns2=[],
-                             remove_duplicate_cols2=True)
+                             remove_duplicate_cols2=True,
+                             n_partitions=1,
+                             spill_dir='',
+                             n_workers=1,
+                             concat_output=True,
+                             index_input2=False,
+                             index_type='hash')
         
         # pass on remaining kwargs to pandas reader 
         self.kwargs = copy.deepcopy(kwargs)
+
+        # indexed table built from second input, with the input it was built from
+        self._table = None
+        self._table_src = None
         
         return
 
@@ -72,6 +166,11 @@ class DfMerger(Link):
         assert (self.how == 'inner' or self.how == 'outer' or self.how == 'left' or self.how == 'right'), \
             'how to merge not specified correctly.'
         assert len(self.output_collection), 'output_collection not specified.'
+        assert isinstance(self.n_partitions, int) and self.n_partitions >= 1, 'n_partitions needs to be a positive integer.'
+        assert isinstance(self.n_workers, int) and self.n_workers >= 1, 'n_workers needs to be a positive integer.'
+        if self.spill_dir:
+            assert self.n_partitions > 1, 'spill_dir requires n_partitions > 1.'
+            assert os.path.isdir(self.spill_dir), 'spill_dir <%s> is not a directory.' % self.spill_dir
 
         # add back on to kwargs, so it's picked up by pandas.
         if self.on is not None:
@@ -95,32 +194,169 @@ class DfMerger(Link):
         assert self.input_collection2 in ds, 'Key %s not in DataStore.' % self.input_collection2
         df1 = ds[self.input_collection1]
         df2 = ds[self.input_collection2]
-        assert isinstance(df1,pd.DataFrame), 'Item %s is not a DataFrame.' % self.input_collection1
-        assert isinstance(df2,pd.DataFrame), 'Item %s is not a DataFrame.' % self.input_collection2
+
+        # build or reuse index of second input
+        if self.index_input2 and not isinstance(df2, IndexedTable):
+            assert isinstance(df2,pd.DataFrame), 'Item %s is not a DataFrame.' % self.input_collection2
+            if self._table_src is not df2:
+                self.log().debug('Building index of <%s> on keys %s' % (self.input_collection2, self.on))
+                self._table = IndexedTable(df2, on=self.on, index_type=self.index_type)
+                self._table_src = df2
+            df2 = self._table
+
+        # then do the merging.
+        if self.n_partitions > 1:
+            dfout, n_out = self._partitioned_merge(df1, df2.df if isinstance(df2, IndexedTable) else df2)
+        elif isinstance(df2, IndexedTable):
+            assert isinstance(df1,pd.DataFrame), 'Item %s is not a DataFrame.' % self.input_collection1
+            assert df2.on == self.on, 'keys of indexed table %s differ from merge keys.' % self.input_collection2
+            self._check_columns1(df1)
+            self._check_columns2(df2)
+            extra_kwargs = set(self.kwargs.keys()) - {'on', 'how', 'suffixes'}
+            if self.how in ('left', 'inner') and not extra_kwargs:
+                dfout = df2.merge(df1[self.columns1], how=self.how, columns=self.columns2,
+                                  suffixes=self.kwargs.get('suffixes', ('_x', '_y')))
+            else:
+                self.log().debug('Merge not supported by index of <%s>; doing pandas merge' % self.input_collection2)
+                dfout = pd.merge(df1[self.columns1], df2.df[self.columns2], **self.kwargs)
+            n_out = len(dfout.index)
+        else:
+            assert isinstance(df1,pd.DataFrame), 'Item %s is not a DataFrame.' % self.input_collection1
+            assert isinstance(df2,pd.DataFrame), 'Item %s is not a DataFrame.' % self.input_collection2
+            self._check_columns1(df1)
+            self._check_columns2(df2)
+            dfout = pd.merge(df1[self.columns1], df2[self.columns2], **self.kwargs)
+            n_out = len(dfout.index)
+
+        # storage
+        ds[self.output_collection] = dfout
+        ds['n_'+self.output_collection] = n_out
+
+        self.log().info('Put merged data <%s> with length <%d> in data store.' % (self.output_collection, n_out))
         
-        # check provided columns
+        return StatusCode.Success
+
+    def _check_columns1(self, df1):
+        """ Check and set selected columns of the first dataframe.
+        """
+
         if len(self.columns1) == 0:
             self.columns1 = df1.columns
         for col in self.columns1:
             assert col in df1.columns, 'column <%s> not in input_collection1' % col
+        for col in self.on:
+            assert col in self.columns1, 'key <%s> not in selected columns input_collection1' % col
+
+    def _check_columns2(self, df2):
+        """ Check and set selected columns of the second dataframe.
+
+        Requires the selected columns of the first dataframe.
+        """
+
         if len(self.columns2) == 0:
             self.columns2 = df2.columns
         for col in self.columns2:
             assert col in df2.columns, 'column <%s> not in input_collection2' % col
         for col in self.on:
-            assert col in self.columns1, 'key <%s> not in selected columns input_collection1' % col
-            assert col in self.columns2, 'key <%s> not in selected columns input_collection2' % col        
+            assert col in self.columns2, 'key <%s> not in selected columns input_collection2' % col
         if self.remove_duplicate_cols2:
             self.columns2 = [c for c in self.columns2 if c not in self.columns1]
-            self.columns2 += self.on
+            self.columns2 += [c for c in self.on if c not in self.columns2]
 
-        # then do the merging.
-        dfout = pd.merge(df1[self.columns1], df2[self.columns2], **self.kwargs)
+    def _iter_chunks(self, data, key):
+        """ Iterate over chunks of input data, which is a dataframe or an iterable of dataframes.
+        """
 
-        # storage
-        ds[self.output_collection] = dfout
-        ds['n_'+self.output_collection] = len(dfout.index)
+        if isinstance(data, pd.DataFrame):
+            yield data
+            return
+        assert hasattr(data, '__iter__'), 'Item %s is not a DataFrame or iterable of DataFrames.' % key
+        for chunk in data:
+            assert isinstance(chunk, pd.DataFrame), 'Item %s contains a chunk that is not a DataFrame.' % key
+            yield chunk
 
-        self.log().info('Put dataframe <%s> with length <%d> in data store.' % (self.output_collection,len(dfout.index)))
-        
-        return StatusCode.Success
+    def _partition(self, chunks, columns, tmp_dir, label):
+        """ Hash-partition input data on the merge keys.
+
+        Records are assigned to partitions by hashing their key values, such
+        that matching records of the two inputs end up in partitions with the
+        same index.  Partition chunks are written to pickle files in tmp_dir,
+        if set, with the label as file-name prefix.
+
+        :param chunks: iterable of input dataframes
+        :param list columns: selected columns of the input
+        :returns: chunks of each partition
+        :rtype: list
+        """
+
+        partitions = [[] for _ in range(self.n_partitions)]
+        for ich, chunk in enumerate(chunks):
+            chunk = chunk[columns]
+
+            # group record positions by partition id with one sort
+            keys = _partition_keys(chunk[self.on])
+            part_ids = pd.util.hash_pandas_object(keys, index=False).values % self.n_partitions
+            order = np.argsort(part_ids, kind='stable')
+            counts = np.bincount(part_ids.astype(np.int64), minlength=self.n_partitions)
+            ends = np.cumsum(counts)
+            starts = ends - counts
+            for ipart, (start, end) in enumerate(zip(starts, ends)):
+                # keep an empty chunk only for the first chunk, to preserve column types
+                if start == end and ich > 0:
+                    continue
+                part = chunk.take(order[start:end])
+                if tmp_dir:
+                    path = os.path.join(tmp_dir, '%s_part%d_chunk%d.pkl' % (label, ipart, ich))
+                    part.to_pickle(path)
+                    part = path
+                partitions[ipart].append(part)
+
+        return partitions
+
+    def _partitioned_merge(self, data1, data2):
+        """ Merge inputs by hash-partitioning them on the merge keys and merging each pair of partitions.
+
+        :returns: merged data and number of records
+        :rtype: tuple
+        """
+
+        tmp_dir = tempfile.mkdtemp(prefix=self.name + '_', dir=self.spill_dir) if self.spill_dir else ''
+        out_paths = [None] * self.n_partitions
+        if tmp_dir and not self.concat_output:
+            out_paths = [os.path.join(tmp_dir, '%s_part%d.pkl' % (self.output_collection, i))
+                         for i in range(self.n_partitions)]
+
+        parts1, parts2 = [], []
+        try:
+            self.log().debug('Partitioning inputs into %d partitions', self.n_partitions)
+            chunks1 = self._iter_chunks(data1, self.input_collection1)
+            chunks2 = self._iter_chunks(data2, self.input_collection2)
+            first1, first2 = next(chunks1, None), next(chunks2, None)
+            if first1 is None or first2 is None:
+                raise AssertionError('no data to merge in %s or %s' % (self.input_collection1, self.input_collection2))
+            self._check_columns1(first1)
+            self._check_columns2(first2)
+            parts1 = self._partition(itertools.chain([first1], chunks1), self.columns1, tmp_dir, 'in1')
+            parts2 = self._partition(itertools.chain([first2], chunks2), self.columns2, tmp_dir, 'in2')
+
+            # merge pairs of partitions
+            args = list(zip(parts1, parts2, [self.kwargs] * self.n_partitions, out_paths))
+            if self.n_workers > 1:
+                self.log().debug('Merging partitions with %d worker processes', self.n_workers)
+                with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+                    results = list(executor.map(_merge_partitions, *zip(*args)))
+            else:
+                results = [_merge_partitions(*a) for a in args]
+        finally:
+            # remove spilled input partitions
+            if tmp_dir:
+                for path in [p for parts in parts1 + parts2 for p in parts]:
+                    os.remove(path)
+                if self.concat_output:
+                    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        outputs = [r[0] for r in results]
+        n_out = sum(r[1] for r in results)
+        if self.concat_output:
+            return pd.concat(outputs, ignore_index=True), n_out
+        return outputs, n_out
@@ -3,7 +3,7 @@
 # * Class  : RandomSampleSplitter                                                  *
 # * Created: 2016/11/08                                                            *
 # * Description:                                                                   *
-# *      RandomSampleSplitter splits an input dataframe into N sub data frames.                                     *
+# *      RandomSampleSplitter splits an input dataframe into N sub data frames.   *
 # *                                                                                *
 # * Authors:                                                                       *
 # *      KPMG Big Data team, Amstelveen, The Netherlands                           *
@@ -14,16 +14,20 @@
 # **********************************************************************************
 
 import pandas as pd
-from numpy.random import RandomState
 
 from eskapade import ProcessManager, ConfigObject, StatusCode, DataStore, Link
+from eskapade.analysis.sampling import class_sizes, random_class_ids, class_positions
 
 
 class RandomSampleSplitter(Link):
     """
     RandomSampleSplitter splits an input dataframe into a number of sub data-frames. 
 
-    Records are assigned randomly.
+    Records are assigned randomly, with a single random permutation of the
+    record positions.  The sub samples are taken by position, in the
+    original order of the records.  In lazy mode, arrays with the positions
+    of the records are stored instead of the sub data-frames, such that no
+    copies are made, e.g. to select them later with df.take(positions).
     """
 
     def __init__(self, **kwargs):
@@ -35,6 +39,7 @@ class RandomSampleSplitter(Link):
         :param list storeKey: keys of datasets to store in data store. Number of sub samples equals length of storeKey list.
         :param list fractions: list of fractions (0<fraction<1) of records assigned to the sub samples. Sum can be less than 1. Needs to be set. 
         :param list nevents: list of number of random records assigned to the sub samples. (optional instead of 'fractions')
+        :param bool lazy: store arrays of record positions instead of sub data-frames (default False)
         """
         
         Link.__init__(self, kwargs.pop('name', 'RandomSampleSplitter'))
@@ -45,7 +50,8 @@ class RandomSampleSplitter(Link):
                              readKey=None,
                              storeKey=None,
                              fractions=None,
-                             nevents=False)
+                             nevents=None,
+                             lazy=False)
         
         # check residual kwargs. exit if any present. 
         self.check_extra_kwargs(kwargs)
@@ -119,39 +125,21 @@ class RandomSampleSplitter(Link):
             raise Exception('Retrieved object not of type pandas DataFrame.')
         ndf = len(df.index)
         assert ndf>0, 'dataframe %s is empty.' % self.readKey
-        if self.column in df.columns:
-            raise Exception('Column name <%s> already used: <%s>. Will not overwrite.' % (self.column,str(df.columns)))
 
         # fix final number of events assigned per random class
-        # ... each class gets at least one event
-        if self.nevents is not None:
-            if len(self.nevents) == self._nclasses-1:
-                self.nevents.append(ndf - sum(n for n in self.nevents)) 
-        if self.nevents is None:
-            self.nevents = [int(ndf*f) for f in self.fractions]
-            pass
-        for i in range(self._nclasses):
-            nsum = sum(n for n in self.nevents[:i+1])
-            ndiff = 0 if nsum-ndf<0 else nsum-ndf
-            self.nevents[i] -= ndiff 
-            pass
-        for i,n in enumerate(self.nevents):
-            assert n>=0, 'Random class <%d> assigned nevents <%n> needs to be greater than zero. %s' % \
-                (i,n,str(self.nevents))
+        nevents = class_sizes(ndf, self._nclasses, self.fractions, self.nevents)
+        for i,n in enumerate(nevents):
             self.log().info('Random class <%d> assigned n events <%d>.' % (i,n))
-            
-        # random reshuffling of dataframe indices
+
+        # random assignment of records to classes, and grouping of record positions by class
         settings = ProcessManager().service(ConfigObject)
-        RNG = RandomState(settings['seed'])
-        permute = RNG.permutation(df.index)
-
-        # apply the random reshuffling, and assign records to the n datasets
-        for i in range(self._nclasses):
-            ib = sum(n for n in self.nevents[:i])
-            ie = sum(n for n in self.nevents[:i+1])
-            df[self.storeKey[i]] = df.ix[permute[ib:ie]]
-            self.log().info('Stored output collection <%s> with <%d> records in datastore.' % \
-                            (self.storeKey[i],len(ds[self.storeKey[i]].index)) )
-        
-        return StatusCode.Success
+        ids = random_class_ids(ndf, nevents, settings['seed'])
+        positions = class_positions(ids, self._nclasses)
 
+        # assign records to the n datasets
+        for key, pos in zip(self.storeKey, positions):
+            ds[key] = pos if self.lazy else df.take(pos)
+            self.log().info('Stored output %s <%s> with <%d> records in datastore.' % \
+                            ('positions' if self.lazy else 'collection', key, len(pos)))
+
+        return StatusCode.Success
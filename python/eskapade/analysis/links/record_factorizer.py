@@ -16,8 +16,11 @@
 # * LICENSE.                                                                       *
 # **********************************************************************************
 
+import os
+import glob
+import urllib.parse
+import numpy as np
 import pandas as pd
-import copy
 from pandas import DataFrame
 try:
     from pandas.types.dtypes import CategoricalDtypeType
@@ -26,6 +29,9 @@ except ImportError:
 import fnmatch
 
 from eskapade import ProcessManager, Link, StatusCode, DataStore
+from eskapade.analysis.factorization import CategoryEncoder
+
+ENCODER_FILE_EXT = '.pkl'
 
 
 class RecordFactorizer(Link):
@@ -36,6 +42,12 @@ class RecordFactorizer(Link):
     tranformed into columns x with values 0, 1, 2, 0, 2, etc.  Resulting
     dataset stored as new dataset.  Alternatively, map transformed columns
     back to orginal format.
+
+    The factorization is done with a category encoder per column, which is
+    kept by the link.  When the link is executed multiple times, e.g. on
+    chunks of data in a repeated chain, values are mapped onto the same
+    codes in each chunk and new values are appended to the encoders.  The
+    encoders can be stored in a directory and loaded in a later run.
     """
 
     def __init__(self, **kwargs):
@@ -49,12 +61,23 @@ class RecordFactorizer(Link):
         :param bool convert_all_categories: if true, convert all catergory observables. Default is false.
         :param bool convert_all_booleans: if true, convert all boolean observables. Default is false.
         :param dict map_to_original: dictiorary or key to dictionary to map back factorized columns to original.
-                                     map_to_original is a dict of dicts, one dict for each column.
+                                     map_to_original is a dict of dicts, or of category encoders, one for each
+                                     column.  Codes are mapped back by indexing an array of original values.
         :param str store_key: store key of output dataFrame. Default is read_key + '_fact'. (optional)
         :param str sk_map_to_original: store key of dictiorary to map factorized columns to original.
                                        Default is 'key' + '_' + store_key + '_to_original'. (optional)
         :param str sk_map_to_factorized: store key of dictiorary to map original to factorized columns.
                                          Default is 'key' + '_' + read_key + '_to_factorized'. (optional)
+        :param encoders: dictionary of category encoders, or key to dictionary in the data store, used for
+                         factorization.  These take precedence over encoders loaded from encoders_path.
+                         Missing columns get a new encoder. (optional)
+        :param str sk_encoders: store key of dictionary of category encoders.
+                                Default is 'encoders_' + read_key. (optional)
+        :param str encoders_path: path of directory with category encoders, one file per column.  Encoders are
+                                  loaded from this directory at initialization, if it exists, and saved in it
+                                  at finalization. (optional)
+        :param bool as_categorical: when mapping back to original, store columns as pandas categoricals.
+                                    Default is False. (optional)
         """
 
         Link.__init__(self, kwargs.pop('name', 'RecordFactorizer'))
@@ -70,6 +93,10 @@ class RecordFactorizer(Link):
                              sk_map_to_original='',
                              sk_map_to_factorized='',
                              map_to_original={},
+                             encoders={},
+                             sk_encoders='',
+                             encoders_path='',
+                             as_categorical=False,
                              inplace=False)
 
         # check residual kwargs. exit if any present
@@ -79,6 +106,10 @@ class RecordFactorizer(Link):
         self._mtf = {}
         # map to original, dict set below
         self._mto = {}
+        # category encoders, filled during execution
+        self._encoders = {}
+        # decoders of map-to-original dictionaries, filled during execution
+        self._decoders = {}
 
     def initialize(self):
         """Initialize RecordFactorizer
@@ -87,7 +118,8 @@ class RecordFactorizer(Link):
         the RecordFactorizer
         """
 
-        self.check_arg_types(read_key=str, store_key=str, sk_map_to_original=str, sk_map_to_factorized=str)
+        self.check_arg_types(read_key=str, store_key=str, sk_map_to_original=str, sk_map_to_factorized=str,
+                             sk_encoders=str, encoders_path=str)
         self.check_arg_types(recurse=True, allow_none=True, columns=str)
         self.check_arg_vals('read_key')
 
@@ -104,10 +136,24 @@ class RecordFactorizer(Link):
         if not self.sk_map_to_factorized:
             self.sk_map_to_factorized = 'map_' + self.read_key + '_to_factorized'
             self.log().debug('storage key <sk_map_to_factorized> has been set to "%s"', self.sk_map_to_factorized)
+        if not self.sk_encoders:
+            self.sk_encoders = 'encoders_' + self.read_key
+            self.log().debug('storage key <sk_encoders> has been set to "%s"', self.sk_encoders)
 
         if self.map_to_original and not isinstance(self.map_to_original, str)\
                 and not isinstance(self.map_to_original, dict):
             raise TypeError('map_to_original needs to be a dict or string (to fetch a dict from the datastore)')
+        if self.encoders and not isinstance(self.encoders, (str, dict)):
+            raise TypeError('encoders needs to be a dict or string (to fetch a dict from the datastore)')
+
+        # load encoders of a previous run
+        if self.encoders_path and os.path.isdir(self.encoders_path):
+            self.log().debug('Loading category encoders from directory "%s"', self.encoders_path)
+            for enc_path in glob.glob(os.path.join(self.encoders_path, '*' + ENCODER_FILE_EXT)):
+                col = urllib.parse.unquote(os.path.basename(enc_path)[:-len(ENCODER_FILE_EXT)])
+                self._encoders[col] = CategoryEncoder.import_from_file(enc_path)
+        elif self.encoders_path and os.path.exists(self.encoders_path):
+            raise RuntimeError('encoders path "%s" is not a directory' % self.encoders_path)
 
         return StatusCode.Success
 
@@ -155,38 +201,88 @@ class RecordFactorizer(Link):
             elif isinstance(self.map_to_original, dict):
                 self._mto = self.map_to_original
             assert isinstance(self._mto, dict), 'map_to_original needs to be a dict'
+        # retrieve encoders from ds
+        if self.encoders:
+            encoders = ds[self.encoders] if isinstance(self.encoders, str) else self.encoders
+            assert isinstance(encoders, dict), 'encoders needs to be a dict'
+            # explicitly specified encoders take precedence over encoders loaded from file
+            self._encoders.update(encoders)
 
         # 1. do factorization for all specified columns
         if not self.map_to_original:
             df_fact = df if self.inplace else pd.DataFrame(index=df.index)
             for c in self.columns:
                 self.log().debug('Factorizing column "%s" of dataframe "%s"', c, self.read_key)
-                labels, unique = df[c].factorize()
-                df_fact[c] = labels
-                self._mto[c] = dict((i, v) for i, v in enumerate(unique))
-                self._mtf[c] = dict((v, i) for i, v in enumerate(unique))
+                enc = self._encoders.setdefault(c, CategoryEncoder())
+                n_cats = len(enc)
+                df_fact[c] = enc.encode(df[c])
+                # only rebuild mapping dicts if categories have been added
+                if n_cats != len(enc) or c not in self._mto:
+                    self._mto[c] = enc.to_dict()
+                    self._mtf[c] = enc.to_dict(inverse=True)
             # store the mapping here
             ds[self.sk_map_to_original] = self._mto
             ds[self.sk_map_to_factorized] = self._mtf
+            ds[self.sk_encoders] = self._encoders
         # 2. do the mapping back to original format
         else:
-            # pandas replace() will not do transformations that are identical, including int 0/1 to bool.
-            # skip those column tranformations
-            mto = copy.copy(self._mto)
+            df_fact = df if self.inplace else df.copy(deep=False)
             for c, c_mto in self._mto.items():
-                k = list(c_mto.keys())
-                v = list(c_mto.values())
-                if set(k) & set(v):
-                    # true in case of indentical transformation
-                    self.log().debug('Identical transformation for column "%s". Skipping column', c)
-                    del mto[c]
-            # refactorizing
-            self.log().debug('Refactorizing columns %s of dataframe "%s"', list(mto.keys()), self.read_key)
-            df_fact = df.replace(mto, inplace=self.inplace)
-            if self.inplace:
-                df_fact = df
+                if c not in df.columns:
+                    self.log().debug('Column "%s" not in dataframe "%s". Skipping column', c, self.read_key)
+                    continue
+                self.log().debug('Mapping column "%s" of dataframe "%s" to original', c, self.read_key)
+                df_fact[c] = self._map_to_original_values(c, c_mto, df[c].values)
 
         # storage
         ds[self.store_key] = df_fact
 
         return StatusCode.Success
+
+    def _map_to_original_values(self, col, col_mto, codes):
+        """Map factorized values of a column back to original values
+
+        The mapping is done by indexing an array of original values with
+        the codes.  Codes that are not present in the mapping are mapped
+        onto null values.  The decoder of a dictionary is cached; the
+        dictionary is assumed to change only by adding categories.
+
+        :param str col: name of column
+        :param col_mto: category encoder or dictionary that maps codes to original values
+        :param codes: array of codes
+        :returns: array of original values, or categorical if as_categorical is set
+        """
+
+        if isinstance(col_mto, CategoryEncoder):
+            return col_mto.decode(codes, as_categorical=self.as_categorical)
+
+        # convert dictionary to decoder only once; rebuild decoder for a new dictionary or if categories were added
+        dec_mto, dec_len, dec = self._decoders.get(col, (None, 0, None))
+        if dec_mto is not col_mto or dec_len != len(col_mto):
+            try:
+                dec = CategoryEncoder.from_dict(col_mto)
+            except ValueError:
+                # no consecutive codes or no unique values: look up position of codes in dictionary keys
+                dec = (pd.Index(list(col_mto.keys())), np.array(list(col_mto.values()) + [None], dtype=object))
+            self._decoders[col] = (col_mto, len(col_mto), dec)
+        if isinstance(dec, CategoryEncoder):
+            return dec.decode(codes, as_categorical=self.as_categorical)
+
+        keys, vals = dec
+        vals = pd.Series(vals.take(keys.get_indexer(codes))).infer_objects()
+        return vals.astype('category').values if self.as_categorical else vals.values
+
+    def finalize(self):
+        """Finalize RecordFactorizer
+
+        Save the category encoders in a directory, if a path was specified.
+        """
+
+        if self.encoders_path and self._encoders:
+            self.log().debug('Saving category encoders in directory "%s"', self.encoders_path)
+            os.makedirs(self.encoders_path, exist_ok=True)
+            for col, enc in self._encoders.items():
+                enc_file = urllib.parse.quote(str(col), safe='') + ENCODER_FILE_EXT
+                enc.persist_in_file(os.path.join(self.encoders_path, enc_file))
+
+        return StatusCode.Success
@@ -0,0 +1,142 @@
+# **********************************************************************************
+# * Project: Eskapade - A python-based package for data analysis                   *
+# * Class  : StreamToDf                                                            *
+# * Created: 2017/07/20                                                            *
+# * Description:                                                                   *
+# *      Algorithm to read micro-batches of records from asynchronous stream       *
+# *      sources into pandas dataframes.                                           *
+# *                                                                                *
+# * Authors:                                                                       *
+# *      KPMG Big Data team, Amstelveen, The Netherlands                           *
+# *                                                                                *
+# * Redistribution and use in source and binary forms, with or without             *
+# * modification, are permitted according to the terms listed in the file          *
+# * LICENSE.                                                                       *
+# **********************************************************************************
+
+import pandas as pd
+
+from eskapade import ProcessManager, Link, StatusCode, DataStore, ConfigObject
+from eskapade.analysis.streaming import StreamSource, StreamBuffer
+
+
+class StreamToDf(Link):
+    """Read micro-batches of records from stream sources into a dataframe
+
+    The stream sources, e.g. tailed files, sockets or message queues, are
+    read concurrently in an asyncio event loop in a background thread.  The
+    records are collected in a bounded buffer: when the buffer is full, the
+    sources wait until the chain has processed the current batch.
+
+    At each execution, the link takes a batch of records from the buffer,
+    converts it into a dataframe and stores it in the data store.  As with
+    ReadToDf, the link requests a repetition of its chain by a RepeatChain
+    link, until all sources are exhausted or no records are received within
+    the idle timeout.
+    """
+
+    def __init__(self, **kwargs):
+        """Initialize StreamToDf instance
+
+        :param str name: name of link
+        :param str key: storage key for the dataframe in the data store
+        :param list sources: stream sources, instances of StreamSource
+        :param int batch_size: maximum number of records per batch (default 1000)
+        :param float batch_timeout: maximum time in seconds to fill a batch after its first record (default 1.0)
+        :param float idle_timeout: maximum time in seconds to wait for a first record.  If not set, wait forever.
+        :param int buffer_size: maximum number of buffered records (default 10000)
+        :param parser: function to convert a record into a dict or tuple of column values (optional)
+        :param list columns: column names of the dataframe (optional)
+        :param str sep: separator to split text records into column values (optional)
+        """
+
+        # initialize Link, pass name from kwargs
+        Link.__init__(self, kwargs.pop('name', 'StreamToDf'))
+
+        # process and register all relevant kwargs. kwargs are added as attributes of the link.
+        # second arg is default value for an attribute. key is popped from kwargs.
+        self._process_kwargs(kwargs, key='', sources=[], batch_size=1000, batch_timeout=1.0, idle_timeout=None,
+                             buffer_size=10000, parser=None, columns=None, sep=None)
+
+        # check residual kwargs. exit if any present.
+        self.check_extra_kwargs(kwargs)
+
+        self._buffer = None
+        self._sum_data_length = 0
+
+    def initialize(self):
+        """Initialize StreamToDf"""
+
+        assert isinstance(self.key, str) and self.key, 'output key not set'
+        if isinstance(self.sources, StreamSource):
+            self.sources = [self.sources]
+        assert self.sources and all(isinstance(s, StreamSource) for s in self.sources),\
+            'sources must be specified as stream sources'
+        assert isinstance(self.batch_size, int) and self.batch_size > 0, 'batch size must be a positive integer'
+        assert isinstance(self.buffer_size, int) and self.buffer_size >= self.batch_size,\
+            'buffer size must be an integer not smaller than the batch size'
+        assert self.parser is None or callable(self.parser), 'parser must be callable'
+        assert self.sep is None or isinstance(self.sep, str), 'separator must be a string'
+
+        # start producing records in the background
+        self._buffer = StreamBuffer(self.sources, max_size=self.buffer_size)
+        self._buffer.start()
+        self.log().info('Reading %d stream sources in batches of at most %d records',
+                        len(self.sources), self.batch_size)
+
+        return StatusCode.Success
+
+    def execute(self):
+        """Execute StreamToDf
+
+        Takes the next batch of records from the stream buffer and puts the
+        dataframe in the data store.
+        """
+
+        ds = ProcessManager().service(DataStore)
+        settings = ProcessManager().service(ConfigObject)
+
+        records = self._buffer.get_batch(self.batch_size, self.batch_timeout, self.idle_timeout)
+        df = self._to_df(records)
+
+        # pass on to the (possible) repeater at the end of chain if more records are coming up
+        finished = self._buffer.finished
+        settings['chainRepeatRequestBy_' + self.name] = not finished
+        if finished:
+            self.log().info('All stream sources are done')
+
+        numentries = len(df.index)
+        self._sum_data_length += numentries
+        self.log().info('Read next <%d> records; summing up to <%d>.', numentries, self._sum_data_length)
+
+        # store dataframe and number of entries
+        ds[self.key] = df
+        ds['n_' + self.key] = numentries
+        ds['n_sum_' + self.key] = self._sum_data_length
+
+        return StatusCode.Success
+
+    def finalize(self):
+        """Finalize StreamToDf"""
+
+        if self._buffer is not None:
+            self._buffer.stop()
+            self._buffer = None
+
+        return StatusCode.Success
+
+    def _to_df(self, records):
+        """Convert batch of records into dataframe"""
+
+        if self.parser is not None:
+            records = [self.parser(r) for r in records]
+        elif self.sep is not None:
+            records = [r.split(self.sep) for r in records]
+        if not records:
+            return pd.DataFrame(columns=self.columns)
+        if isinstance(records[0], dict):
+            df = pd.DataFrame.from_records(records)
+            return df if self.columns is None else df.reindex(columns=self.columns)
+        if isinstance(records[0], (tuple, list)):
+            return pd.DataFrame.from_records(records, columns=self.columns)
+        return pd.DataFrame({self.columns[0] if self.columns else 'record': records})
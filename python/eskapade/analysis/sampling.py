@@ -0,0 +1,84 @@
+# ********************************************************************************
+# * Project: Eskapade - A python-based package for data analysis                 *
+# * Module : sampling                                                            *
+# * Created: 2017/07/19                                                          *
+# * Description:                                                                 *
+# *      Helper functions for the random assignment of records to a number of    *
+# *      classes, e.g. to split a data set into random sub samples.              *
+# *                                                                              *
+# * Authors:                                                                     *
+# *      KPMG Big Data team, Amstelveen, The Netherlands                         *
+# *                                                                              *
+# * Redistribution and use in source and binary forms, with or without           *
+# * modification, are permitted according to the terms listed in the file        *
+# * LICENSE.                                                                     *
+# ********************************************************************************
+
+import numpy as np
+from numpy.random import RandomState
+
+
+def class_sizes(ndf, nclasses, fractions=None, nevents=None):
+    """
+    Determine number of records per random class
+
+    The number of records is taken from nevents if set, else from fractions.
+    If nevents has one element less than the number of classes, the last
+    class gets the remaining records.  Class sizes are capped such that the
+    total does not exceed the number of records.
+
+    :param int ndf: total number of records
+    :param int nclasses: number of classes
+    :param list fractions: fractions of records per class
+    :param list nevents: numbers of records per class
+    :returns: number of records per class
+    :rtype: numpy.ndarray
+    """
+
+    if nevents is not None:
+        sizes = list(nevents)
+        if len(sizes) == nclasses - 1:
+            sizes.append(ndf - sum(sizes))
+        sizes = np.array(sizes, dtype=np.int64)
+    else:
+        # derive sizes from cumulative fractions, such that fractions that add up to one cover all records
+        bounds = np.floor(ndf * np.cumsum(np.array(fractions, dtype=np.float64)) + 1e-6).astype(np.int64)
+        sizes = np.diff(bounds, prepend=0)
+
+    # each class gets at most the remaining records
+    return np.maximum(np.diff(np.minimum(np.cumsum(sizes), ndf), prepend=0), 0)
+
+
+def random_class_ids(ndf, sizes, seed):
+    """
+    Randomly assign records to classes
+
+    Uses a single random permutation of record positions.  Records that are
+    not assigned to a class get class ID -1.
+
+    :param int ndf: number of records
+    :param sizes: number of records per class
+    :param int seed: seed of random-number generator
+    :returns: class ID per record
+    :rtype: numpy.ndarray
+    """
+
+    permute = RandomState(seed).permutation(ndf)
+    ids = np.full(ndf, -1, dtype=np.int64)
+    ids[permute[:sizes.sum()]] = np.repeat(np.arange(len(sizes)), sizes)
+    return ids
+
+
+def class_positions(ids, nclasses):
+    """
+    Group record positions by class
+
+    :param numpy.ndarray ids: class ID per record; -1 for records not in a class
+    :param int nclasses: number of classes
+    :returns: list of arrays with record positions of each class, in original order
+    :rtype: list
+    """
+
+    order = np.argsort(ids, kind='stable')
+    bounds = np.cumsum(np.bincount(ids + 1, minlength=nclasses + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(nclasses)]
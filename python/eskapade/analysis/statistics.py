@@ -8,6 +8,7 @@ from eskapade.analysis.histogram import BinningUtil
 from eskapade.mixins import LoggingMixin
 
 NUM_NS_DAY = 24 * 3600 * int(1e9)
+CNT_STATS = ('count', 'filled', 'distinct', 'nan')
 
 
 class ArrayStats(LoggingMixin):
@@ -196,6 +197,37 @@ class ArrayStats(LoggingMixin):
                 self.print_lines.append('{{0:{:d}s}} : {{1:s}}'.format(name_len)
                                         .format(stat_var, self.stat_vals[stat_var][1]))
 
+    def set_stats(self, stat_vals, drop=()):
+        """Set values of statistics
+
+        Replaces computed statistics, e.g. by exact values from accumulated
+        moments when the statistics were computed from a histogram.
+
+        :param dict stat_vals: values of statistics; numeric values for time stamps in nanoseconds
+        :param list drop: statistics to remove
+        """
+
+        if not self.stat_vals:
+            self.create_stats()
+        col_props = self.get_col_props()
+        for stat_var in drop:
+            if stat_var in self.stat_vals:
+                self.stat_vars.remove(stat_var)
+                del self.stat_vals[stat_var]
+        for stat_var, stat_val in stat_vals.items():
+            if stat_var not in self.stat_vals:
+                # keep value counts in front of other statistics
+                n_cnt = len([v for v in self.stat_vars if v in CNT_STATS])
+                self.stat_vars.insert(n_cnt if stat_var in CNT_STATS else len(self.stat_vars), stat_var)
+            if stat_var in CNT_STATS:
+                self.stat_vals[stat_var] = (int(stat_val), '{:d}'.format(int(stat_val)))
+            elif not col_props['is_ts']:
+                self.stat_vals[stat_var] = (stat_val, '{:+g}'.format(stat_val))
+            elif stat_var != 'std':
+                self.stat_vals[stat_var] = (pd.Timestamp(int(stat_val)), str(pd.Timestamp(int(stat_val))))
+            else:
+                self.stat_vals[stat_var] = (stat_val / NUM_NS_DAY, '{:g}'.format(stat_val / NUM_NS_DAY))
+
     def get_print_stats(self, to_output=False):
         """Get statistics in printable form
 
@@ -383,11 +415,181 @@ class GroupByStats(ArrayStats):
         return tabulate.tabulate(self.table, tablefmt='latex')
 
 
+class SummaryAccumulator(LoggingMixin):
+    """Accumulator of column summaries over data chunks
+
+    The accumulator collects, for each column, the statistics that are
+    needed for a summary report, without keeping the column values: null
+    counts and moments (count, sum, sum of squares, minimum and maximum) of
+    numeric and time-stamp columns, and histograms.  Numeric columns are
+    histogrammed in fine bins, of which the width is determined from the
+    range of the first chunk; bins outside that range are added as needed.
+    If the bins then span more than twice n_fine_bins, pairs of neighbouring
+    bins are merged, such that the number of bins stays bounded.
+    Categorical columns are summarized by their value counts.  All numeric
+    columns of a chunk are processed in one vectorized pass.
+
+    >>> acc = SummaryAccumulator()
+    >>> for chunk in pd.read_csv('data.csv', chunksize=100000):
+    ...     acc.update(chunk)
+    >>> labels, counts = acc.histogram('x')
+    """
+
+    def __init__(self, n_fine_bins=1000):
+        """Initialize SummaryAccumulator instance
+
+        :param int n_fine_bins: number of fine histogram bins in the value range of the first chunk (default 1000)
+        """
+
+        self.n_fine_bins = n_fine_bins
+        self.columns = None
+        self.n_records = 0
+        self.dtypes = {}
+        self.nan_counts = {}
+        self._num_cols = []
+        self._cat_cols = []
+        self._moments = None
+        self._bin_specs = None
+        self._bin_counts = {}
+        self._value_counts = {}
+
+    def _init_num_stats(self, values):
+        """Initialize moments and binning of numeric columns from first chunk"""
+
+        n_cols = len(self._num_cols)
+        mask = ~np.isnan(values)
+        any_val = mask.any(axis=0)
+        v_min = np.where(any_val, np.nanmin(np.where(mask, values, np.inf), axis=0), 0.)
+        v_max = np.where(any_val, np.nanmax(np.where(mask, values, -np.inf), axis=0), 0.)
+
+        # bin width and offset per column: integer columns and time stamps get bins around integer values
+        width = np.where(v_max > v_min, (v_max - v_min) / self.n_fine_bins, 1.)
+        offset = v_min.copy()
+        for i, col in enumerate(self._num_cols):
+            if get_col_props(self.dtypes[col])['is_int']:
+                width[i] = max(1., np.ceil(width[i]))
+                offset[i] = v_min[i] - 0.5
+        self._bin_specs = np.vstack([width, offset])
+
+        # moments are summed relative to the mean of the first chunk, for numerical accuracy
+        shift = np.where(mask, values, 0.).sum(axis=0) / np.maximum(mask.sum(axis=0), 1)
+        self._moments = dict(shift=shift, n=np.zeros(n_cols), sum=np.zeros(n_cols), sumsq=np.zeros(n_cols),
+                             min=np.full(n_cols, np.inf), max=np.full(n_cols, -np.inf))
+
+    def _num_values(self, df):
+        """Get values of numeric columns as floats; time stamps in nanoseconds"""
+
+        values = np.empty((len(df.index), len(self._num_cols)), dtype=np.float64)
+        for i, col in enumerate(self._num_cols):
+            if get_col_props(self.dtypes[col])['is_ts']:
+                ts = pd.to_datetime(df[col])
+                values[:, i] = np.where(ts.isnull(), np.nan, ts.values.astype('datetime64[ns]').astype(np.int64))
+            else:
+                values[:, i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        return values
+
+    def update(self, df):
+        """Update statistics with chunk of data
+
+        :param pandas.DataFrame df: data chunk; columns of the first chunk are used
+        """
+
+        if self.columns is None:
+            self.columns = list(df.columns)
+            self.dtypes = dict((col, df[col].dtype) for col in self.columns)
+            self.nan_counts = dict((col, 0) for col in self.columns)
+            self._num_cols = [c for c in self.columns if get_col_props(self.dtypes[c])['is_num']]
+            self._cat_cols = [c for c in self.columns if c not in self._num_cols]
+            values = self._num_values(df)
+            self._init_num_stats(values)
+        else:
+            values = self._num_values(df)
+        self.n_records += len(df.index)
+
+        # moments and fine-bin histograms of all numeric columns
+        mask = ~np.isnan(values)
+        mom = self._moments
+        dev = np.where(mask, values - mom['shift'], 0.)
+        mom['n'] += mask.sum(axis=0)
+        mom['sum'] += dev.sum(axis=0)
+        mom['sumsq'] += (dev * dev).sum(axis=0)
+        if len(values):
+            mom['min'] = np.minimum(mom['min'], np.where(mask, values, np.inf).min(axis=0))
+            mom['max'] = np.maximum(mom['max'], np.where(mask, values, -np.inf).max(axis=0))
+        with np.errstate(invalid='ignore'):
+            bin_idx = np.floor((values - self._bin_specs[1]) / self._bin_specs[0])
+        for i, col in enumerate(self._num_cols):
+            self.nan_counts[col] += int(len(values) - mask[:, i].sum())
+            idx, cnt = np.unique(bin_idx[mask[:, i], i].astype(np.int64), return_counts=True)
+            counts = pd.Series(cnt, index=idx)
+            if col in self._bin_counts:
+                counts = self._bin_counts[col].add(counts, fill_value=0).astype(np.int64)
+            self._bin_counts[col] = self._merge_bins(i, counts)
+
+        # value counts of categorical columns
+        for col in self._cat_cols:
+            self.nan_counts[col] += int(df[col].isnull().sum())
+            counts = df[col].value_counts(dropna=True)
+            self._value_counts[col] = counts if col not in self._value_counts \
+                else self._value_counts[col].add(counts, fill_value=0).astype(np.int64)
+
+    def _merge_bins(self, i, counts):
+        """Merge pairs of neighbouring fine bins of numeric column while the bins span too wide a range"""
+
+        while len(counts.index) and counts.index.max() - counts.index.min() >= 2 * self.n_fine_bins:
+            # bins with the same offset and double width contain exactly two of the original bins
+            self._bin_specs[0, i] *= 2
+            counts = counts.groupby(counts.index // 2).sum()
+        return counts
+
+    def moments(self, col):
+        """Get moments of numeric column
+
+        :param str col: column name
+        :returns: count of non-null values, mean, standard deviation, minimum and maximum
+        :rtype: dict
+        """
+
+        i = self._num_cols.index(col)
+        mom = self._moments
+        n = mom['n'][i]
+        if not n:
+            return dict(filled=0)
+        mean = mom['sum'][i] / n
+        var = (mom['sumsq'][i] - n * mean ** 2) / (n - 1) if n > 1 else 0.
+        return dict(filled=int(n), mean=mean + mom['shift'][i], std=np.sqrt(max(var, 0.)), min=mom['min'][i],
+                    max=mom['max'][i])
+
+    def histogram(self, col):
+        """Get histogram of column
+
+        :param str col: column name
+        :returns: bin centers (numeric columns) or values (categorical columns), and bin counts
+        :rtype: tuple
+        """
+
+        if col in self._cat_cols:
+            counts = self._value_counts.get(col, pd.Series(dtype=np.int64))
+            return np.asarray(counts.index, dtype=object), counts.values
+        i = self._num_cols.index(col)
+        counts = self._bin_counts.get(col, pd.Series(dtype=np.int64)).sort_index()
+        centers = self._bin_specs[1, i] + (counts.index.values + 0.5) * self._bin_specs[0, i]
+        props = get_col_props(self.dtypes[col])
+        if props['is_int']:
+            centers = np.round(centers).astype(np.int64)
+        elif props['is_ts']:
+            centers = pd.to_datetime(np.round(centers).astype(np.int64)).values
+        return centers, counts.values
+
+
 def get_col_props(var_type):
     """Get column properties
 
     :returns dict: Column properties
     """
+    # pandas extension types are represented by their numpy types; object type if there is none
+    if isinstance(var_type, pd.api.extensions.ExtensionDtype):
+        var_type = getattr(var_type, 'numpy_dtype', object)
     npdtype = np.dtype(var_type)
 
     # determine data-type categories
@@ -0,0 +1,309 @@
+# ********************************************************************************
+# * Project: Eskapade - A python-based package for data analysis                 *
+# * Class  : StreamSource, StreamBuffer                                          *
+# * Created: 2017/07/20                                                          *
+# * Description:                                                                 *
+# *      Asynchronous stream sources and a bounded record buffer, used to        *
+# *      fill micro-batch dataframes from multiple producers.                    *
+# *                                                                              *
+# * Authors:                                                                     *
+# *      KPMG Big Data team, Amstelveen, The Netherlands                         *
+# *                                                                              *
+# * Redistribution and use in source and binary forms, with or without           *
+# * modification, are permitted according to the terms listed in the file        *
+# * LICENSE.                                                                     *
+# ********************************************************************************
+
+import asyncio
+import os
+import threading
+from queue import Empty
+
+from eskapade.mixins import LoggingMixin
+
+# marker put in the buffer by a producer that is done
+_PRODUCER_DONE = object()
+
+
+class StreamSource(LoggingMixin):
+    """Base class for asynchronous stream sources
+
+    A stream source produces records, e.g. lines of text, in an asyncio
+    event loop.  Implementations define the asynchronous generator
+    records().  Producing stops when the generator is exhausted.
+    """
+
+    async def records(self):
+        """Asynchronous generator of records
+
+        This function is supposed to be overloaded by the actual source.
+        """
+
+        raise NotImplementedError('records() not implemented for stream source "%s"' % type(self).__name__)
+        yield
+
+    def close(self):
+        """Release resources of the source, if needed"""
+
+        pass
+
+
+class FileTailSource(StreamSource):
+    """Stream of lines appended to a file
+
+    The file is read line by line.  At the end of the file, the source
+    waits for new lines to be appended, checking the file every
+    poll_interval seconds, unless stop_at_eof is set.
+    """
+
+    def __init__(self, path, from_beginning=True, poll_interval=0.5, stop_at_eof=False):
+        """Initialize FileTailSource instance
+
+        :param str path: path of file to tail
+        :param bool from_beginning: start reading at beginning of file instead of at its end (default True)
+        :param float poll_interval: time in seconds between checks for new lines at end of file (default 0.5)
+        :param bool stop_at_eof: stop producing at end of file (default False)
+        """
+
+        self.path = path
+        self.from_beginning = from_beginning
+        self.poll_interval = poll_interval
+        self.stop_at_eof = stop_at_eof
+
+    async def records(self):
+        """Yield lines of file, without line endings"""
+
+        with open(self.path, 'r') as in_file:
+            if not self.from_beginning:
+                in_file.seek(0, os.SEEK_END)
+            partial = ''
+            while True:
+                line = in_file.readline()
+                if not line:
+                    if self.stop_at_eof:
+                        break
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                # keep incomplete last line until it is finished
+                if not line.endswith('\n') and not self.stop_at_eof:
+                    partial += line
+                    continue
+                yield (partial + line).rstrip('\n')
+                partial = ''
+            if partial:
+                yield partial
+
+
+class SocketSource(StreamSource):
+    """Stream of lines received on a TCP socket
+
+    The source connects to the specified host and port and produces the
+    received lines until the connection is closed by the other side.
+    """
+
+    def __init__(self, host, port, encoding='utf-8'):
+        """Initialize SocketSource instance
+
+        :param str host: host name
+        :param int port: port number
+        :param str encoding: encoding of received text (default utf-8)
+        """
+
+        self.host = host
+        self.port = port
+        self.encoding = encoding
+
+    async def records(self):
+        """Yield received lines, without line endings"""
+
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                yield line.decode(self.encoding).rstrip('\r\n')
+        finally:
+            writer.close()
+
+
+class QueueSource(StreamSource):
+    """Stream of records from a local message queue
+
+    Stand-in for a message-queue client: records are taken from a
+    thread-safe queue.Queue, which is filled by other threads.  The source
+    stops when it gets the sentinel object.
+    """
+
+    def __init__(self, queue, sentinel=None, poll_interval=0.5):
+        """Initialize QueueSource instance
+
+        :param queue.Queue queue: queue to take records from
+        :param sentinel: object that marks the end of the stream (default None)
+        :param float poll_interval: maximum time in seconds of a single wait for the queue (default 0.5)
+        """
+
+        self.queue = queue
+        self.sentinel = sentinel
+        self.poll_interval = poll_interval
+
+    def _get(self):
+        """Get next record from queue, or the empty marker after the poll interval"""
+
+        try:
+            return self.queue.get(timeout=self.poll_interval)
+        except Empty:
+            return Empty
+
+    async def records(self):
+        """Yield records from queue"""
+
+        loop = asyncio.get_event_loop()
+        while True:
+            # wait for the next record in a thread of the default executor, not in the event loop;
+            # waits are limited, such that the executor thread is released when the source is stopped
+            record = await loop.run_in_executor(None, self._get)
+            if record is Empty:
+                continue
+            if record is self.sentinel:
+                break
+            yield record
+
+
+class StreamBuffer(LoggingMixin):
+    """Bounded buffer of records from asynchronous stream sources
+
+    The buffer runs an asyncio event loop in a background thread, in which
+    the sources produce records concurrently.  The number of buffered records
+    is bounded: producers wait when the buffer is full, which provides
+    backpressure towards the sources.  Batches of records are taken from the
+    buffer with get_batch(), which blocks until records are available.
+    """
+
+    def __init__(self, sources, max_size=10000):
+        """Initialize StreamBuffer instance
+
+        :param list sources: stream sources
+        :param int max_size: maximum number of buffered records (default 10000)
+        """
+
+        self.sources = list(sources)
+        self.max_size = max_size
+        self._loop = None
+        self._thread = None
+        self._queue = None
+        self._tasks = []
+        self._n_active = 0
+        self._errors = []
+
+    @property
+    def finished(self):
+        """Check if all sources are done and all records have been taken"""
+
+        return self._n_active == 0 and (self._queue is None or self._queue.empty())
+
+    def start(self):
+        """Start event loop and producers in background thread"""
+
+        if self._thread is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='StreamBuffer', daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_producers(), self._loop).result()
+        self.log().debug('Started %d stream producers', len(self.sources))
+
+    async def _start_producers(self):
+        """Create buffer queue and producer tasks in event loop"""
+
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._n_active = len(self.sources)
+        self._tasks = [self._loop.create_task(self._produce(src)) for src in self.sources]
+
+    async def _produce(self, source):
+        """Put records of a source in the buffer"""
+
+        try:
+            async for record in source.records():
+                await self._queue.put(record)
+        except Exception as exc:
+            self.log().error('Stream source "%s" failed: %s', type(source).__name__, str(exc))
+            self._errors.append(exc)
+        await self._queue.put(_PRODUCER_DONE)
+
+    async def _get_batch(self, batch_size, batch_timeout, idle_timeout):
+        """Take a batch of records from the buffer"""
+
+        batch = []
+        deadline = None
+        while len(batch) < batch_size and not self.finished:
+            # wait for first record up to idle timeout, then fill batch up to batch timeout
+            timeout = idle_timeout if deadline is None else max(deadline - self._loop.time(), 0)
+            try:
+                record = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if deadline is None:
+                    self.log().info('No records received within idle timeout; stopping stream')
+                    self._stop_producers()
+                break
+            if record is _PRODUCER_DONE:
+                self._n_active -= 1
+                continue
+            batch.append(record)
+            if deadline is None and batch_timeout is not None:
+                deadline = self._loop.time() + batch_timeout
+
+        return batch
+
+    def get_batch(self, batch_size, batch_timeout=None, idle_timeout=None):
+        """Take a batch of records from the buffer
+
+        Blocks until the first record is available, or until the idle timeout
+        has passed, in which case the stream is stopped.  After the first
+        record, the batch is filled until it has batch_size records or until
+        batch_timeout seconds have passed.
+
+        :param int batch_size: maximum number of records in batch
+        :param float batch_timeout: maximum time in seconds to fill batch after first record (optional)
+        :param float idle_timeout: maximum time in seconds to wait for first record (optional)
+        :returns: records
+        :rtype: list
+        :raises: RuntimeError if a source failed
+        """
+
+        if self._thread is None:
+            raise RuntimeError('stream buffer not started')
+        batch = asyncio.run_coroutine_threadsafe(self._get_batch(batch_size, batch_timeout, idle_timeout),
+                                                 self._loop).result()
+        if self._errors:
+            raise RuntimeError('failure in stream source: %s' % str(self._errors[0]))
+        return batch
+
+    def _stop_producers(self):
+        """Cancel producer tasks; must be called in event loop"""
+
+        for task in self._tasks:
+            task.cancel()
+        self._n_active = 0
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def _cancel_producers(self):
+        """Cancel producer tasks and wait until they are done"""
+
+        self._stop_producers()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stop(self):
+        """Stop producers and event loop"""
+
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._cancel_producers(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+        for src in self.sources:
+            src.close()
+        self.log().debug('Stopped stream producers')
@@ -1,8 +1,23 @@
 import unittest
+import mock
 import pandas as pd
 
 from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
 
+
+def square(x):
+    return x * x
+
+
+def to_label(x):
+    return 'even' if x % 2 == 0 else 'odd'
+
+
+def check_negative(x):
+    if x >= 0:
+        raise TypeError('value is not negative')
+    return x
+
 ''' TODO: test full functionality, i.e.:
     - applyFuncs (column and row-wise)
     - groupby
@@ -41,6 +56,71 @@ class ApplyFuncToDfTest(unittest.TestCase, TestCaseObservable):
         # added a column?
         self.assertIn('foo', ds['test_output'].columns, 'Column not added to DataFrame')
 
+    def test_vectorized_parallel(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import ApplyFuncToDf
+
+        ds = ProcessManager().service(DataStore)
+        ds['test_input'] = pd.DataFrame({'b': [0, 1, 2, 3, 4]})
+
+        link = ApplyFuncToDf(read_key='test_input', store_key='test_output', n_workers=2)
+        link.apply_funcs = [{'func': square, 'colin': 'b', 'colout': 'vec', 'vectorized': True},
+                            {'func': square, 'colin': 'b', 'colout': 'par'}]
+        link.initialize()
+        link.execute()
+
+        self.assertListEqual(ds['test_output']['vec'].tolist(), [0, 1, 4, 9, 16])
+        self.assertListEqual(ds['test_output']['par'].tolist(), [0, 1, 4, 9, 16])
+
+    def test_jit_fallback(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import ApplyFuncToDf
+
+        ds = ProcessManager().service(DataStore)
+        ds['test_input'] = pd.DataFrame({'b': [0, 1, 2]})
+
+        # --- function that cannot be compiled is applied in Python
+        link = ApplyFuncToDf(read_key='test_input', store_key='test_output')
+        link.apply_funcs = [{'func': square, 'colin': 'b', 'colout': 'sq', 'jit': True},
+                            {'func': to_label, 'colin': 'b', 'colout': 'label', 'jit': True}]
+        link.initialize()
+        link.execute()
+        self.assertListEqual(ds['test_output']['sq'].tolist(), [0, 1, 4])
+        self.assertListEqual(ds['test_output']['label'].tolist(), ['even', 'odd', 'even'])
+
+        # --- errors raised by the function itself are not caught
+        link = ApplyFuncToDf(read_key='test_input', store_key='test_output')
+        link.apply_funcs = [{'func': check_negative, 'colin': 'b', 'colout': 'neg', 'jit': True}]
+        link.initialize()
+        with mock.patch.object(link.log(), 'warning') as warning:
+            self.assertRaises(TypeError, link.execute)
+        warning.assert_not_called()
+
+    def test_lookup(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import ApplyFuncToDf
+        from eskapade.analysis.indexed_table import IndexedTable
+
+        ds = ProcessManager().service(DataStore)
+        ds['test_input'] = pd.DataFrame({'k': [3, 1, 5]})
+        ds['table'] = IndexedTable(pd.DataFrame({'key': [1, 2, 3], 'val': ['v1', 'v2', 'v3']}), on='key')
+
+        link = ApplyFuncToDf(read_key='test_input', store_key='test_output')
+        link.addLookup('table', 'v', 'k', lookupColumn='val')
+        link.initialize()
+        link.execute()
+        vals = ds['test_output']['v'].tolist()
+        self.assertListEqual(vals[:2], ['v3', 'v1'])
+        self.assertTrue(pd.isnull(vals[2]))
+
+        # --- invalid lookup columns
+        for colin, exc in (('x', KeyError), (['k', 'k'], ValueError)):
+            link = ApplyFuncToDf(read_key='test_input', store_key='test_output')
+            link.addLookup('table', 'v', colin, lookupColumn='val')
+            link.initialize()
+            with self.assertRaises(exc):
+                link.execute()
+
     def tearDown(self):
         super(ApplyFuncToDfTest, self).tear_down_observers()
         from eskapade.core import execution
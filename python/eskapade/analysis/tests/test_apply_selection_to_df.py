@@ -0,0 +1,56 @@
+import unittest
+import mock
+import pandas as pd
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+class ApplySelectionToDfTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(ApplySelectionToDfTest, self).set_up_observers(observers)
+
+    def test_combine_queries(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import ApplySelectionToDf
+
+        ds = ProcessManager().service(DataStore)
+        df = pd.DataFrame({'x': range(10), 'y': [i % 3 for i in range(10)], 'z': list('abcdefghij')})
+        ds['test_input'] = df
+
+        # --- combined and sequential queries give the same result
+        for combine in (False, True):
+            link = ApplySelectionToDf(readKey='test_input', storeKey='test_output', querySet=['x > 2', 'y == 1'],
+                                      selectColumns=['x', 'z'], combineQueries=combine)
+            link.initialize()
+            link.execute()
+            pd.testing.assert_frame_equal(ds['test_output'], df.loc[[4, 7], ['x', 'z']])
+            self.assertEqual(ds['n_test_output'], 2)
+
+        # --- fallback on sequential queries is logged as warning
+        link = ApplySelectionToDf(readKey='test_input', storeKey='test_output', querySet=['x > x.mean()'],
+                                  combineQueries=True)
+        link.initialize()
+        with mock.patch.object(link.log(), 'warning') as warning:
+            link.execute()
+        warning.assert_not_called()
+        link.querySet = ['no_such_column > 2', 'x > 2']
+        link.continueIfFailure = True
+        with mock.patch.object(link.log(), 'warning') as warning:
+            link.execute()
+        warning.assert_called_once()
+        self.assertEqual(len(ds['test_output'].index), 0)
+
+    def test_combine_inplace(self):
+        from eskapade.analysis import ApplySelectionToDf
+
+        link = ApplySelectionToDf(readKey='test_input', querySet=['x > 2'], combineQueries=True, inplace=True)
+        with self.assertRaises(ValueError):
+            link.initialize()
+
+    def tearDown(self):
+        super(ApplySelectionToDfTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
+
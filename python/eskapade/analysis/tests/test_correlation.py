@@ -0,0 +1,73 @@
+import unittest
+import mock
+import numpy as np
+import pandas as pd
+
+from eskapade.analysis.correlation import bin_codes, binned_correlations, CorrelationAccumulator
+
+
+class BinnedCorrelationsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(42)
+        self.df = pd.DataFrame(rng.normal(size=(500, 4)), columns=['a', 'b', 'c', 'd'])
+        self.df['b'] += self.df['a'] ** 2
+        self.df.loc[rng.rand(500) < 0.1, 'c'] = np.nan
+
+    def test_bin_codes(self):
+        codes = bin_codes(pd.DataFrame({'x': [0., 1., np.nan, 10.]}), n_bins=10)
+        np.testing.assert_array_equal(codes[:, 0], [0, 0, -1, 9])
+
+    def test_correlation_ratio(self):
+        df = self.df
+        cors = binned_correlations(df, 'correlation_ratio')
+
+        # compare with direct computation from groups
+        ref = np.zeros((4, 4))
+        for i, x in enumerate(df.columns):
+            y_given_x = df.groupby(pd.cut(df[x], 11), observed=True)
+            ref[i, :] = (y_given_x.count() * (y_given_x.mean() - df.mean()) ** 2).sum() / (df.count() * df.var())
+        np.testing.assert_allclose(cors.values, ref)
+
+        # parallel computation
+        np.testing.assert_allclose(binned_correlations(df, 'correlation_ratio', n_jobs=2).values, ref)
+
+    def test_serial_fallback(self):
+        # without fork, the tasks are run in the main process
+        with mock.patch('multiprocessing.get_all_start_methods', return_value=['spawn']), \
+                mock.patch('eskapade.analysis.correlation.ProcessPoolExecutor') as executor:
+            cors = binned_correlations(self.df, 'correlation_ratio', n_jobs=2)
+        executor.assert_not_called()
+        np.testing.assert_allclose(cors.values, binned_correlations(self.df, 'correlation_ratio').values)
+
+    def test_mutual_information(self):
+        mi = binned_correlations(self.df, 'mutual_information', n_jobs=2)
+        np.testing.assert_allclose(mi.values, mi.values.T)
+        self.assertGreater(mi.loc['a', 'b'], mi.loc['a', 'd'])
+        self.assertTrue((mi.values >= 0).all())
+
+
+class CorrelationAccumulatorTest(unittest.TestCase):
+
+    def test_accumulate(self):
+        rng = np.random.RandomState(42)
+        df = pd.DataFrame(rng.normal(size=(4000, 3)), columns=['a', 'b', 'c'])
+        df['b'] += df['a'] + 1e3
+        df.loc[rng.rand(4000) < 0.1, 'c'] = np.nan
+        chunks = [df.iloc[pos] for pos in np.array_split(np.arange(4000), 4)]
+
+        # accumulate first chunks, and last chunks in second accumulator with the same binning
+        acc = CorrelationAccumulator(ranges={c: (df[c].min(), df[c].max()) for c in df.columns})
+        acc.update(chunks[0])
+        acc_other = acc.spawn()
+        acc.update(chunks[1])
+        for chunk in chunks[2:]:
+            acc_other.update(chunk)
+        acc.merge(acc_other)
+        self.assertEqual(acc.n_records, 4000)
+
+        np.testing.assert_allclose(acc.correlations('pearson').values, df.corr().values)
+        np.testing.assert_allclose(acc.correlations('spearman').values, df.corr(method='spearman').values, atol=0.01)
+        cr = acc.correlations('correlation_ratio')
+        self.assertGreater(cr.loc['a', 'b'], 0.4)
+        self.assertLess(cr.loc['a', 'c'], 0.05)
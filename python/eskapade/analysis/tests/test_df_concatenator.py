@@ -0,0 +1,65 @@
+import unittest
+import pandas as pd
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+class DfConcatenatorTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(DfConcatenatorTest, self).set_up_observers(observers)
+
+    def test_accumulator(self):
+        from eskapade.analysis.links.df_concatenator import DfAccumulator
+
+        acc = DfAccumulator()
+        pd.testing.assert_frame_equal(acc.to_df(), pd.DataFrame())
+        df1 = pd.DataFrame({'a': [0, 1]}, index=[5, 6])
+        df2 = pd.DataFrame({'a': [2]})
+        acc.append(df1)
+        self.assertIs(acc._chunks[0], df1, 'chunk was copied')
+        acc.append(df2)
+        self.assertEqual(len(acc), 3)
+        self.assertEqual(acc.n_chunks, 2)
+
+        # chunks are replaced by concatenated dataframe, which is cached
+        df = acc.to_df()
+        pd.testing.assert_frame_equal(df, pd.DataFrame({'a': [0, 1, 2]}))
+        self.assertEqual(acc.n_chunks, 1)
+        self.assertIs(acc.to_df(), df)
+        acc.append(df2)
+        self.assertListEqual(acc.to_df()['a'].tolist(), [0, 1, 2, 2])
+
+    def test_accumulate(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import DfConcatenator
+        from eskapade.analysis.links.df_concatenator import DfAccumulator
+
+        ds = ProcessManager().service(DataStore)
+        link = DfConcatenator(readKeys=['chunk', 'extra', 'output'], storeKey='output', accumulate=True,
+                              ignore_missing_input=True)
+        link.initialize()
+
+        # accumulate chunks over repeated executions
+        chunks = [pd.DataFrame({'a': range(i, i + 3), 'b': 'x'}) for i in range(0, 9, 3)]
+        for ich, chunk in enumerate(chunks):
+            ds['chunk'] = chunk
+            if ich == 1:
+                ds['extra'] = pd.DataFrame({'a': [-1], 'b': 'y'})
+            elif 'extra' in ds:
+                del ds['extra']
+            link.execute()
+            self.assertIsInstance(ds['output'], DfAccumulator)
+            self.assertEqual(ds['n_output'], 3 * (ich + 1) + (ich > 0))
+
+        # concatenate at finalize
+        link.finalize()
+        expected = pd.concat([chunks[0], chunks[1], pd.DataFrame({'a': [-1], 'b': 'y'}), chunks[2]])
+        pd.testing.assert_frame_equal(ds['output'], expected.reset_index(drop=True))
+        self.assertEqual(ds['n_output'], 10)
+
+    def tearDown(self):
+        super(DfConcatenatorTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
@@ -0,0 +1,83 @@
+import unittest
+import pandas as pd
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+class DfMergerTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(DfMergerTest, self).set_up_observers(observers)
+
+    def test_partitioned_merge(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import DfMerger
+
+        ds = ProcessManager().service(DataStore)
+        left = pd.DataFrame({'key': [0, 1, 2, 3, 1, 5], 'a': range(6)})
+        right = pd.DataFrame({'key': [1, 2, 3, 4], 'b': ['b1', 'b2', 'b3', 'b4']})
+        ds['left'] = [left.iloc[:3], left.iloc[3:]]
+        ds['right'] = right
+
+        link = DfMerger(input_collection1='left', input_collection2='right', output_collection='merged',
+                        on='key', how='left', n_partitions=3)
+        link.initialize()
+        link.execute()
+
+        merged = ds['merged'].sort_values('a').reset_index(drop=True)
+        expected = pd.merge(left, right, on='key', how='left')
+        self.assertEqual(ds['n_merged'], len(expected.index))
+        pd.testing.assert_frame_equal(merged, expected)
+
+    def test_partitioned_merge_mixed_key_types(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import DfMerger
+
+        ds = ProcessManager().service(DataStore)
+        left = pd.DataFrame({'key': [1, 2, 3, 4, 5, 6], 'a': range(6)})
+        right = pd.DataFrame({'key': [1., 2., 5., 6., float('nan')], 'b': ['b1', 'b2', 'b5', 'b6', 'bn']})
+        ds['left'] = left
+        ds['right'] = [right.iloc[:2].astype({'key': int}), right.iloc[2:]]
+
+        link = DfMerger(input_collection1='left', input_collection2='right', output_collection='merged',
+                        on='key', how='inner', n_partitions=3)
+        link.initialize()
+        link.execute()
+
+        merged = ds['merged'].sort_values('a').reset_index(drop=True)
+        expected = pd.merge(left, right, on='key', how='inner')
+        self.assertEqual(ds['n_merged'], 4)
+        self.assertListEqual(merged['b'].tolist(), expected['b'].tolist())
+
+    def test_index_input2(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import DfMerger
+
+        ds = ProcessManager().service(DataStore)
+        right = pd.DataFrame({'key': [1, 2, 3], 'b': ['b1', 'b2', 'b3']})
+        ds['right'] = right
+        link = DfMerger(input_collection1='left', input_collection2='right', output_collection='merged',
+                        on='key', how='left', index_input2=True)
+        link.initialize()
+
+        # --- index is built once and reused for each chunk
+        tables = []
+        for left in (pd.DataFrame({'key': [3, 1, 5], 'a': range(3)}), pd.DataFrame({'key': [2], 'a': [3]})):
+            ds['left'] = left
+            link.execute()
+            pd.testing.assert_frame_equal(ds['merged'], pd.merge(left, right, on='key', how='left'))
+            tables.append(link._table)
+        table = tables[0]
+        self.assertIs(tables[1], table)
+
+        # --- index is rebuilt for a new table
+        ds['right'] = pd.DataFrame({'key': [2], 'b': ['new']})
+        link.execute()
+        self.assertIsNot(link._table, table)
+        self.assertListEqual(ds['merged']['b'].tolist(), ['new'])
+
+    def tearDown(self):
+        super(DfMergerTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
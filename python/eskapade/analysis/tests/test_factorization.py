@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from eskapade.analysis.factorization import CategoryEncoder
+
+
+class CategoryEncoderTest(unittest.TestCase):
+
+    def test_encode(self):
+        enc = CategoryEncoder()
+        codes = enc.encode(['apple', 'tree', 'pear', 'apple', None])
+        np.testing.assert_array_equal(codes, [0, 1, 2, 0, -1])
+        self.assertEqual(len(enc), 3)
+
+    def test_encode_chunks(self):
+        enc = CategoryEncoder()
+        enc.encode(pd.Series(['apple', 'tree']))
+        codes = enc.encode(pd.Series(['pear', 'tree', 'plum', 'pear']))
+        np.testing.assert_array_equal(codes, [2, 1, 3, 2])
+        self.assertListEqual(list(enc.categories), ['apple', 'tree', 'pear', 'plum'])
+
+        # do not add new categories
+        codes = enc.encode(['kiwi', 'apple'], grow=False)
+        np.testing.assert_array_equal(codes, [-1, 0])
+        self.assertNotIn('kiwi', enc)
+
+    def test_decode(self):
+        enc = CategoryEncoder(categories=['apple', 'tree', 'pear'])
+        vals = enc.decode([2, 0, -1, 1])
+        self.assertListEqual(list(vals[[0, 1, 3]]), ['pear', 'apple', 'tree'])
+        self.assertTrue(pd.isnull(vals[2]))
+
+        cat = enc.decode([2, 0], as_categorical=True)
+        self.assertIsInstance(cat, pd.Categorical)
+        self.assertListEqual(list(cat), ['pear', 'apple'])
+
+    def test_dict(self):
+        enc = CategoryEncoder.from_dict({1: 'b', 0: 'a'})
+        self.assertDictEqual(enc.to_dict(), {0: 'a', 1: 'b'})
+        self.assertDictEqual(enc.to_dict(inverse=True), {'a': 0, 'b': 1})
+        with self.assertRaises(ValueError):
+            CategoryEncoder.from_dict({0: 'a', 2: 'b'})
+
+    def test_persist(self):
+        enc = CategoryEncoder(categories=[3, 1, 2])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'encoder.pkl')
+            enc.persist_in_file(path)
+            enc_imp = CategoryEncoder.import_from_file(path)
+        np.testing.assert_array_equal(enc_imp.encode([1, 2, 3, 4]), [1, 2, 0, 3])
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from eskapade.analysis.indexed_table import IndexedTable
+
+
+class IndexedTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = pd.DataFrame({'key': [4, 2, 3, 1], 'val': ['d', 'b', 'c', 'a']})
+        self.df = pd.DataFrame({'key': [1, 5, 3, 3], 'x': [0.1, 0.2, 0.3, 0.4]})
+
+    def test_init(self):
+        with self.assertRaises(ValueError):
+            IndexedTable(self.table, on='foo')
+        with self.assertRaises(ValueError):
+            IndexedTable(pd.DataFrame({'key': [1, 1]}), on='key')
+        with self.assertRaises(ValueError):
+            IndexedTable(self.table, on=['key', 'val'], index_type='sorted')
+
+    def test_lookup(self):
+        for index_type in ('hash', 'sorted'):
+            ref = IndexedTable(self.table, on='key', index_type=index_type)
+            self.assertEqual(len(ref.locate(self.df)), 4)
+            self.assertEqual(ref.locate(self.df)[1], -1)
+            vals = ref.lookup(self.df['key'], 'val')
+            self.assertListEqual(list(vals[[0, 2, 3]]), ['a', 'c', 'c'])
+            self.assertTrue(pd.isnull(vals[1]))
+
+    def test_merge(self):
+        for index_type in ('hash', 'sorted'):
+            ref = IndexedTable(self.table, on='key', index_type=index_type)
+            for how in ('left', 'inner'):
+                merged = ref.merge(self.df, how=how)
+                expected = pd.merge(self.df, self.table, on='key', how=how)
+                pd.testing.assert_frame_equal(merged, expected)
+
+    def test_merge_multiple_keys(self):
+        table = pd.DataFrame({'a': [1, 1, 2], 'b': ['x', 'y', 'x'], 'val': [1., 2., 3.]})
+        df = pd.DataFrame({'a': [2, 1, 1], 'b': ['x', 'x', 'z']})
+        merged = IndexedTable(table, on=['a', 'b']).merge(df)
+        np.testing.assert_array_equal(merged['val'].values, [3., 1., np.nan])
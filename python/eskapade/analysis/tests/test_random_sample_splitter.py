@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+class RandomSampleSplitterTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(RandomSampleSplitterTest, self).set_up_observers(observers)
+
+    def test_execute(self):
+        from eskapade import ProcessManager, DataStore, ConfigObject
+        from eskapade.analysis import RandomSampleSplitter
+
+        ds = ProcessManager().service(DataStore)
+        settings = ProcessManager().service(ConfigObject)
+        settings['seed'] = 42
+        ds['test_input'] = pd.DataFrame({'x': np.arange(100)}, index=np.arange(100)[::-1])
+
+        splitter = RandomSampleSplitter(readKey='test_input', storeKey=['train', 'valid', 'test'],
+                                        fractions=[0.5, 0.3])
+        splitter.initialize()
+        splitter.execute()
+        self.assertListEqual([len(ds[k].index) for k in ('train', 'valid', 'test')], [50, 30, 20])
+        self.assertListEqual(sorted(pd.concat([ds['train'], ds['valid'], ds['test']])['x']), list(range(100)))
+        self.assertTrue((ds['train']['x'].diff().dropna() > 0).all(), 'original order of records not kept')
+
+        # store record positions instead of dataframes
+        lazy = RandomSampleSplitter(readKey='test_input', storeKey=['train_pos', 'valid_pos', 'test_pos'],
+                                    nevents=[50, 30], lazy=True)
+        lazy.initialize()
+        lazy.execute()
+        self.assertIsInstance(ds['valid_pos'], np.ndarray)
+        pd.testing.assert_frame_equal(ds['test_input'].take(ds['valid_pos']), ds['valid'])
+
+    def test_assign_random_class(self):
+        from eskapade import ProcessManager, DataStore, ConfigObject
+        from eskapade.analysis import AssignRandomClass
+
+        ds = ProcessManager().service(DataStore)
+        settings = ProcessManager().service(ConfigObject)
+        settings['seed'] = 42
+        ds['test_input'] = pd.DataFrame({'x': np.arange(10)})
+
+        link = AssignRandomClass(readKey='test_input', nclasses=3, nevents=[5, 3])
+        link.initialize()
+        link.execute()
+        np.testing.assert_array_equal(np.bincount(ds['test_input']['randomclass']), [5, 3, 2])
+
+    def tearDown(self):
+        super(RandomSampleSplitterTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
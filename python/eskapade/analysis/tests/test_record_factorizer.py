@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+class RecordFactorizerTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(RecordFactorizerTest, self).set_up_observers(observers)
+
+    def test_execute(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import RecordFactorizer
+
+        ds = ProcessManager().service(DataStore)
+
+        # --- factorize two chunks with the same link
+        fact = RecordFactorizer(read_key='test_input', store_key='test_fact', columns=['a'])
+        fact.initialize()
+        ds['test_input'] = pd.DataFrame({'a': ['aap', 'noot', 'aap']})
+        fact.execute()
+        self.assertListEqual(ds['test_fact']['a'].tolist(), [0, 1, 0])
+        ds['test_input'] = pd.DataFrame({'a': ['mies', 'noot']})
+        fact.execute()
+        self.assertListEqual(ds['test_fact']['a'].tolist(), [2, 1], 'codes not stable over chunks')
+        self.assertDictEqual(ds['map_test_fact_to_original']['a'], {0: 'aap', 1: 'noot', 2: 'mies'})
+
+        # --- map back to original values
+        refact = RecordFactorizer(read_key='test_fact', store_key='test_refact', as_categorical=True,
+                                  map_to_original='map_test_fact_to_original')
+        refact.initialize()
+        refact.execute()
+        self.assertListEqual(ds['test_refact']['a'].tolist(), ['mies', 'noot'])
+        self.assertEqual(ds['test_refact']['a'].dtype.name, 'category')
+
+    def test_encoders_path(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import RecordFactorizer
+        from eskapade.analysis.factorization import CategoryEncoder
+
+        ds = ProcessManager().service(DataStore)
+        ds['test_input'] = pd.DataFrame({'a': ['aap', 'noot'], 'b/c': ['x', 'y']})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            enc_path = os.path.join(tmp_dir, 'encoders')
+
+            # --- save encoders in directory
+            fact = RecordFactorizer(read_key='test_input', columns=['a', 'b/c'], encoders_path=enc_path)
+            fact.initialize()
+            fact.execute()
+            fact.finalize()
+            self.assertSetEqual(set(os.listdir(enc_path)), {'a.pkl', 'b%2Fc.pkl'})
+
+            # --- load encoders; explicitly specified encoders take precedence
+            fact = RecordFactorizer(read_key='test_input', store_key='test_fact', columns=['a', 'b/c'],
+                                    encoders_path=enc_path, encoders={'a': CategoryEncoder(['noot', 'aap'])})
+            fact.initialize()
+            self.assertListEqual(fact._encoders['b/c'].categories.tolist(), ['x', 'y'])
+            fact.execute()
+            self.assertListEqual(ds['test_fact']['a'].tolist(), [1, 0])
+            self.assertListEqual(ds['test_fact']['b/c'].tolist(), [0, 1])
+
+    def test_map_to_original_update(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.analysis import RecordFactorizer
+
+        ds = ProcessManager().service(DataStore)
+        ds['test_input'] = pd.DataFrame({'a': [0, 1, 2]})
+        mto = {'a': {0: 'aap', 1: 'noot'}}
+        refact = RecordFactorizer(read_key='test_input', store_key='test_refact', map_to_original=mto)
+        refact.initialize()
+        refact.execute()
+        self.assertListEqual(ds['test_refact']['a'].tolist()[:2], ['aap', 'noot'])
+        self.assertTrue(pd.isnull(ds['test_refact']['a'].iloc[2]))
+
+        # --- decoder is rebuilt after in-place update of mapping
+        mto['a'][2] = 'mies'
+        refact.execute()
+        self.assertListEqual(ds['test_refact']['a'].tolist(), ['aap', 'noot', 'mies'])
+
+        # --- decoder is rebuilt for a new mapping
+        refact.map_to_original = {'a': {0: 'wim', 1: 'zus', 2: 'jet'}}
+        refact.execute()
+        self.assertListEqual(ds['test_refact']['a'].tolist(), ['wim', 'zus', 'jet'])
+
+    def tearDown(self):
+        super(RecordFactorizerTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
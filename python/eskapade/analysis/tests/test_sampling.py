@@ -0,0 +1,20 @@
+import unittest
+import numpy as np
+
+from eskapade.analysis.sampling import class_sizes, random_class_ids, class_positions
+
+
+class SamplingTest(unittest.TestCase):
+
+    def test_class_sizes(self):
+        np.testing.assert_array_equal(class_sizes(10, 3, fractions=[0.5, 0.3, 0.2]), [5, 3, 2])
+        np.testing.assert_array_equal(class_sizes(10, 3, nevents=[5, 3]), [5, 3, 2])
+        np.testing.assert_array_equal(class_sizes(10, 3, nevents=[8, 4, 4]), [8, 2, 0])
+
+    def test_class_positions(self):
+        ids = random_class_ids(10, np.array([5, 3]), 42)
+        self.assertListEqual(sorted(np.bincount(ids + 1)), [2, 3, 5])
+        positions = class_positions(ids, 2)
+        self.assertListEqual([len(p) for p in positions], [5, 3])
+        self.assertTrue(all((np.diff(p) > 0).all() for p in positions))
+        self.assertTrue((ids[positions[1]] == 1).all())
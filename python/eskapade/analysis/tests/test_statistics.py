@@ -0,0 +1,22 @@
+import unittest
+import numpy as np
+import pandas as pd
+
+from eskapade.analysis.statistics import SummaryAccumulator
+
+
+class SummaryAccumulatorTest(unittest.TestCase):
+
+    def test_bounded_bins(self):
+        acc = SummaryAccumulator(n_fine_bins=10)
+        acc.update(pd.DataFrame({'x': np.linspace(0., 1., 11), 'i': np.arange(11)}))
+        acc.update(pd.DataFrame({'x': np.linspace(-50., 1e6, 1000), 'i': np.linspace(-1000, 10 ** 9, 1000).astype(int)}))
+
+        for col in ('x', 'i'):
+            centers, counts = acc.histogram(col)
+            self.assertLessEqual(len(counts), 20)
+            self.assertEqual(counts.sum(), 1011)
+            self.assertTrue((np.diff(centers) > 0).all())
+        centers, counts = acc.histogram('x')
+        self.assertLess(centers[0], 0)
+        self.assertGreater(centers[-1], 5e5)
@@ -0,0 +1,53 @@
+import os
+import queue
+import tempfile
+import unittest
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+class StreamToDfTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(StreamToDfTest, self).set_up_observers(observers)
+
+    def test_execute(self):
+        from eskapade import ProcessManager, DataStore, ConfigObject
+        from eskapade.analysis import StreamToDf
+        from eskapade.analysis.streaming import FileTailSource, QueueSource
+
+        ds = ProcessManager().service(DataStore)
+        settings = ProcessManager().service(ConfigObject)
+
+        # --- read from a file and a queue concurrently
+        msg_queue = queue.Queue()
+        for i in range(3):
+            msg_queue.put('q{0:d},{0:d}'.format(i))
+        msg_queue.put(None)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'stream.csv')
+            with open(path, 'w') as out_file:
+                out_file.write(''.join('f{0:d},{0:d}\n'.format(i) for i in range(4)))
+            sources = [FileTailSource(path, stop_at_eof=True), QueueSource(msg_queue)]
+            link = StreamToDf(key='test_stream', sources=sources, batch_size=5, batch_timeout=1.0, buffer_size=5,
+                              sep=',', columns=['id', 'value'])
+            link.initialize()
+
+            records = []
+            while True:
+                link.execute()
+                self.assertLessEqual(ds['n_test_stream'], 5)
+                records += ds['test_stream']['id'].tolist()
+                if not settings['chainRepeatRequestBy_StreamToDf']:
+                    break
+            link.finalize()
+
+        self.assertEqual(ds['n_sum_test_stream'], 7)
+        self.assertListEqual(sorted(records), ['f0', 'f1', 'f2', 'f3', 'q0', 'q1', 'q2'])
+        self.assertListEqual(list(ds['test_stream'].columns), ['id', 'value'])
+
+    def tearDown(self):
+        super(StreamToDfTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
@@ -144,6 +144,12 @@ class RandomSeeds:
 
         return self._seeds.get(str(key).strip().lower(), self._default)
 
+    def get(self, key, default=None):
+        """Return seed for specified lowercase-string key; specified default if no seed is set for the key"""
+
+        key = str(key).strip().lower()
+        return self._default if key == 'default' else self._seeds.get(key, default)
+
     def __setitem__(self, key, seed):
         """Set integer seed for specified lowercase-string key"""
 
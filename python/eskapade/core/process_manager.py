@@ -494,6 +494,10 @@ class ProcessManager(LoggingMixin, TimerMixin):
 
         self.log().info('Finalizing process manager')
 
+        # notify process services of end of run
+        for serv in self._services.values():
+            serv.run_finished()
+
         # Stop the timer when the Process Manager is done and print.
         total_time = self.stop_timer()
         self.log().info('Total runtime: {0:.2f} seconds'.format(total_time))
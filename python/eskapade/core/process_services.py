@@ -77,6 +77,40 @@ class ProcessService(LoggingMixin, metaclass=ProcessServiceMeta):
 
         pass
 
+    def link_started(self, link):
+        """Act on the start of the execution of a link
+
+        This function can be implemented by a process-service implementation to
+        prepare for the execution of a link, e.g. to make input data available
+        or to start collecting statistics for the link.
+
+        :param eskapade.Link link: link that is about to be executed
+        """
+
+        pass
+
+    def link_executed(self, link):
+        """Act on the end of the execution of a link
+
+        This function can be implemented by a process-service implementation to
+        act on the completed execution of a link, e.g. to release input data
+        that are no longer needed.
+
+        :param eskapade.Link link: link that was executed
+        """
+
+        pass
+
+    def run_finished(self):
+        """Act on the end of the run
+
+        This function can be implemented by a process-service implementation to
+        act on the end of the run, after all chains were executed, e.g. to
+        report statistics that were collected during the run.
+        """
+
+        pass
+
     @classmethod
     def import_from_file(cls, file_path):
         """Import service instance from a Pickle file
@@ -288,16 +288,28 @@ class Link(ArgumentsMixin, LoggingMixin, TimerMixin):
         # run execute function of actual link
         self.log().debug('Now executing link "%s"' % self.name)
 
+        # notify process services of execution
+        from eskapade.core.process_manager import ProcessManager
+        proc_mgr = ProcessManager()
+        services = [proc_mgr.service(cls) for cls in proc_mgr.get_services()]
+        for serv in services:
+            serv.link_started(self)
+
         # Start the timer directly after the message.
         self.start_timer()
 
-        status = self.execute()
+        try:
+            status = self.execute()
+        finally:
+            # Stop the timer when the link is done
+            self.stop_timer()
+
+            # notify process services, also if execution failed
+            for serv in services:
+                serv.link_executed(self)
 
         self.log().debug('Done executing link "%s"' % self.name)
 
-        # Stop the timer when the link is done
-        self.stop_timer()
-
         return status
 
     def finalize_link(self):
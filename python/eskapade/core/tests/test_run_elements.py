@@ -43,6 +43,32 @@ class LinkTest(unittest.TestCase):
     def test_store(self):
         pass
 
+    def test_execute_link(self):
+        from ..process_services import ProcessService
+
+        class MockService(ProcessService):
+            pass
+
+        # test notification of process services
+        serv = ProcessManager().service(MockService)
+        link = Link('l1')
+        mock_parent = mock.Mock(name='parent')
+        serv.link_started = mock_parent.link_started
+        serv.link_executed = mock_parent.link_executed
+        link.execute = mock_parent.execute
+        link.execute.return_value = StatusCode.Success
+        status = link.execute_link()
+        self.assertEqual(status, StatusCode.Success)
+        calls = [mock.call.link_started(link), mock.call.execute(), mock.call.link_executed(link)]
+        self.assertListEqual(mock_parent.mock_calls, calls)
+
+        # test notification of process services if execution fails
+        mock_parent.reset_mock()
+        link.execute.side_effect = RuntimeError('execution failed')
+        with self.assertRaises(RuntimeError):
+            link.execute_link()
+        self.assertListEqual(mock_parent.mock_calls, calls)
+
     def tearDown(self):
         execution.reset_eskapade()
 
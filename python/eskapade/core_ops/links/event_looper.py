@@ -16,12 +16,51 @@
 
 
 import sys
-import copy
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from eskapade import StatusCode, Link, DataStore, ProcessManager
 
+# line processors of worker processes, set at worker start-up
+_worker_line_processors = []
+
+
+def _init_worker(line_processor_set):
+    """Set line processors of worker process"""
+
+    global _worker_line_processors
+    _worker_line_processors = line_processor_set
+
+
+def _process_lines(lines, line_processor_set=None):
+    """Apply line processors to batch of lines
+
+    :param list lines: input lines
+    :param list line_processor_set: functions to apply. If None, use those of the worker process.
+    :returns: processed lines
+    :rtype: list
+    """
+
+    funcs = _worker_line_processors if line_processor_set is None else line_processor_set
+    processed = []
+    for line in lines:
+        for func in funcs:
+            line = func(line)
+        processed.append(line)
+    return processed
+
 
 class EventLooper(Link):
-    """EventLooper algorithm processes input lines and reprints them """
+    """EventLooper algorithm processes input lines and reprints them
+
+    Lines are read and processed in batches.  With n_workers set, the
+    batches are processed by a pool of worker processes.  Without workers,
+    lines are processed one by one by default, such that the output of a
+    stream is not held back.  The order of the
+    output lines is the same as that of the input lines.  The number of
+    batches in progress is bounded, such that the input stream is not read
+    much further ahead than the output.
+    """
 
     def __init__(self, **kwargs):
         """EventLooper processes input lines and reprints or stores them.
@@ -35,6 +74,9 @@ class EventLooper(Link):
         :param bool sort: if true, sort lines before storage (optional)
         :param bool unique: if true, keep only unique lines before storage (optional),
         :param list skip_line_beginning_with: skip line if it starts with any of the list. input is list of strings. Default is ['#'] (optional)
+        :param int n_workers: number of worker processes to process lines. Default is 1: no workers. (optional)
+        :param int batch_size: number of lines read and processed at a time. Default is 1 without workers and
+                               1000 with workers. (optional)
         """
 
         # initialize Link
@@ -48,7 +90,9 @@ class EventLooper(Link):
                              line_processor_set=[],
                              sort=False,
                              unique=False,
-                             skip_line_beginning_with=['#'])
+                             skip_line_beginning_with=['#'],
+                             n_workers=1,
+                             batch_size=None)
         
         # process keyword arguments
         self.check_extra_kwargs(kwargs)
@@ -68,6 +112,10 @@ class EventLooper(Link):
         if self.storeKey is not None:
             assert isinstance(self.storeKey, str) and len(self.storeKey), 'output key not set.'
             self._collect = True
+        assert isinstance(self.n_workers, int) and self.n_workers >= 1, 'number of workers must be positive integer.'
+        if self.batch_size is None:
+            self.batch_size = 1 if self.n_workers == 1 else 1000
+        assert isinstance(self.batch_size, int) and self.batch_size >= 1, 'batch size must be positive integer.'
 
         # default line stream is set to sys.stdin 
         self._linestream = sys.stdin
@@ -96,19 +144,12 @@ class EventLooper(Link):
 
         # default line stream is set to sys.stdin 
         # print or collect (processed) lines
-        for line in self._linestream: 
-            line = line.strip()
-            # skip empty and comment lines
-            if len(line)==0: continue
-            if any(line.startswith(c) for c in self.skip_line_beginning_with):
-                continue
-            myline = copy.deepcopy(line)
-            for func in self.line_processor_set:
-                myline = func(myline)
+        for batch in self._processed_batches():
             if not self._collect:
-                print (myline)
+                for myline in batch:
+                    print (myline)
             else:
-                lines.append(myline)
+                lines.extend(batch)
 
         if not self._collect:
             return StatusCode.Success
@@ -127,6 +168,46 @@ class EventLooper(Link):
         return StatusCode.Success
 
 
+    def _read_batches(self):
+        """Read batches of non-empty, non-comment lines from the line stream"""
+
+        batch = []
+        for line in self._linestream: 
+            line = line.strip()
+            # skip empty and comment lines
+            if len(line)==0: continue
+            if any(line.startswith(c) for c in self.skip_line_beginning_with):
+                continue
+            batch.append(line)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _processed_batches(self):
+        """Process batches of lines, in order, optionally with worker processes"""
+
+        if self.n_workers == 1 or not self.line_processor_set:
+            for batch in self._read_batches():
+                yield _process_lines(batch, self.line_processor_set)
+            return
+
+        # with forked workers, the line processors are not pickled, so they may be defined in a macro
+        mp_context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() \
+            else None
+        self.log().debug('Processing lines with %d worker processes' % self.n_workers)
+        with ProcessPoolExecutor(max_workers=self.n_workers, mp_context=mp_context, initializer=_init_worker,
+                                 initargs=(self.line_processor_set,)) as executor:
+            futures = collections.deque()
+            for batch in self._read_batches():
+                futures.append(executor.submit(_process_lines, batch))
+                # bound number of batches in progress
+                if len(futures) >= 2 * self.n_workers:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
     def finalize(self):
         """Close open file if present
         """
@@ -0,0 +1,61 @@
+import os
+import io
+import time
+import tempfile
+import unittest
+import mock
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+def slow_upper(line):
+    # process lines of the first batches slowest, such that batches finish out of order
+    num = int(line.split('_')[1])
+    time.sleep(max(0., 0.02 - num * 0.001))
+    return line.upper()
+
+
+class EventLooperTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(EventLooperTest, self).set_up_observers(observers)
+
+    def test_serial_streaming(self):
+        from eskapade.core_ops.links import EventLooper
+
+        # lines are processed one by one without workers
+        looper = EventLooper(line_processor_set=[str.upper])
+        with mock.patch('sys.stdin', io.StringIO('a\n# comment\n\nb\n')):
+            looper.initialize()
+            self.assertEqual(looper.batch_size, 1)
+            batches = looper._processed_batches()
+            self.assertListEqual(next(batches), ['A'])
+            self.assertListEqual(list(batches), [['B']])
+        self.assertEqual(EventLooper(n_workers=2).batch_size, None)
+
+    def test_parallel(self):
+        from eskapade import ProcessManager, DataStore
+        from eskapade.core_ops.links import EventLooper
+
+        ds = ProcessManager().service(DataStore)
+        lines = ['line_{:d}'.format(i) for i in range(40)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'lines.txt')
+            with open(file_path, 'w') as lines_file:
+                lines_file.write('\n'.join(['# header'] + lines) + '\n')
+
+            # output lines are in the order of the input lines
+            looper = EventLooper(filename=file_path, storeKey='lines', line_processor_set=[slow_upper],
+                                 n_workers=3, batch_size=4)
+            looper.initialize()
+            looper.execute()
+            looper.finalize()
+
+        self.assertListEqual(ds['lines'], [l.upper() for l in lines])
+        self.assertEqual(ds['n_lines'], 40)
+
+    def tearDown(self):
+        super(EventLooperTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
@@ -12,6 +12,6 @@ except ImportError:
 
 import eskapade.utils
 eskapade.utils.set_matplotlib_backend(silent=False)
-from . import decorators, data_conversion, functions
+from . import decorators, data_conversion, functions, histogram_filling
 from .spark_manager import SparkManager
 from .links import *
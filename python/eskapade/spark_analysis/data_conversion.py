@@ -13,18 +13,92 @@
 # * LICENSE.                                                                     *
 # ********************************************************************************
 
+import contextlib
+import decimal
 import logging
 import uuid
 
+import numpy as np
+import pandas as pd
 import pyspark
 
 from eskapade.helpers import apply_transform_funcs
 
 SPARK_SQL_TYPES = pyspark.sql.types._type_mappings
+ARROW_ENABLED_KEY = 'spark.sql.execution.arrow.{}enabled'.format(
+    'pyspark.' if int(pyspark.__version__.split('.')[0]) >= 3 else '')
+ARROW_BATCH_SIZE_KEY = 'spark.sql.execution.arrow.maxRecordsPerBatch'
 log = logging.getLogger(__name__)
 
 
-def create_spark_df(spark, data, schema=None, process_methods=None, **kwargs):
+@contextlib.contextmanager
+def arrow_conf(spark, enabled=True, batch_size=None):
+    """Context for Arrow-based data transfer between Spark and pandas
+
+    Within the context, columnar transfer with Apache Arrow is enabled (or
+    disabled) for conversions between Spark and pandas data frames.  The
+    previous settings of the Spark session are restored at exit.
+
+    >>> with arrow_conf(spark, batch_size=100000):
+    >>>     pdf = df.toPandas()
+
+    :param pyspark.sql.SparkSession spark: SparkSession instance
+    :param bool enabled: enable Arrow transfer (default True)
+    :param int batch_size: maximum number of records per Arrow batch (optional)
+    """
+
+    settings = {ARROW_ENABLED_KEY: str(bool(enabled)).lower()}
+    if batch_size:
+        settings[ARROW_BATCH_SIZE_KEY] = str(int(batch_size))
+    prev_settings = dict((key, spark.conf.get(key, None)) for key in settings)
+    for key, val in settings.items():
+        spark.conf.set(key, val)
+    try:
+        yield
+    finally:
+        for key, val in prev_settings.items():
+            if val is None:
+                spark.conf.unset(key)
+            else:
+                spark.conf.set(key, val)
+
+
+def pandas_df_schema(pdf):
+    """Create Spark data-frame schema from pandas data types
+
+    Numeric, boolean and date/time columns are mapped on the corresponding
+    Spark-SQL types.  Unsigned integers are mapped on a wider signed type;
+    64-bit unsigned integers, for which no such type exists, are mapped on
+    decimals with 20 digits.  The types of other columns are inferred from
+    their first non-null value, and are strings for columns without values.
+
+    :param pandas.DataFrame pdf: pandas data frame
+    :returns: data-frame schema
+    :rtype: pyspark.sql.types.StructType
+    """
+
+    types = pyspark.sql.types
+    int_types = {1: types.ByteType, 2: types.ShortType, 4: types.IntegerType, 8: types.LongType}
+    fields = []
+    for col, dtype in pdf.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            data_type = types.BooleanType()
+        elif pd.api.types.is_integer_dtype(dtype):
+            # unsigned integers require a wider signed type
+            size = dtype.itemsize * (2 if pd.api.types.is_unsigned_integer_dtype(dtype) else 1)
+            data_type = int_types[size]() if size in int_types else types.DecimalType(20, 0)
+        elif pd.api.types.is_float_dtype(dtype):
+            data_type = types.FloatType() if dtype.itemsize == 4 else types.DoubleType()
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            data_type = types.TimestampType()
+        else:
+            values = pdf[col].dropna()
+            data_type = types._infer_type(values.iloc[0]) if len(values) else types.StringType()
+        fields.append(types.StructField(str(col), data_type))
+    return types.StructType(fields)
+
+
+def create_spark_df(spark, data, schema=None, process_methods=None, use_arrow=True, arrow_batch_size=None, **kwargs):
     """Create a Spark data frame from data in a different format
 
     A Spark data frame is created with either a specified schema or a schema
@@ -37,6 +111,9 @@ def create_spark_df(spark, data, schema=None, process_methods=None, **kwargs):
 
     The data frame is created with the createDataFrame function of the
     SparkSession.  Remaining keyword arguments are passed to this function.
+    Pandas data frames are transferred column-wise with Apache Arrow, unless
+    use_arrow is False.  Their schema is derived from the pandas data types
+    if no schema or a row index is specified.
 
     >>> spark = pyspark.sql.SparkSession.builder.getOrCreate()
     >>> df = create_spark_df(spark,
@@ -55,12 +132,26 @@ def create_spark_df(spark, data, schema=None, process_methods=None, **kwargs):
     :param data: input dataset
     :param schema: schema of created data frame
     :param iterable process_methods: methods to apply on the data frame after creation
+    :param bool use_arrow: transfer pandas data frames with Apache Arrow (default True)
+    :param int arrow_batch_size: maximum number of records per Arrow batch (optional)
     :returns: created data frame
     :rtype: pyspark.sql.DataFrame
     """
 
     # check if data-frame schema was provided
-    if isinstance(schema, int):
+    is_pandas = isinstance(data, pd.DataFrame)
+    if is_pandas and use_arrow and (schema is None or isinstance(schema, int)):
+        # map pandas data types on Spark-SQL types
+        schema = pandas_df_schema(data)
+
+        # transfer 64-bit unsigned integers as decimals
+        dec_cols = [col for col, dtype in data.dtypes.items()
+                    if pd.api.types.is_unsigned_integer_dtype(dtype) and dtype.itemsize == 8]
+        if dec_cols:
+            data = data.copy(deep=False)
+            for col in dec_cols:
+                data[col] = [None if pd.isnull(v) else decimal.Decimal(int(v)) for v in data[col]]
+    elif isinstance(schema, int):
         # infer schema from a single row (prevents Spark >= 1.6.1 from checking schema of all rows)
         def get_row(data, ind):
             try:
@@ -103,12 +194,76 @@ def create_spark_df(spark, data, schema=None, process_methods=None, **kwargs):
         data = data.rdd
 
     # create and transform data frame
-    df = spark.createDataFrame(data, **kwargs)
+    if is_pandas:
+        with arrow_conf(spark, enabled=use_arrow, batch_size=arrow_batch_size):
+            df = spark.createDataFrame(data, **kwargs)
+    else:
+        df = spark.createDataFrame(data, **kwargs)
     if process_methods:
         df = apply_transform_funcs(df, process_methods)
     return df
 
 
+def spark_df_to_pandas(df, use_arrow=True, arrow_batch_size=None):
+    """Convert Spark data frame into pandas data frame
+
+    :param pyspark.sql.DataFrame df: input data frame
+    :param bool use_arrow: transfer data with Apache Arrow (default True)
+    :param int arrow_batch_size: maximum number of records per Arrow batch (optional)
+    :returns: pandas data frame
+    :rtype: pandas.DataFrame
+    """
+
+    spark = getattr(df, 'sparkSession', None) or df.sql_ctx.sparkSession
+    with arrow_conf(spark, enabled=use_arrow, batch_size=arrow_batch_size):
+        return df.toPandas()
+
+
+def iter_pandas_chunks(df, chunk_size):
+    """Iterate over Spark data frame in chunks of pandas data frames
+
+    Records are streamed to the driver with toLocalIterator, which fetches
+    one partition at a time, such that results that are too large to collect
+    at once can be processed in chunks.  The column data types of the
+    chunks are derived from the Spark schema.
+
+    >>> for pdf in iter_pandas_chunks(df, 100000):
+    >>>     process(pdf)
+
+    :param pyspark.sql.DataFrame df: input data frame
+    :param int chunk_size: maximum number of records per chunk
+    :returns: generator of pandas data frames
+    """
+
+    if chunk_size < 1:
+        raise ValueError('chunk size must be positive (got {})'.format(chunk_size))
+
+    # pandas types of non-nullable numeric Spark types
+    types = pyspark.sql.types
+    num_types = {types.ByteType: np.int8, types.ShortType: np.int16, types.IntegerType: np.int32,
+                 types.LongType: np.int64, types.FloatType: np.float32, types.DoubleType: np.float64}
+    columns = df.columns
+
+    def to_pandas(rows):
+        pdf = pd.DataFrame.from_records(rows, columns=columns)
+        for field in df.schema.fields:
+            dtype = num_types.get(type(field.dataType))
+            if dtype is not None and not pdf[field.name].isnull().any():
+                pdf[field.name] = pdf[field.name].astype(dtype)
+            elif isinstance(field.dataType, types.TimestampType):
+                pdf[field.name] = pd.to_datetime(pdf[field.name])
+        return pdf
+
+    rows = []
+    for row in df.toLocalIterator():
+        rows.append(tuple(row))
+        if len(rows) == chunk_size:
+            yield to_pandas(rows)
+            rows = []
+    if rows:
+        yield to_pandas(rows)
+
+
 def df_schema(schema_spec):
     """Create Spark data-frame schema
 
@@ -13,6 +13,8 @@
 # * LICENSE.                                                                     *
 # ********************************************************************************
 
+import re
+
 import numpy as np
 import pandas as pd
 
@@ -102,12 +104,153 @@ def calc_asym(var1, var2):
     return float((var2 - var1) / (abs(var1) + abs(var2)))
 
 
+def _const_arg(arg):
+    """Get value of constant argument of vectorized function"""
+
+    if isinstance(arg, pd.Series):
+        return arg.iloc[0] if len(arg) else None
+    return arg
+
+
+def _has_tz(x):
+    """Test if date/time value has a time zone or UTC offset"""
+
+    try:
+        return pd.Timestamp(x).tzinfo is not None
+    except BaseException:
+        return False
+
+
+def _to_date_time_series(dt, tz_in=None):
+    """Convert series of values to date/time series, localized to time zone
+
+    Values are converted as by the row-based functions: values that cannot be
+    parsed, ambiguous or non-existent local times, and values that already
+    have a time zone when a time zone is specified, result in nulls.  Values
+    with different time zones or UTC offsets are converted to UTC.
+    """
+
+    # parse each value separately, as pandas.Timestamp does; pandas 2 infers one format from the first value by default
+    kwargs = dict(format='mixed') if int(pd.__version__.split('.')[0]) >= 2 else {}
+    try:
+        ts = pd.to_datetime(dt, errors='coerce', **kwargs)
+        has_tz = pd.Series(ts.dt.tz is not None, index=ts.index)
+    except (ValueError, TypeError):
+        # different time zones in one series
+        ts = pd.to_datetime(dt, errors='coerce', utc=True, **kwargs)
+        has_tz = dt.map(_has_tz).astype(bool)
+    tz_in = _const_arg(tz_in)
+    if not tz_in:
+        return ts
+
+    # localize only values without time zone
+    local = ts[~has_tz]
+    if local.dt.tz is not None:
+        local = local.dt.tz_localize(None)
+    local = local.dt.tz_localize(tz_in, ambiguous='NaT', nonexistent='NaT')
+    return local.reindex(ts.index)
+
+
+def is_nan_series(x):
+    """Test if values are NaN/null/None
+
+    Vectorized version of is_nan, operating on a pandas series.
+
+    :param pandas.Series x: input values
+    :rtype: pandas.Series
+    """
+
+    nan = x.isnull()
+    if x.dtype == object or pd.api.types.is_string_dtype(x):
+        try:
+            nan |= x.str.strip().str.lower().isin(['', 'none', 'nan'])
+        except AttributeError:
+            # no string values in series
+            pass
+    return nan
+
+
+def is_inf_series(x):
+    """Test if values are infinite
+
+    Vectorized version of is_inf, operating on a pandas series.
+
+    :param pandas.Series x: input values
+    :rtype: pandas.Series
+    """
+
+    if pd.api.types.is_numeric_dtype(x):
+        return pd.Series(np.isinf(x.values.astype(np.float64)), index=x.index)
+    return x.map(is_inf)
+
+
+def to_date_time_series(dt, tz_in=None, tz_out=None):
+    """Convert values to date/time objects
+
+    Vectorized version of to_date_time, operating on a pandas series.  Time
+    zones are specified as constant values, or as series of constant values.
+
+    :param pandas.Series dt: values representing date/times (parsed by pandas.to_datetime)
+    :param tz_in: time zone to localize data/time values to
+    :param tz_out: time zone to convert data/time values into
+    :returns: date/time values; null for values that cannot be converted
+    :rtype: pandas.Series
+    """
+
+    ts = _to_date_time_series(dt, tz_in)
+    tz_out = _const_arg(tz_out)
+    if tz_out:
+        ts = ts.dt.tz_convert(tz_out)
+    return ts
+
+
+def to_timestamp_series(dt, tz_in=None):
+    """Convert values to Unix timestamps (ns)
+
+    Vectorized version of to_timestamp, operating on a pandas series.
+
+    :param pandas.Series dt: values representing date/times (parsed by pandas.to_datetime)
+    :param tz_in: time zone to localize data/time values to
+    :returns: Unix timestamps (ns); null for values that cannot be converted
+    :rtype: pandas.Series
+    """
+
+    ts = _to_date_time_series(dt, tz_in)
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert('UTC').dt.tz_localize(None)
+    ns = pd.Series(ts.values.astype('datetime64[ns]').view(np.int64), index=ts.index, dtype='Int64')
+    ns[ts.isnull()] = pd.NA
+    return ns
+
+
+def calc_asym_series(var1, var2):
+    """Calculate asymmetry
+
+    Vectorized version of calc_asym, operating on pandas series.  Values
+    that cannot be converted to numbers result in nulls.
+
+    :returns: asymmetry values
+    :rtype: pandas.Series
+    """
+
+    var1 = pd.to_numeric(var1, errors='coerce').astype(np.float64)
+    var2 = pd.to_numeric(var2, errors='coerce').astype(np.float64)
+    return (var2 - var1) / (var1.abs() + var2.abs())
+
+
 SPARK_UDFS = dict(is_nan=dict(func=is_nan, ret_type='BooleanType'),
                   is_inf=dict(func=is_inf, ret_type='BooleanType'),
                   to_date_time=dict(func=to_date_time, ret_type='TimestampType'),
                   to_timestamp=dict(func=to_timestamp, ret_type='LongType'),
                   calc_asym=dict(func=calc_asym, ret_type='DoubleType'))
 
+# vectorized versions of the Spark UDFs, registered as pandas UDFs, which are evaluated on Arrow batches of rows
+SPARK_PANDAS_UDFS = dict(is_nan=dict(func=is_nan_series, ret_type='BooleanType'),
+                         is_inf=dict(func=is_inf_series, ret_type='BooleanType'),
+                         to_date_time=dict(func=to_date_time_series, ret_type='TimestampType'),
+                         to_timestamp=dict(func=to_timestamp_series, ret_type='LongType'),
+                         calc_asym=dict(func=calc_asym_series, ret_type='DoubleType'))
+
 _only_finite = "if(is_nan({0:s}) or is_inf({0:s}), NULL, {0:s})"
 SPARK_QUERY_FUNCS = dict(count='count(*)',
                          colcount='count({0:s})',
@@ -129,6 +272,30 @@ SPARK_QUERY_FUNCS = dict(count='count(*)',
                          msd='if(is_nan({0:s}) or is_inf({0:s}) or {0:s}=0, NULL, '
                               'cast(abs({0:s}) * pow(10, -floor(log10(abs({0:s})))) as int))')
 
+# native Spark SQL versions of the query functions for numeric columns, without calls of Python UDFs
+_native_is_nan = "({0:s} is null or isnan({0:s}))"
+_native_is_inf = "(abs({0:s}) = double('infinity'))"
+_native_only_finite = "if(%s or %s, NULL, {0:s})" % (_native_is_nan, _native_is_inf)
+SPARK_NATIVE_QUERY_FUNCS = dict(nnan='count(if(%s, 1, NULL))' % _native_is_nan,
+                                ninf='count(if(%s, 1, NULL))' % _native_is_inf,
+                                sum='sum(%s)' % _native_only_finite,
+                                possum='sum(if(%s > 0, %s, NULL))' % (_native_only_finite, _native_only_finite),
+                                negsum='sum(if(%s < 0, %s, NULL))' % (_native_only_finite, _native_only_finite),
+                                mean='avg(%s)' % _native_only_finite,
+                                max='max(%s)' % _native_only_finite,
+                                min='min(%s)' % _native_only_finite,
+                                std='stddev_pop(%s)' % _native_only_finite,
+                                skew='skewness(%s)' % _native_only_finite,
+                                kurt='kurtosis(%s)' % _native_only_finite,
+                                var='var_pop(%s)' % _native_only_finite,
+                                cov='covar_pop(%s,%s)' % (_native_only_finite, _native_only_finite.format('{1:s}')),
+                                corr='corr(%s,%s)' % (_native_only_finite, _native_only_finite.format('{1:s}')),
+                                msd='if(%s or %s or {0:s}=0, NULL, '
+                                    'cast(abs({0:s}) * pow(10, -floor(log10(abs({0:s})))) as int))'
+                                    % (_native_is_nan, _native_is_inf),
+                                to_date_time='to_timestamp({0:s})',
+                                to_timestamp='unix_micros(to_timestamp({0:s})) * 1000')
+
 
 def spark_sql_func(name, default_func=None):
     """Get Spark SQL function
@@ -149,7 +316,7 @@ def spark_sql_func(name, default_func=None):
     raise RuntimeError('"%s" not found in Spark SQL functions' % str(name))
 
 
-def spark_query_func(spec):
+def spark_query_func(spec, native=False):
     """Get Eskapade Spark-query function
 
     Get a function that returns a string to be used as a function in a Spark
@@ -167,7 +334,16 @@ def spark_query_func(spec):
     >>> my_fun('my_var')
     'count(if(my_var == 0, 1, NULL))'
 
+    With the native option, the native Spark SQL version of the function is
+    used, if it exists.  The native versions do not call the Eskapade UDFs
+    and are evaluated in the JVM only.  They are meant for numeric columns:
+    unlike the UDFs, they do not treat strings like "none" as NaN.
+
+    >>> spark_query_func('nnan', native=True)('x')
+    'count(if((x is null or isnan(x)), 1, NULL))'
+
     :param str spec: function specification: "name" or "name::definition"
+    :param bool native: use native Spark SQL version of function if available
     :returns: query function
     """
 
@@ -179,6 +355,8 @@ def spark_query_func(spec):
 
     # get function definition
     func_def = SPARK_QUERY_FUNCS.get(str(name), func_def)
+    if native:
+        func_def = SPARK_NATIVE_QUERY_FUNCS.get(str(name), func_def)
     if not func_def:
         raise RuntimeError('no definition found for Spark query function "{}"'.format(name))
 
@@ -188,3 +366,26 @@ def spark_query_func(spec):
     query_func.__name__ = str(name)
 
     return query_func
+
+
+SQL_IDENTIFIER = re.compile(r'`([^`]+)`|([A-Za-z_][A-Za-z0-9_]*)')
+
+
+def query_tables(query, names):
+    """Get names of tables referenced in SQL query
+
+    All (quoted and unquoted) identifiers in the query text are matched to
+    the specified table names.  Identifiers are matched case-insensitively,
+    as by Spark SQL.  An identifier that is not a table name, e.g. a column
+    with the same name as a table, may result in a table that is not used
+    by the query.
+
+    :param str query: SQL query
+    :param iterable names: names of available tables
+    :returns: names of referenced tables
+    :rtype: list
+    """
+
+    idents = set(m.group(1) or m.group(2) for m in SQL_IDENTIFIER.finditer(query))
+    idents = set(i.lower() for i in idents)
+    return [n for n in names if isinstance(n, str) and n.lower() in idents]
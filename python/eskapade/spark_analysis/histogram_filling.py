@@ -0,0 +1,175 @@
+# ********************************************************************************
+# * Project: Eskapade - A python-based package for data analysis                 *
+# * Module: spark_analysis.histogram_filling                                     *
+# * Created: 2017/07/24                                                          *
+# * Description:                                                                 *
+# *     Filling of histograms of Spark data-frame columns with native Spark      *
+# *     SQL expressions, without passing values to Python workers                *
+# *                                                                              *
+# * Authors:                                                                     *
+# *      KPMG Big Data team, Amstelveen, The Netherlands                         *
+# *                                                                              *
+# * Redistribution and use in source and binary forms, with or without           *
+# * modification, are permitted according to the terms listed in the file        *
+# * LICENSE.                                                                     *
+# ********************************************************************************
+
+import logging
+import numbers
+
+import numpy as np
+import pyspark.sql.functions as F
+
+log = logging.getLogger(__name__)
+
+
+def _finite(col):
+    """Get column expression with null values for NaN"""
+
+    return F.when(~F.isnan(F.col(col)), F.col(col))
+
+
+def column_ranges(df, columns):
+    """Get minimum and maximum values of columns
+
+    The ranges of all columns are determined in a single Spark job.  Null
+    and NaN values are ignored.
+
+    :param pyspark.sql.DataFrame df: input data frame
+    :param list columns: numeric columns
+    :returns: (minimum, maximum) per column; None for columns without values
+    :rtype: dict
+    """
+
+    if not columns:
+        return {}
+    aggs = []
+    for col in columns:
+        aggs += [F.min(_finite(col)), F.max(_finite(col))]
+    row = df.agg(*aggs).first()
+    return dict((col, (row[2 * i], row[2 * i + 1])) for i, col in enumerate(columns))
+
+
+def uniform_bin_edges(vmin, vmax, n_bins):
+    """Get edges of bins of equal width
+
+    As with pyspark.RDD.histogram, a single bin is created if the minimum
+    and maximum values are equal.
+
+    :param float vmin: lower edge of first bin
+    :param float vmax: upper edge of last bin
+    :param int n_bins: number of bins
+    :returns: bin edges
+    :rtype: list
+    """
+
+    if vmin is None or vmax is None:
+        return []
+    if vmin == vmax:
+        return [vmin, vmax]
+    return np.linspace(vmin, vmax, n_bins + 1).tolist()
+
+
+def bin_index(col, bin_edges):
+    """Get Spark SQL expression for index of bin of column value
+
+    The expression evaluates to null for null and NaN values and for values
+    outside the range of the bins.  As with pyspark.RDD.histogram, the
+    bins include their lower edge and the last bin also includes its upper
+    edge.  For bins of equal width, the index is computed as
+    floor((value - offset) / width), limited to the index of the last bin
+    for values that are rounded up to the upper edge.
+
+    :param str col: column name
+    :param list bin_edges: bin edges
+    :returns: bin-index expression
+    :rtype: pyspark.sql.Column
+    """
+
+    val = F.col(col)
+    n_bins = len(bin_edges) - 1
+    if n_bins < 1:
+        return F.lit(None).cast('long')
+    low, high = float(bin_edges[0]), float(bin_edges[-1])
+    in_range = (val >= low) & (val <= high) & ~F.isnan(val)
+    widths = np.diff(np.asarray(bin_edges, dtype=np.float64))
+
+    if high == low:
+        # single bin
+        index = F.lit(0)
+    elif np.allclose(widths, widths[0]):
+        # bins of equal width
+        index = F.least(F.floor((val - low) / float(widths[0])), F.lit(n_bins - 1))
+    else:
+        # bins of variable width
+        index = None
+        for it, edge in enumerate(bin_edges[1:-1]):
+            index = F.when(val < float(edge), it) if index is None else index.when(val < float(edge), it)
+        index = index.otherwise(n_bins - 1) if index is not None else F.lit(0)
+
+    return F.when(in_range, index.cast('long'))
+
+
+def fill_bin_counts(df, bin_edges):
+    """Fill bin counts of columns
+
+    The counts in the bins of all columns are computed in a single Spark
+    job: the bin indices of the columns are computed with Spark SQL
+    expressions, after which the bin counts are aggregated with a group-by
+    on column name and bin index.
+
+    :param pyspark.sql.DataFrame df: input data frame
+    :param dict bin_edges: bin edges per column
+    :returns: counts per bin index per column
+    :rtype: dict
+    """
+
+    counts = dict((col, {}) for col in bin_edges)
+    if not bin_edges:
+        return counts
+
+    # create one (column, bin) pair per column for each record
+    pairs = F.explode(F.array(*[F.struct(F.lit(col).alias('column'), bin_index(col, edges).alias('bin'))
+                                for col, edges in bin_edges.items()]))
+    bin_df = df.select(pairs.alias('pair')).select('pair.column', 'pair.bin').where(F.col('bin').isNotNull())
+
+    # aggregate counts in the JVM and collect the (small) result
+    for row in bin_df.groupBy('column', 'bin').count().collect():
+        counts[row['column']][row['bin']] = row['count']
+
+    return counts
+
+
+def fill_histograms(df, bins, n_bins=25):
+    """Fill histograms of numeric columns
+
+    The histograms have the same structure as those of
+    pyspark.RDD.histogram: a list of bin edges and a list of counts.  Bins
+    are specified per column, either as a list of bin edges or as a number
+    of bins of equal width in the range of the column values.  The ranges
+    and the counts of all columns are computed with one Spark job each.
+
+    >>> hists = fill_histograms(df, {'x': [0, 1, 2, 5], 'y': 10})
+    >>> edges, counts = hists['x']
+
+    :param pyspark.sql.DataFrame df: input data frame
+    :param dict bins: bin edges or number of bins per column
+    :param int n_bins: number of bins of columns for which no bins are specified (default 25)
+    :returns: (bin edges, bin counts) per column
+    :rtype: dict
+    """
+
+    bins = dict((col, n_bins if b is None else b) for col, b in bins.items())
+
+    # determine bin edges from column ranges if a number of bins is specified
+    ranges = column_ranges(df, [col for col, b in bins.items() if isinstance(b, numbers.Integral)])
+    bin_edges = {}
+    for col, b in bins.items():
+        bin_edges[col] = uniform_bin_edges(*ranges[col], n_bins=b) if col in ranges else [float(e) for e in b]
+        if not bin_edges[col]:
+            log.warning('No values found in column "%s"; histogram is empty', col)
+
+    # fill counts
+    counts = fill_bin_counts(df, bin_edges)
+    return dict((col, (edges, [counts[col].get(i, 0) for i in range(max(len(edges) - 1, 0))]))
+                for col, edges in bin_edges.items())
@@ -32,6 +32,18 @@ class RddGroupMapper(Link):
     Optionally, a map function is applied on the rows of the input RDD, for
     example to create the group key-value pairs.  Similarly, a function may
     be specified to map the key-value pairs resulting from the group map.
+
+    For associative group operations, a combiner can be specified instead of
+    (or before) the group map.  The combiner consists of the three functions
+    of pyspark.RDD.combineByKey: one to create a combined value from a single
+    value, one to merge a value into a combined value and one to merge two
+    combined values.  Values are then combined within each partition before
+    the shuffle, such that groups are never materialized as a whole.  The
+    group map, if specified, is applied on the combined values.
+
+    >>> # mean value per key, from (sum, count) combinations
+    >>> combiner = (lambda v: (v, 1), lambda c, v: (c[0] + v, c[1] + 1), lambda c1, c2: (c1[0] + c2[0], c1[1] + c2[1]))
+    >>> link = RddGroupMapper(read_key='rdd', combiner=combiner, group_map=lambda c: c[0] / c[1])
     """
 
     def __init__(self, **kwargs):
@@ -40,11 +52,12 @@ class RddGroupMapper(Link):
         :param str name: name of link
         :param str read_key: key of the input data in the data store
         :param str store_key: key of the output data frame in the data store
-        :param group_map: map function for group values
+        :param group_map: map function for group values, or for combined values if a combiner is specified
         :param input_map: map function for input rows; optional, e.g. to create group key-value pairs
         :param result_map: map function for output group values; optional, e.g. to flatten group key-value pairs
         :param bool flatten_output_groups: create a row for each item in the group output values (default is False)
         :param int num_group_partitions: number of partitions for group map (optional, no repartitioning by default)
+        :param tuple combiner: functions to create a combined value, merge a value and merge combined values (optional)
         """
 
         # initialize Link
@@ -52,7 +65,7 @@ class RddGroupMapper(Link):
 
         # process keyword arguments
         self._process_kwargs(kwargs, read_key='', store_key=None, group_map=None, input_map=None, result_map=None,
-                             flatten_output_groups=False, num_group_partitions=None)
+                             flatten_output_groups=False, num_group_partitions=None, combiner=None)
         self.kwargs = kwargs
 
     def initialize(self):
@@ -62,7 +75,13 @@ class RddGroupMapper(Link):
         self.check_arg_types(read_key=str)
         self.check_arg_types(allow_none=True, store_key=str, num_group_partitions=int)
         self.check_arg_callable('group_map', 'input_map', 'result_map', allow_none=True)
-        self.check_arg_vals('read_key', 'group_map')
+        self.check_arg_vals('read_key')
+        if self.combiner is not None:
+            self.combiner = tuple(self.combiner)
+            if len(self.combiner) != 3 or not all(callable(f) for f in self.combiner):
+                raise TypeError('combiner must consist of three functions (create, merge value, merge combiners)')
+        else:
+            self.check_arg_vals('group_map')
         self.flatten_output_groups = bool(self.flatten_output_groups)
         if not self.store_key:
             self.store_key = self.read_key
@@ -88,12 +107,16 @@ class RddGroupMapper(Link):
             data = data.map(self.input_map)
 
         # group data by keys in the data
-        data = data.groupByKey(numPartitions=self.num_group_partitions)
+        if self.combiner:
+            # combine values per key, with map-side combining within partitions
+            data = data.combineByKey(*self.combiner, numPartitions=self.num_group_partitions)
+        else:
+            data = data.groupByKey(numPartitions=self.num_group_partitions)
 
         # apply map on group values
         if self.flatten_output_groups:
-            data = data.flatMapValues(self.group_map)
-        else:
+            data = data.flatMapValues(self.group_map if self.group_map else lambda vals: vals)
+        elif self.group_map:
             data = data.mapValues(self.group_map)
 
         # apply map on result
@@ -22,6 +22,17 @@ import pyspark
 from eskapade import Link, StatusCode, ProcessManager, DataStore, ConfigObject
 from eskapade.core import persistence
 
+# short names of Hadoop compression codecs, as used by the data-frame writer
+COMPRESSION_CODECS = {'org.apache.hadoop.io.compress.GzipCodec': 'gzip',
+                      'org.apache.hadoop.io.compress.BZip2Codec': 'bzip2',
+                      'org.apache.hadoop.io.compress.DefaultCodec': 'deflate',
+                      'org.apache.hadoop.io.compress.SnappyCodec': 'snappy',
+                      'org.apache.hadoop.io.compress.Lz4Codec': 'lz4'}
+
+# compressions supported by the data-frame writer per output format
+FORMAT_COMPRESSIONS = {'csv': ('none', 'uncompressed', 'bzip2', 'deflate', 'gzip', 'lz4', 'snappy'),
+                       'parquet': ('none', 'uncompressed', 'snappy', 'gzip', 'lzo', 'brotli', 'lz4', 'zstd')}
+
 
 class SparkDataToCsv(Link):
     """Write Spark data to local CSV files
@@ -29,6 +40,17 @@ class SparkDataToCsv(Link):
     Data to write to CSV are provided as a Spark RDD or a Spark data frame.
     The data are written to a configurable number of CSV files in the
     specified output directory.
+
+    Data frames are written by the Spark-SQL data-frame writer, without
+    passing the records through Python.  The output can be partitioned into
+    subdirectories by column values, the number of records per file can be
+    limited, and the data can be written in Parquet format instead of CSV.
+    If the number of files is set to zero, the partitioning of the data frame
+    is kept, instead of coalescing the data into a fixed number of files.
+    Note that the CSV writer quotes values that contain the separator and
+    writes nulls as empty values.
+
+    Rows of RDDs are converted to CSV lines in Python.
     """
 
     def __init__(self, **kwargs):
@@ -42,25 +64,45 @@ class SparkDataToCsv(Link):
         :param str sep: CSV separator string
         :param tuple|bool header: column names to write as CSV header
                                   or boolean to indicate if names must be determined from input data frame
-        :param int num_files: requested number of output files
+        :param int num_files: requested number of output files; 0 to keep the number of data-frame partitions
+        :param str file_format: output format of data frames: "csv" (default) or "parquet"
+        :param list partition_by: column(s) to partition the output of data frames by (optional)
+        :param int max_records_per_file: maximum number of records per output file of data frames (optional)
+        :param str compression: compression of data-frame output (e.g., "gzip"; default: from compression_codec)
         """
 
         Link.__init__(self, kwargs.pop('name', 'SparkDataToCsv'))
         self._process_kwargs(kwargs, read_key=None, output_path=None, mode='error', compression_codec=None,
-                             sep=',', header=False, num_files=1)
+                             sep=',', header=False, num_files=1, file_format='csv', partition_by=None,
+                             max_records_per_file=0, compression=None)
 
     def initialize(self):
         """Initialize SparkDataToCsv"""
 
         # check input arguments
-        self.check_arg_types(allow_none=True, read_key=str, output_path=str, compression_codec=str)
-        self.check_arg_types(mode=str, sep=str, num_files=int)
-        self.check_arg_types(recurse=True, allow_none=True)
+        self.check_arg_types(allow_none=True, read_key=str, output_path=str, compression_codec=str, compression=str)
+        self.check_arg_types(mode=str, sep=str, num_files=int, file_format=str, max_records_per_file=int)
+        self.check_arg_types(recurse=True, allow_none=True, partition_by=str)
         self.check_arg_vals('read_key', 'sep')
         self.check_arg_vals('output_path', 'compression_codec', allow_none=True)
-        self.check_arg_opts(mode=('overwrite', 'ignore', 'error'))
-        if self.num_files < 1:
-            raise RuntimeError('requested number of files is less than 1 ({:d})'.format(self.num_files))
+        self.check_arg_opts(mode=('overwrite', 'ignore', 'error'), file_format=('csv', 'parquet'))
+        if self.num_files < 0:
+            raise RuntimeError('requested number of files is negative ({:d})'.format(self.num_files))
+        if self.max_records_per_file < 0:
+            raise RuntimeError('requested number of records per file is negative ({:d})'
+                               .format(self.max_records_per_file))
+        if isinstance(self.partition_by, str):
+            self.partition_by = [self.partition_by]
+        self.partition_by = list(self.partition_by) if self.partition_by else []
+        if not self.compression and self.compression_codec:
+            self.compression = COMPRESSION_CODECS.get(self.compression_codec)
+            if not self.compression:
+                self.log().warning('Unknown compression codec "%s"; data frames are written uncompressed',
+                                   self.compression_codec)
+        if self.compression and self.compression.lower() not in FORMAT_COMPRESSIONS[self.file_format]:
+            raise RuntimeError('compression "{0:s}" not supported for {1:s} output (use one of {2:s})'
+                               .format(self.compression, self.file_format,
+                                       ', '.join(FORMAT_COMPRESSIONS[self.file_format])))
 
         # set other attributes
         self.do_execution = True
@@ -119,11 +161,20 @@ class SparkDataToCsv(Link):
         if not isinstance(data, (pyspark.rdd.RDD, pyspark.sql.DataFrame)):
             raise TypeError('got data of type "{}"; expected a Spark RDD/DataFrame'.format(str(type(data))))
 
+        # write data frame with data-frame writer
+        if isinstance(data, pyspark.sql.DataFrame):
+            self.write_df(data)
+            return StatusCode.Success
+        if self.file_format != 'csv':
+            raise TypeError('output format "{}" requires a Spark data frame'.format(self.file_format))
+
         # convert row to string
-        data = data.map(lambda r: self.sep.join(map(str, r)))
+        sep = self.sep
+        data = data.map(lambda r: sep.join(map(str, r)))
 
         # set number of partitions/output files
-        data = data.coalesce(self.num_files, shuffle=self.num_files > data.getNumPartitions())
+        if self.num_files:
+            data = data.coalesce(self.num_files, shuffle=self.num_files > data.getNumPartitions())
 
         # add header rows
         if self.header:
@@ -134,3 +185,37 @@ class SparkDataToCsv(Link):
         data.saveAsTextFile(self.output_path, compressionCodecClass=self.compression_codec)
 
         return StatusCode.Success
+
+    def write_df(self, df):
+        """Write data frame with Spark-SQL data-frame writer
+
+        :param pyspark.sql.DataFrame df: data frame to write
+        """
+
+        # set column names of header
+        if isinstance(self.header, tuple):
+            if len(self.header) != len(df.columns):
+                raise RuntimeError('number of header columns ({0:d}) does not match number of data columns ({1:d})'
+                                   .format(len(self.header), len(df.columns)))
+            df = df.toDF(*self.header)
+
+        # set number of partitions/output files
+        if self.num_files:
+            num_parts = df.rdd.getNumPartitions()
+            df = df.coalesce(self.num_files) if self.num_files <= num_parts else df.repartition(self.num_files)
+
+        # configure writer
+        writer = df.write.mode(self.mode)
+        if self.partition_by:
+            writer = writer.partitionBy(*self.partition_by)
+        if self.max_records_per_file:
+            writer = writer.option('maxRecordsPerFile', self.max_records_per_file)
+        if self.compression:
+            writer = writer.option('compression', self.compression)
+
+        # write data
+        self.log().debug('Writing data frame in %s format to "%s"', self.file_format, self.output_path)
+        if self.file_format == 'parquet':
+            writer.parquet(self.output_path)
+        else:
+            writer.csv(self.output_path, sep=self.sep, header=bool(self.header))
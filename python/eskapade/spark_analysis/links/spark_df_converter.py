@@ -19,7 +19,7 @@ import pyspark
 
 from eskapade import Link, StatusCode, ProcessManager, DataStore
 from eskapade.helpers import apply_transform_funcs, process_transform_funcs
-from eskapade.spark_analysis import SparkManager
+from eskapade.spark_analysis import SparkManager, data_conversion
 
 OUTPUT_FORMATS = ('df', 'rdd', 'list', 'pd')
 
@@ -38,6 +38,13 @@ class SparkDfConverter(Link):
     sequentially applied to the output of the previous function.  Each
     function is specified by either a callable object or a string.  A string
     will be interpreted as the name of an attribute of the dataset type.
+
+    Conversion into a Pandas data frame uses columnar transfer with Apache
+    Arrow by default.  For results that are too large to collect at once, a
+    chunk size can be specified, in which case the output is a generator of
+    Pandas data frames, which are streamed from Spark one partition at a time.
+    The chunks are transferred row by row, without Arrow, and the process
+    methods are applied on each chunk.
     """
 
     def __init__(self, **kwargs):
@@ -53,6 +60,9 @@ class SparkDfConverter(Link):
         :param dict process_meth_args: positional arguments for process methods
         :param dict process_meth_kwargs: keyword arguments for process methods
         :param bool fail_missing_data: fail execution if the input data frame is missing (default is "True")
+        :param bool use_arrow: transfer data to Pandas with Apache Arrow (default is True)
+        :param int arrow_batch_size: maximum number of records per Arrow batch (optional)
+        :param int chunk_size: produce generator of Pandas data frames with this maximum size (default 0: no chunks)
         """
 
         # initialize Link
@@ -61,15 +71,19 @@ class SparkDfConverter(Link):
         # process keyword arguments
         self._process_kwargs(kwargs, read_key='', store_key=None, schema_key=None, output_format='df',
                              preserve_col_names=True, process_methods=[], process_meth_args={}, process_meth_kwargs={},
-                             fail_missing_data=True)
+                             fail_missing_data=True, use_arrow=True, arrow_batch_size=None, chunk_size=0)
         self.kwargs = kwargs
 
     def initialize(self):
         """Inititialize SparkDfConverter"""
 
         # check input arguments
-        self.check_arg_types(read_key=str, output_format=str, process_meth_args=dict, process_meth_kwargs=dict)
-        self.check_arg_types(allow_none=True, store_key=str, schema_key=str)
+        self.check_arg_types(read_key=str, output_format=str, process_meth_args=dict, process_meth_kwargs=dict,
+                             chunk_size=int)
+        self.check_arg_types(allow_none=True, store_key=str, schema_key=str, arrow_batch_size=int)
+        assert self.chunk_size >= 0, 'chunk size must not be negative'
+        if self.chunk_size and self.arrow_batch_size:
+            raise RuntimeError('Arrow batch size cannot be used for chunked output, which is transferred without Arrow')
         self.check_arg_vals('read_key')
         self.preserve_col_names = bool(self.preserve_col_names)
         self.fail_missing_data = bool(self.fail_missing_data)
@@ -125,12 +139,20 @@ class SparkDfConverter(Link):
             if not self.preserve_col_names:
                 # convert rows to tuples, which removes column names
                 data = list(map(tuple, data))
+        elif self.output_format == 'pd' and self.chunk_size:
+            # convert to generator of Pandas data frames
+            data = data_conversion.iter_pandas_chunks(data, self.chunk_size)
         elif self.output_format == 'pd':
             # convert to Pandas data frame
-            data = data.toPandas()
-
-        # further process created dataset
-        data = apply_transform_funcs(data, self._process_methods)
+            data = data_conversion.spark_df_to_pandas(data, use_arrow=self.use_arrow,
+                                                      arrow_batch_size=self.arrow_batch_size)
+
+        # further process created dataset; process each chunk of a chunked data frame
+        if self.output_format == 'pd' and self.chunk_size:
+            process_methods = self._process_methods
+            data = (apply_transform_funcs(pdf, process_methods) for pdf in data)
+        else:
+            data = apply_transform_funcs(data, self._process_methods)
 
         # store data in data store
         ds[self.store_key] = data
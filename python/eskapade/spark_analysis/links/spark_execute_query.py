@@ -15,8 +15,11 @@
 # * LICENSE.                                                                       *
 # **********************************************************************************
 
+import pyspark
+
 from eskapade import ProcessManager, StatusCode, DataStore, Link
 from eskapade import spark_analysis
+from eskapade.spark_analysis.functions import query_tables
 
 OUTPUT_FORMATS = ['df', 'rdd', 'pd']
 
@@ -26,9 +29,16 @@ class SparkExecuteQuery(Link):
 
     Applies a SQL-query to one or more objects in the DataStore.
     Such SQL-queries can for instance be used to filter Spark
-    dataframes. All objects in the DataStore are registered as SQL
-    temporary views. The output of the query can be added to the
-    DataStore as a Spark dataframe (default), RDD or Pandas dataframe.
+    dataframes. The Spark dataframes in the DataStore that are
+    referenced in the query are registered as SQL temporary views. The
+    output of the query can be added to the DataStore as a Spark dataframe
+    (default), RDD or Pandas dataframe.
+
+    Optionally, the result of the query is persisted with the specified
+    storage level, such that it is not recomputed by each downstream link
+    that uses it.  The persisted result is reused when the link is executed
+    again with the same input dataframes.  It is released when the input
+    dataframes change and at finalize.
     """
 
     def __init__(self, **kwargs):
@@ -38,24 +48,32 @@ class SparkExecuteQuery(Link):
         :param str store_key: key of data to store in data store
         :param str output_format: data format to store: {"df" (default), "rdd", "pd"}
         :param str query: a string containing a SQL-query.
+        :param bool persist: persist query result (default False)
+        :param str storage_level: name of Spark storage level to persist with (default "MEMORY_AND_DISK")
         """
 
         # initialize Link
         Link.__init__(self, kwargs.pop('name', 'SparkSQL'))
 
         # process keyword arguments
-        self._process_kwargs(kwargs, store_key='', query='', output_format='df')
+        self._process_kwargs(kwargs, store_key='', query='', output_format='df', persist=False,
+                             storage_level='MEMORY_AND_DISK')
         self.check_extra_kwargs(kwargs)
 
         # initialize other attributes
         self.schema = None
+        self._cache = {}
 
     def initialize(self):
         """Initialize SparkExecuteQuery"""
 
         # check input arguments
-        self.check_arg_types(store_key=str, query=str, output_format=str)
+        self.check_arg_types(store_key=str, query=str, output_format=str, storage_level=str)
         self.check_arg_vals('store_key', 'query')
+        if self.persist and not isinstance(getattr(pyspark.StorageLevel, self.storage_level, None),
+                                           pyspark.StorageLevel):
+            self.log().critical('Specified storage level "%s" is invalid', self.storage_level)
+            raise RuntimeError('invalid storage level specified')
 
         # check output format
         if self.output_format not in OUTPUT_FORMATS:
@@ -71,16 +89,31 @@ class SparkExecuteQuery(Link):
 
         ds = ProcessManager().service(DataStore)
 
-        # register all objects in DataStore as SQL temporary views
-        for ds_key in ds.keys():
-            spark_df = ds[ds_key]
-            spark_df.createOrReplaceTempView(ds_key)
+        # register referenced data frames in DataStore as SQL temporary views
+        tables = query_tables(self.query, [k for k in ds.keys() if isinstance(ds[k], pyspark.sql.DataFrame)])
+        self.log().debug('Registering temporary views for tables: %s', ', '.join(tables))
+        for ds_key in tables:
+            ds[ds_key].createOrReplaceTempView(ds_key)
+
+        # reuse result of previous execution with the same input data frames
+        cache_key = (self.query, tuple((t, id(ds[t])) for t in tables))
+        if cache_key in self._cache:
+            self.log().debug('Reusing persisted result of query')
+            result = self._cache[cache_key][0]
+        else:
+            # get existing SparkSession
+            spark = ProcessManager().service(spark_analysis.SparkManager).get_session()
+
+            # apply SQL-query to temporary view(s)
+            result = spark.sql(self.query)
 
-        # get existing SparkSession
-        spark = ProcessManager().service(spark_analysis.SparkManager).get_session()
+            # release result of previous input data frames
+            self._release_cache()
 
-        # apply SQL-query to temporary view(s)
-        result = spark.sql(self.query)
+            # persist result; keep input data frames alive to keep their IDs unique
+            if self.persist:
+                result.persist(getattr(pyspark.StorageLevel, self.storage_level))
+                self._cache[cache_key] = (result, [ds[t] for t in tables])
 
         # store dataframe schema
         self.schema = result.schema
@@ -96,3 +129,18 @@ class SparkExecuteQuery(Link):
         ds[self.store_key] = result
 
         return StatusCode.Success
+
+    def finalize(self):
+        """Finalize SparkExecuteQuery"""
+
+        # release persisted query result
+        self._release_cache()
+
+        return StatusCode.Success
+
+    def _release_cache(self):
+        """Unpersist and remove cached query results"""
+
+        for result, _ in self._cache.values():
+            result.unpersist()
+        self._cache.clear()
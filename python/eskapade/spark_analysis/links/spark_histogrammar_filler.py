@@ -41,6 +41,10 @@ class SparkHistogrammarFiller(HistogrammarFiller):
     types. Timestamp columns are converted to nanoseconds before the binning
     is applied. Final histograms are stored in the datastore.
 
+    By default, all histograms are filled in a single pass over the data:
+    they are combined into one histogrammar UntypedLabel aggregator, which
+    is filled with one Spark aggregation, instead of one job per histogram.
+
     Example is available in: tutorials/esk605_hgr_filler_plotter.py
     """
 
@@ -71,6 +75,7 @@ class SparkHistogrammarFiller(HistogrammarFiller):
         :param bool store_at_finalize: store histograms in datastore at finalize(), not at execute() 
                                        (useful when looping over datasets, default is False)
         :param drop_keys dict: dictionary used for dropping specific keys from bins dictionaries of histograms
+        :param bool single_pass: fill all histograms in a single Spark aggregation (default True)
 
         Example drop_keys dictionary is:
 
@@ -84,9 +89,45 @@ class SparkHistogrammarFiller(HistogrammarFiller):
             kwargs['name'] = 'SparkHistogrammarFiller'
         HistogrammarFiller.__init__(self, **kwargs)
 
+        # process and register all relevant kwargs. kwargs are added as attributes of the link.
+        self._process_kwargs(kwargs, single_pass=True)
+
         self._unit_timestamp_specs = {'bin_width': float(pd.Timedelta(days=30).value),
                                       'bin_offset': float(pd.Timestamp('2010-01-04').value)}
 
+    def fill_histograms(self, idf):
+        """Fill histograms of all requested columns
+
+        In single-pass mode, the histograms are labeled sub-aggregators of a
+        histogrammar UntypedLabel, which is filled in one Spark aggregation.
+        The histograms are updated in place.
+
+        :param idf: input data frame used for filling histograms
+        """
+
+        if not self.single_pass:
+            HistogrammarFiller.fill_histograms(self, idf)
+            return
+
+        # create (empty) histograms of right type
+        names = []
+        for columns in self.columns:
+            name = ':'.join(columns)
+            if name not in self._hists:
+                self._hists[name] = self.construct_empty_hist(idf, columns)
+            names.append(name)
+        if not names:
+            return
+
+        # do the actual filling of all histograms in one aggregation
+        self.log().debug('Filling %d histograms in a single pass', len(names))
+        label = histogrammar.UntypedLabel(**dict((name, self._hists[name]) for name in names))
+        label.fill.sparksql(idf)
+
+        # remove specific keys from histograms before merging, if so requested
+        for name in names:
+            self._hists[name].bins = self.drop_requested_keys(name, self._hists[name].bins)
+
     def fill_histogram(self, idf, columns):
         """Fill input histogram with column(s) of input dataframe
 
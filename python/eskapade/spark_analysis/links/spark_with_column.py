@@ -15,16 +15,40 @@
 # * LICENSE.                                                                       *
 # **********************************************************************************
 
+import pyspark
 
 from eskapade import ProcessManager, DataStore, Link, StatusCode
 
 
+def _col(name):
+    """Get column by name, quoted such that it may contain dots"""
+
+    return pyspark.sql.functions.col('`{}`'.format(name.replace('`', '``')))
+
+
+def _col_name(col):
+    """Get name of column, specified by name or as column"""
+
+    return col if isinstance(col, str) else col._jc.toString().strip('`')
+
+
 class SparkWithColumn(Link):
     """Create a new column from columns in a Spark dataframe
 
     SparkWithColumn applies a (user-defined) function to column(s) in a
     Spark dataframe and adds its output as a new column to the same
     dataframe.
+
+    Multiple new columns can be specified with the "columns" argument, as a
+    list of (new column, function, input columns) specifications.  All new
+    columns are then computed in a single projection of the dataframe,
+    instead of one projection per column, which keeps the query plan
+    shallow.  Functions may be pandas UDFs, such that the Python UDFs of all
+    new columns are evaluated in one pass over batches of rows.  A plain
+    vectorized function (pandas series in, pandas series out) is wrapped in
+    a pandas UDF if a return type is specified.  The new columns are
+    computed from the columns of the input dataframe; a new column cannot
+    be used as input of another new column in the same link.
     """
 
     def __init__(self, **kwargs):
@@ -38,6 +62,9 @@ class SparkWithColumn(Link):
         :param list col_select: list of column names or columns in a dataframe; specifies to which columns
                                 the function is applied, together with col_usage (use all columns if not specified)
         :param list col_usage: use columns in col_select ('include') or any other columns in dataframe ('exclude')
+        :param list columns: specifications of new columns, as tuples (new_column, func[, col_select]) or as dicts
+                             with keys "new_column", "func", "col_select" (optional) and "ret_type" (optional;
+                             wraps func in a pandas UDF with this return type)
         """
 
         # initialize Link
@@ -45,50 +72,123 @@ class SparkWithColumn(Link):
 
         # process keyword arguments
         self._process_kwargs(kwargs, read_key='', store_key='', new_column='', func=None, col_select=None,
-                             col_usage='include')
+                             col_usage='include', columns=None)
         self.check_extra_kwargs(kwargs)
 
         # initialize other attributes
         self.schema = None
+        self._specs = []
 
     def initialize(self):
         """Initialize SparkWithColumn"""
 
         # check input arguments
         self.check_arg_types(read_key=str, store_key=str, col_usage=str, new_column=str)
-        self.check_arg_vals('read_key', 'new_column')
+        self.check_arg_vals('read_key')
         self.check_arg_opts(col_usage=('include', 'exclude'))
-        self.check_arg_iters('col_select', allow_none=True)
-        self.check_arg_callable('func')
+        self.check_arg_iters('col_select', 'columns', allow_none=True)
         if not self.store_key:
             self.store_key = self.read_key
-        if self.col_select is not None:
-            self.col_select = tuple(self.col_select)
+
+        # collect specifications of new columns
+        self._specs = []
+        if self.new_column or self.func is not None:
+            self.check_arg_vals('new_column')
+            self.check_arg_callable('func')
+            self._specs.append(self._parse_spec((self.new_column, self.func, self.col_select)))
+        for spec in self.columns or ():
+            self._specs.append(self._parse_spec(spec))
+        if not self._specs:
+            raise ValueError('no new columns specified for {}'.format(str(self)))
+        new_cols = [spec[0] for spec in self._specs]
+        if len(set(new_cols)) != len(new_cols):
+            raise ValueError('duplicate new columns specified for {0:s}: {1:s}'.format(str(self), str(new_cols)))
 
         return StatusCode.Success
 
-    def execute(self):
-        """Execute SparkWithColumn"""
+    def _parse_spec(self, spec):
+        """Parse specification of new column
 
-        # fetch data frame
-        ds = ProcessManager().service(DataStore)
-        spark_df = ds[self.read_key]
+        :param tuple|dict spec: (new_column, func[, col_select]) or dict with these keys and optionally "ret_type"
+        :returns: new column name, function, selected columns
+        :rtype: tuple
+        """
+
+        if isinstance(spec, dict):
+            spec = dict(spec)
+            ret_type = spec.pop('ret_type', None)
+            try:
+                new_col, func, col_select = spec.pop('new_column'), spec.pop('func'), spec.pop('col_select', None)
+            except KeyError as exc:
+                raise ValueError('no {0!s} in column specification of {1:s}'.format(exc, str(self)))
+            if spec:
+                raise ValueError('invalid keys in column specification of {0:s}: {1:s}'
+                                 .format(str(self), ', '.join(spec)))
+        else:
+            spec = tuple(spec)
+            if len(spec) not in (2, 3):
+                raise ValueError('column specification of {0:s} has {1:d} elements (expected 2 or 3)'
+                                 .format(str(self), len(spec)))
+            new_col, func, col_select, ret_type = spec[0], spec[1], spec[2] if len(spec) > 2 else None, None
+
+        # check specification
+        if not isinstance(new_col, str) or not new_col:
+            raise TypeError('invalid new-column name in column specification of {0:s}: {1!r}'
+                            .format(str(self), new_col))
+        if not callable(func):
+            raise TypeError('function for new column "{0:s}" of {1:s} is not callable'.format(new_col, str(self)))
+
+        # wrap vectorized function in pandas UDF
+        if ret_type is not None:
+            func = pyspark.sql.functions.pandas_udf(func, ret_type)
+
+        return new_col, func, tuple(col_select) if col_select is not None else None
+
+    def _func_columns(self, spark_df, col_select):
+        """Get columns to apply function to"""
 
         # use all columns if columns-select argument was not provided
-        if self.col_select is None:
-            self.col_select = tuple(spark_df.columns)
+        if col_select is None:
+            col_select = spark_df.columns
 
         # set list of columns to apply the function to
         # As the columns in 'col_select' can be either column names (strings) or the actual columns, some additional
         # processing is required in the below.
-        cols = [spark_df[c] if isinstance(c, str) else c for c in self.col_select]
+        cols = [_col(c) if isinstance(c, str) else c for c in col_select]
         if self.col_usage == 'exclude':
             # apply function to all columns in the dataframe which are not in 'col_select'
-            col_names = [str(c) for c in cols]
-            cols = [spark_df[c] for c in spark_df.columns if c not in col_names]
+            col_names = set(_col_name(c) for c in col_select)
+            cols = [_col(c) for c in spark_df.columns if c not in col_names]
+
+        return cols
+
+    def execute(self):
+        """Execute SparkWithColumn"""
+
+        # fetch data frame
+        ds = ProcessManager().service(DataStore)
+        spark_df = ds[self.read_key]
 
-        # apply function
-        new_spark_df = spark_df.withColumn(self.new_column, self.func(*cols))
+        # apply functions
+        new_cols = dict((new_col, func(*self._func_columns(spark_df, col_select)).alias(new_col))
+                        for new_col, func, col_select in self._specs)
+
+        # add new columns in a single projection; replace existing columns in place, as withColumn
+        if hasattr(spark_df, 'withColumns'):
+            new_spark_df = spark_df.withColumns(new_cols)
+        elif len(set(spark_df.columns)) == len(spark_df.columns):
+            sel_cols = [new_cols.pop(c) if c in new_cols else _col(c) for c in spark_df.columns]
+            new_spark_df = spark_df.select(*(sel_cols + list(new_cols.values())))
+        else:
+            # existing columns with duplicate names cannot be selected by name: append new columns, rename all
+            # columns to unique names and select them by position
+            n_cols = len(spark_df.columns)
+            tmp_df = spark_df.select('*', *new_cols.values())
+            tmp_df = tmp_df.toDF(*['_col{:d}'.format(i) for i in range(n_cols + len(new_cols))])
+            new_pos = dict((c, n_cols + i) for i, c in enumerate(new_cols))
+            positions = [(new_pos.get(c, i), c) for i, c in enumerate(spark_df.columns)]
+            positions += [(new_pos[c], c) for c in new_cols if c not in spark_df.columns]
+            new_spark_df = tmp_df.select(*[_col('_col{:d}'.format(i)).alias(c) for i, c in positions])
 
         # store updated data frame
         ds[self.store_key] = new_spark_df
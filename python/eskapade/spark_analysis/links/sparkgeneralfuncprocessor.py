@@ -13,9 +13,12 @@
 # * LICENSE.                                                                       *
 # **********************************************************************************
 from pyspark.sql import DataFrame
+from pyspark.sql.functions import pandas_udf, PandasUDFType
 
 from eskapade import ProcessManager, StatusCode, DataStore, Link
 
+MODES = ('group', 'combine', 'pandas')
+
 
 class SparkGeneralFuncProcessor(Link):
     """
@@ -28,6 +31,17 @@ class SparkGeneralFuncProcessor(Link):
 
     This Link uses pyspark.RDD.groupByKey() function instead of pyspark.RDD.reduceBeKey() because one needs all the
     data of one group on one datanode in order to make a pandas dataframe from the group.
+
+    Two alternative modes are available:
+
+    * "combine": for associative functions, the rows of each group are combined with the three functions of
+      pyspark.RDD.combineByKey (create a combined value from a row, merge a row into a combined value, merge two
+      combined values), specified by the "combiner" argument.  Rows are combined within partitions before the
+      shuffle, so groups are never materialized as a whole.  The general function, if specified, is applied on the
+      combined value instead of the group rows.
+    * "pandas": the general function is applied as a grouped-map pandas UDF (applyInPandas) on a spark dataframe.
+      It receives each group as a pandas dataframe, transferred with Apache Arrow, plus the function keyword
+      arguments, and returns a pandas dataframe with the specified output schema.  The result is a spark dataframe.
     """
 
     def __init__(self, **kwargs):
@@ -44,7 +58,11 @@ class SparkGeneralFuncProcessor(Link):
         :param dict function_args: Keyword arguments for the function 
         :param int nb_partitions: The number of partitions for repartitioning after groupByKey
         :param func return_map: Function used by the map on the rdd after the generalfunc is applied. The default return
-            a tuple of the groupby columns (row[0]) and the list returned by the generalfunc (row[1]).
+            a tuple of the groupby columns (row[0]) and the list returned by the generalfunc (row[1]).  In "combine"
+            mode without generalfunc, the default appends the combined value as a single element to the groupby columns.
+        :param str mode: mode of applying the function: "group" (default), "combine" or "pandas"
+        :param tuple combiner: functions to create a combined value, merge a row and merge combined values ("combine")
+        :param schema: schema of the output dataframe of the general function ("pandas" mode)
         """
 
         # initialize Link
@@ -52,7 +70,8 @@ class SparkGeneralFuncProcessor(Link):
 
         # process keyword arguments
         self._process_kwargs(kwargs, readKey='', storeKey='', groupby=[], columns=None, generalfunc=None,
-                             function_args={}, nb_partitions=1200, return_map=lambda row: tuple(list(row[0]) + row[1]))
+                             function_args={}, nb_partitions=1200, return_map=None,
+                             mode='group', combiner=None, schema=None)
         # check residual kwargs. 
         # (turn line off if you wish to keep these to pass on.)
         self.check_extra_kwargs(kwargs)
@@ -61,6 +80,24 @@ class SparkGeneralFuncProcessor(Link):
     def initialize(self):
         """Initialize SparkToGeneralFuncProcessor"""
 
+        if self.mode not in MODES:
+            raise ValueError('invalid mode "{0:s}"; please use one of {1:s}'.format(str(self.mode), ', '.join(MODES)))
+        if self.mode == 'combine':
+            self.combiner = tuple(self.combiner) if self.combiner is not None else ()
+            if len(self.combiner) != 3 or not all(callable(f) for f in self.combiner):
+                raise TypeError('combiner must consist of three functions (create, merge value, merge combiners)')
+        else:
+            self.check_arg_callable('generalfunc')
+        if self.mode == 'pandas' and self.schema is None:
+            raise ValueError('output schema required for pandas mode')
+
+        # default map of group keys and function results; a combined value may be of any type
+        if self.return_map is None:
+            if self.mode == 'combine' and not self.generalfunc:
+                self.return_map = lambda row: tuple(list(row[0]) + [row[1]])
+            else:
+                self.return_map = lambda row: tuple(list(row[0]) + row[1])
+
         return StatusCode.Success
 
     def execute(self):
@@ -70,19 +107,52 @@ class SparkGeneralFuncProcessor(Link):
 
         spark_df = ds[self.readKey]
 
+        # apply function on pandas dataframes of groups
+        if self.mode == 'pandas':
+            ds[self.storeKey] = self._apply_in_pandas(spark_df)
+            return StatusCode.Success
+
+        # rows of a dataframe are mapped through its rdd
         if isinstance(spark_df, DataFrame):
             if not self.columns:
                 self.columns = spark_df.columns
-            spark_df = spark_df.rdd
+            rdd = spark_df.rdd
         else:
             if not self.columns:
                 self.log().critical('Columns are not specified for rdd')
                 raise RuntimeError('Columns are not specified for rdd')
+            rdd = spark_df
 
-        res = spark_df.map(lambda row: (tuple([row[c] for c in self.groupby]), row)).groupByKey()\
-                      .repartition(self.nb_partitions).mapValues(lambda group: self.generalfunc(group, self.columns,
-                                                                                                **self.function_args))\
-                      .map(self.return_map)
+        # create (group key, row) pairs
+        groupby, func, columns, func_args = self.groupby, self.generalfunc, self.columns, self.function_args
+        rdd = rdd.map(lambda row: (tuple([row[c] for c in groupby]), row))
+
+        if self.mode == 'combine':
+            # combine rows per group, with map-side combining within partitions
+            res = rdd.combineByKey(*self.combiner, numPartitions=self.nb_partitions)
+            if func:
+                res = res.mapValues(lambda comb: func(comb, columns, **func_args))
+        else:
+            res = rdd.groupByKey().repartition(self.nb_partitions)\
+                     .mapValues(lambda group: func(group, columns, **func_args))
+        res = res.map(self.return_map)
         ds[self.storeKey] = res
 
         return StatusCode.Success
+
+    def _apply_in_pandas(self, spark_df):
+        """Apply general function on pandas dataframes of groups"""
+
+        if not isinstance(spark_df, DataFrame):
+            raise TypeError('pandas mode requires a spark dataframe as input')
+
+        func, func_args = self.generalfunc, self.function_args
+
+        def group_func(pdf):
+            return func(pdf, **func_args)
+
+        grouped = spark_df.groupBy(*self.groupby)
+        if hasattr(grouped, 'applyInPandas'):
+            return grouped.applyInPandas(group_func, schema=self.schema)
+        # Spark 2 interface of grouped-map pandas UDFs
+        return grouped.apply(pandas_udf(group_func, self.schema, PandasUDFType.GROUPED_MAP))
@@ -16,11 +16,18 @@
 import numpy as np
 
 from eskapade import ProcessManager, StatusCode, DataStore, Link
+from eskapade.spark_analysis.histogram_filling import fill_histograms
 
 
 class SparkHister(Link):
     """
     Defines the content of link SparkHister
+
+    The histograms of all columns are filled with native Spark SQL
+    expressions: bin indices are computed in the JVM and counts are
+    aggregated with a group-by, in one job for all columns (see
+    eskapade.spark_analysis.histogram_filling).  The histograms have the
+    structure of pyspark.RDD.histogram results.
     """
 
     def __init__(self, name='HiveHister'):
@@ -32,6 +39,7 @@ class SparkHister(Link):
         :param str storeKey: key of data to store in data store
         :param list columns: columns of the spark dataframe to make a histogram from
         :param dict bins: the bin edges of the histogram
+        :param int n_bins: number of bins for columns without specified bin edges (default 25)
         :param bool convert_for_mongo: if True the data structure of the result is converted so it can be stored in
             mongo
         """
@@ -42,6 +50,7 @@ class SparkHister(Link):
         self.columns = None
         self.storeKey = None
         self.bins = {}
+        self.n_bins = 25
         self.convert_for_mongo = False
         self.save_as_csv_style = False
         self.save_as_json_style = True
@@ -59,16 +68,8 @@ class SparkHister(Link):
 
         spark_df = ds[self.readKey]
 
-        result = {}
-
-        BINS = self.bins
-        for c in self.columns:
-            pos = spark_df.columns.index(c)
-            self.log().debug("Processing column: %s", c)
-            if c in list(self.bins.keys()):
-                result[c] = spark_df.map(lambda r: r[pos]).histogram(BINS[c])
-            else:
-                result[c] = spark_df.map(lambda r: r[pos]).histogram(25)
+        self.log().debug("Processing columns: %s", ', '.join(self.columns))
+        result = fill_histograms(spark_df, dict((c, self.bins.get(c, self.n_bins)) for c in self.columns))
 
         # --- NOTE: this depends on how the data will be read by the BI tool
         #           - SQL/Tableau requires a row per histogram bin
@@ -1,22 +1,69 @@
 import os
+import json
+import time
 import logging
+import collections
+import urllib.request
 
 import pyspark
+import tabulate
 
 import eskapade
-from eskapade import ProcessManager, ConfigObject
+from eskapade import ProcessManager, ConfigObject, DataStore
 from eskapade.core import persistence
 from eskapade.mixins import ConfigMixin
 from eskapade.core.process_services import ProcessService
-from eskapade.spark_analysis.functions import SPARK_UDFS
+from eskapade.spark_analysis.functions import SPARK_UDFS, SPARK_PANDAS_UDFS, query_tables
 
 logging.getLogger('py4j.java_gateway').setLevel('INFO')
 
 CONF_PREFIX = 'spark'
+READ_KEY_ATTRS = ('read_key', 'read_keys', 'readKey', 'readKeys')
+STORE_KEY_ATTRS = ('store_key', 'store_keys', 'storeKey')
+LINK_METRICS = ('jobs', 'stages', 'tasks', 'failed_tasks', 'executor_time_ms', 'input_bytes', 'shuffle_read_bytes',
+                'shuffle_write_bytes', 'memory_spill_bytes', 'disk_spill_bytes')
+STAGE_METRICS = dict(tasks='numCompleteTasks', failed_tasks='numFailedTasks', executor_time_ms='executorRunTime',
+                     input_bytes='inputBytes', shuffle_read_bytes='shuffleReadBytes',
+                     shuffle_write_bytes='shuffleWriteBytes', memory_spill_bytes='memoryBytesSpilled',
+                     disk_spill_bytes='diskBytesSpilled')
+STAGE_POLL_TRIES = 5
+STAGE_POLL_INTERVAL = 1.
+
+
+def _link_keys(link, attrs):
+    """Get data-store keys from link attributes"""
+
+    keys = []
+    for attr in attrs:
+        val = getattr(link, attr, None)
+        if isinstance(val, str):
+            keys.append(val)
+        elif isinstance(val, (list, tuple)):
+            keys += [k for k in val if isinstance(k, str)]
+    return [k for k in keys if k]
 
 
 class SparkManager(ProcessService, ConfigMixin):
-    """Process service for managing Spark operations"""
+    """Process service for managing Spark operations
+
+    The Spark manager optionally applies a caching policy to Spark data
+    frames in the data store.  With this policy, data frames that are read
+    by more than one link are persisted before their first reader is
+    executed and unpersisted after their last reader was executed, such that
+    they are not recomputed from source by each reader.  The readers of a
+    data-store key are determined from the "read_key(s)" (or "readKey(s)")
+    attributes of the links and from the tables referenced in the "query"
+    attributes of the links.
+
+    Optionally, the Spark manager also collects metrics of the Spark jobs
+    that are triggered by each link.  The jobs of a link are tagged with a
+    job group while it is executed and their IDs are recorded after
+    execution.  At the end of the run, when the metrics of the stages are
+    complete, the numbers of jobs, stages and tasks are obtained from the
+    Spark status tracker and the executor time, input, shuffle and spill
+    sizes of the stages are obtained from the Spark monitoring REST API.
+    The metrics per link are then reported.
+    """
 
     _persist = False
 
@@ -25,9 +72,18 @@ class SparkManager(ProcessService, ConfigMixin):
 
         self._session = None
         self._stream = None
+        self._cache_level = None
+        self._cache_readers = None
+        self._cache_remaining = {}
+        self._n_cache_readers = {}
+        self._cached = {}
+        self._collect_metrics = False
+        self._link_jobs = collections.OrderedDict()
+        self.link_metrics = collections.OrderedDict()
         ConfigMixin.__init__(self, config_path=config_path)
 
-    def create_session(self, enableHiveSupport=False, includeEskapadeModules=False, **conf_kwargs):
+    def create_session(self, enableHiveSupport=False, includeEskapadeModules=False, vectorizedUdfs=True,
+                       **conf_kwargs):
         """Get or create Spark session
 
         Return the Spark-session instance.  Create the session if it does not
@@ -36,6 +92,7 @@ class SparkManager(ProcessService, ConfigMixin):
 
         :param bool enableHiveSupport: switch for enabling Spark Hive support
         :param bool includeEskapadeModules: switch to include Eskapade modules in Spark job submission
+        :param bool vectorizedUdfs: register vectorized (pandas) versions of the Eskapade UDFs, if PyArrow is available
         """
 
         # return existing session if still running
@@ -68,14 +125,40 @@ class SparkManager(ProcessService, ConfigMixin):
         self._session = spark_builder.config(conf=spark_conf).getOrCreate()
 
         # register user-defined functions
-        for udf_name, udf in SPARK_UDFS.items():
-            ret_type = getattr(pyspark.sql.types, udf.get('ret_type', 'StringType'))()
-            self._session.udf.register(name=udf_name, f=udf['func'], returnType=ret_type)
+        self._register_udfs(vectorizedUdfs)
 
         self.log().debug('Created Spark session with config {}'.format(str(self._session.sparkContext.getConf().getAll())))
 
         return self._session
 
+    def _register_udfs(self, vectorized=True):
+        """Register Eskapade user-defined functions in Spark session
+
+        Row-based UDFs are replaced by their vectorized versions if requested.
+        These are registered as pandas UDFs, which process batches of rows
+        transferred with Apache Arrow.
+
+        :param bool vectorized: register vectorized UDFs if available
+        """
+
+        pandas_udfs = {}
+        if vectorized and SPARK_PANDAS_UDFS:
+            try:
+                import pyarrow
+                pandas_udfs = SPARK_PANDAS_UDFS
+            except ImportError:
+                self.log().warning('PyArrow not available; registering row-based Spark UDFs')
+
+        for udf_name, udf in SPARK_UDFS.items():
+            udf = pandas_udfs.get(udf_name, udf)
+            ret_type = getattr(pyspark.sql.types, udf.get('ret_type', 'StringType'))()
+            if udf_name in pandas_udfs:
+                self._session.udf.register(name=udf_name, f=pyspark.sql.functions.pandas_udf(udf['func'], ret_type))
+            else:
+                self._session.udf.register(name=udf_name, f=udf['func'], returnType=ret_type)
+        self.log().debug('Registered Spark UDFs: {}'.format(', '.join(
+            '{}{}'.format(n, ' (vectorized)' if n in pandas_udfs else '') for n in SPARK_UDFS)))
+
     def get_session(self):
         """Get Spark session
 
@@ -135,6 +218,218 @@ class SparkManager(ProcessService, ConfigMixin):
 
         return spark_conf
 
+    def set_caching_policy(self, storage_level='MEMORY_AND_DISK'):
+        """Set caching policy for Spark data frames in data store
+
+        Data frames that are read by more than one link are persisted with
+        the specified storage level.  The policy is disabled if no storage
+        level is specified.
+
+        :param str storage_level: name of Spark storage level (e.g. "MEMORY_ONLY"); None to disable caching
+        """
+
+        if storage_level is not None and not isinstance(getattr(pyspark.StorageLevel, str(storage_level), None),
+                                                        pyspark.StorageLevel):
+            self.log().critical('Specified storage level "%s" is invalid', storage_level)
+            raise ValueError('invalid storage level specified')
+
+        self._cache_level = storage_level
+        self._cache_readers = None
+        self.log().debug('Set caching policy with storage level "%s"', storage_level)
+
+    def _link_read_keys(self, link):
+        """Get keys of data read by link"""
+
+        return self._cache_readers.get(link, ())
+
+    def _plan_caching(self):
+        """Determine keys of data frames to cache and their readers
+
+        The links of all chains in the process manager are scanned for the
+        data-store keys they read.  Only keys that are read by more than one
+        link are cached.
+        """
+
+        links = [link for chain in ProcessManager().chains for link in chain.links]
+        names = set(k for link in links for k in _link_keys(link, READ_KEY_ATTRS + STORE_KEY_ATTRS))
+
+        # count readers of each key
+        n_readers = {}
+        link_keys = {}
+        for link in links:
+            keys = set(_link_keys(link, READ_KEY_ATTRS))
+            query = getattr(link, 'query', None)
+            if isinstance(query, str):
+                keys.update(query_tables(query, names))
+            link_keys[link] = keys
+            for key in keys:
+                n_readers[key] = n_readers.get(key, 0) + 1
+
+        # select keys with multiple readers
+        self._cache_readers = dict((link, [k for k in keys if n_readers[k] > 1]) for link, keys in link_keys.items())
+        self._cache_readers = dict((link, keys) for link, keys in self._cache_readers.items() if keys)
+        self._cache_remaining = dict((k, n) for k, n in n_readers.items() if n > 1)
+        self._n_cache_readers = dict(self._cache_remaining)
+        if self._cache_remaining:
+            self.log().debug('Caching data frames with multiple readers: %s', ', '.join(sorted(self._cache_remaining)))
+
+    def set_metrics_collection(self, enable=True):
+        """Set collection of Spark metrics per link
+
+        :param bool enable: collect metrics of the Spark jobs triggered by each link
+        """
+
+        self._collect_metrics = bool(enable)
+        self.log().debug('%s collection of Spark metrics per link', 'Enabled' if enable else 'Disabled')
+
+    def link_started(self, link):
+        """Prepare Spark operations for execution of link
+
+        Persist data frames read by the link if they have multiple readers
+        and tag Spark jobs with the job group of the link.
+
+        :param eskapade.Link link: link that is about to be executed
+        """
+
+        self._cache_inputs(link)
+        if self._collect_metrics and self._session:
+            self._session.sparkContext.setJobGroup(self._job_group(link), 'Eskapade link "{}"'.format(link.name))
+
+    def link_executed(self, link):
+        """Process Spark operations after execution of link
+
+        Unpersist data frames of which the link was the last reader and
+        record the Spark jobs triggered by the link.
+
+        :param eskapade.Link link: link that was executed
+        """
+
+        self._release_inputs(link)
+        if self._collect_metrics and self._session:
+            self._session.sparkContext.setLocalProperty('spark.jobGroup.id', None)
+            self._session.sparkContext.setLocalProperty('spark.job.description', None)
+            job_ids = self._session.sparkContext.statusTracker().getJobIdsForGroup(self._job_group(link))
+            self._link_jobs.setdefault(link, set()).update(job_ids)
+
+    def run_finished(self):
+        """Collect and report Spark metrics per link"""
+
+        if self._link_jobs and self._session:
+            self._collect_link_metrics()
+        if not self.link_metrics:
+            return
+        table = tabulate.tabulate([[link.name] + [metrics[m] for m in LINK_METRICS]
+                                   for link, metrics in self.link_metrics.items()], headers=('link',) + LINK_METRICS)
+        self.log().info('Spark metrics per link:\n%s', table)
+
+    @staticmethod
+    def _job_group(link):
+        """Get Spark job group of link"""
+
+        return 'eskapade_{0:s}_{1:x}'.format(link.name, id(link))
+
+    def _collect_link_metrics(self):
+        """Collect metrics of the recorded Spark jobs of the links
+
+        The metrics are collected once, after all links were executed, such
+        that the stage metrics, which are updated asynchronously, are complete.
+        """
+
+        tracker = self._session.sparkContext.statusTracker()
+        for link, job_ids in self._link_jobs.items():
+            metrics = self.link_metrics[link] = dict((m, 0) for m in LINK_METRICS)
+            for job_id in sorted(job_ids):
+                job = tracker.getJobInfo(job_id)
+                if job is None:
+                    continue
+                metrics['jobs'] += 1
+                for stage_id in job.stageIds:
+                    metrics['stages'] += 1
+                    for name, val in self._stage_metrics(stage_id).items():
+                        metrics[name] += val
+
+    def _stage_metrics(self, stage_id):
+        """Get metrics of Spark stage
+
+        The metrics are obtained from the Spark monitoring REST API.  The API
+        is polled while the stage is still active.  If the API is not
+        available, only the task counts are obtained from the Spark status
+        tracker.
+
+        :param int stage_id: ID of stage
+        :returns: metric values
+        :rtype: dict
+        """
+
+        sc = self._session.sparkContext
+        if sc.uiWebUrl:
+            url = '{0:s}/api/v1/applications/{1:s}/stages/{2:d}'.format(sc.uiWebUrl, sc.applicationId, stage_id)
+            try:
+                for it in range(STAGE_POLL_TRIES):
+                    with urllib.request.urlopen(url, timeout=10) as resp:
+                        attempts = json.loads(resp.read().decode('utf-8'))
+                    if not any(a.get('status') == 'ACTIVE' for a in attempts) or it == STAGE_POLL_TRIES - 1:
+                        break
+                    time.sleep(STAGE_POLL_INTERVAL)
+                return dict((m, sum(a.get(k, 0) for a in attempts)) for m, k in STAGE_METRICS.items())
+            except (OSError, ValueError) as exc:
+                self.log().debug('Unable to get metrics of stage %d from Spark REST API: %s', stage_id, str(exc))
+
+        info = sc.statusTracker().getStageInfo(stage_id)
+        if info is None:
+            return {}
+        return dict(tasks=info.numCompletedTasks, failed_tasks=info.numFailedTasks)
+
+    def _cache_inputs(self, link):
+        """Persist data frames read by link if they have multiple readers"""
+
+        if not self._cache_level:
+            return
+        if self._cache_readers is None:
+            self._plan_caching()
+
+        ds = ProcessManager().service(DataStore)
+        for key in self._link_read_keys(link):
+            df = ds.get(key)
+            if not isinstance(df, pyspark.sql.DataFrame) or self._cached.get(key) is df:
+                continue
+            self._unpersist(key)
+            if df.is_cached:
+                continue
+            self.log().debug('Persisting data frame "%s" with storage level %s', key, self._cache_level)
+            df.persist(getattr(pyspark.StorageLevel, self._cache_level))
+            self._cached[key] = df
+
+    def _release_inputs(self, link):
+        """Unpersist data frames of which link was the last reader"""
+
+        if not self._cache_level or self._cache_readers is None:
+            return
+
+        for key in self._link_read_keys(link):
+            self._cache_remaining[key] -= 1
+            if self._cache_remaining[key] > 0:
+                continue
+
+            # last reader executed: release data and reset count for repeated executions
+            self._unpersist(key)
+            self._cache_remaining[key] = self._n_cache_readers[key]
+
+    def _release_cache(self):
+        """Unpersist all cached data frames and reset caching plan"""
+
+        for key in list(self._cached):
+            self._unpersist(key)
+        self._cache_readers = None
+
+    def _unpersist(self, key):
+        """Unpersist cached data frame"""
+
+        df = self._cached.pop(key, None)
+        if df is not None:
+            self.log().debug('Unpersisting data frame "%s"', key)
+            df.unpersist()
+
     @property
     def spark_streaming_context(self):
         """Spark Streaming Context"""
@@ -165,6 +460,10 @@ class SparkManager(ProcessService, ConfigMixin):
             self._stream.stop()
             self._stream = None
 
+        self._release_cache()
+        self._link_jobs.clear()
+        self.link_metrics.clear()
+
         if self._session:
             self.log().debug('Spark manager stopping session: "{}"'.format(self._session.sparkContext.appName))
             self._session.stop()
@@ -8,7 +8,7 @@ from pyspark.sql.types import StructField, StructType, LongType, DoubleType, Str
 from eskapade import ProcessManager, ConfigObject
 from eskapade.tests.integration.test_bases import IntegrationTest
 from ...spark_manager import SparkManager
-from ...data_conversion import create_spark_df, df_schema
+from ...data_conversion import create_spark_df, df_schema, spark_df_to_pandas, iter_pandas_chunks
 
 
 class DataConversionTest(IntegrationTest):
@@ -98,6 +98,25 @@ class DataConversionTest(IntegrationTest):
         self.assertEqual(df.rdd.getNumPartitions(), 2,
                          'unexpected number of data-frame partitions for "{}"'.format(descr))
 
+    def test_spark_df_to_pandas(self):
+        """Test conversion of a Spark data frame into Pandas data frames"""
+
+        # create Spark data frame from Pandas data frame
+        spark = ProcessManager().service(SparkManager).get_session()
+        pdf = pd.DataFrame({'long': range(100), 'double': [it / 2. for it in range(100)],
+                            'str': ['foo{:d}'.format(it) for it in range(100)]})
+        df = create_spark_df(spark, pdf, arrow_batch_size=10)
+        self.assertTupleEqual(tuple(df.schema), (StructField('long', LongType()), StructField('double', DoubleType()),
+                                                 StructField('str', StringType())), 'unexpected data-frame schema')
+
+        # convert back, at once and in chunks
+        for use_arrow in (True, False):
+            conv_pdf = spark_df_to_pandas(df, use_arrow=use_arrow, arrow_batch_size=10)
+            pd.testing.assert_frame_equal(conv_pdf, pdf)
+        chunks = list(iter_pandas_chunks(df.coalesce(3), 30))
+        self.assertListEqual([len(c) for c in chunks], [30, 30, 30, 10], 'unexpected chunk sizes')
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), pdf)
+
     def test_df_schema(self):
         """Test creation of a data-frame schema"""
 
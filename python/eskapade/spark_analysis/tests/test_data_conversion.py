@@ -0,0 +1,39 @@
+import decimal
+import unittest
+import mock
+
+import numpy as np
+import pandas as pd
+from pyspark.sql.types import ShortType, LongType, DecimalType, DoubleType
+
+from ..data_conversion import pandas_df_schema, create_spark_df
+
+
+@mock.patch('pyspark.sql.types.StructField', side_effect=lambda name, data_type: (name, data_type))
+@mock.patch('pyspark.sql.types.StructType', side_effect=list)
+class DataConversionTest(unittest.TestCase):
+    """Tests for conversions between Spark and pandas data"""
+
+    def setUp(self):
+        self.pdf = pd.DataFrame({'u8': np.array([1, 2], dtype=np.uint8), 'u32': np.array([1, 2], dtype=np.uint32),
+                                 'u64': np.array([1, 2 ** 64 - 1], dtype=np.uint64), 'x': [1., 2.]})
+
+    def test_pandas_df_schema(self, mock_struct_type, mock_struct_field):
+        """Test mapping of pandas data types on Spark-SQL types"""
+
+        self.assertListEqual(pandas_df_schema(self.pdf), [('u8', ShortType()), ('u32', LongType()),
+                                                          ('u64', DecimalType(20, 0)), ('x', DoubleType())])
+
+    def test_create_spark_df(self, mock_struct_type, mock_struct_field):
+        """Test transfer of unsigned 64-bit integers as decimals"""
+
+        spark = mock.Mock(name='spark')
+        spark.conf.get.return_value = None
+        df = create_spark_df(spark, self.pdf)
+        self.assertIs(df, spark.createDataFrame.return_value)
+        data = spark.createDataFrame.call_args[0][0]
+        self.assertListEqual(data['u64'].tolist(), [decimal.Decimal(1), decimal.Decimal(2 ** 64 - 1)])
+        self.assertTrue(all(isinstance(v, decimal.Decimal) for v in data['u64']), 'values not converted to decimals')
+        self.assertListEqual(data['u32'].tolist(), [1, 2])
+        self.assertEqual(self.pdf['u64'].dtype, np.uint64, 'input data frame modified')
+        self.assertListEqual(spark.createDataFrame.call_args[1]['schema'], pandas_df_schema(self.pdf))
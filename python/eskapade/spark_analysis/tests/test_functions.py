@@ -1,8 +1,12 @@
 import unittest
 import mock
 
+import numpy as np
+import pandas as pd
+
 from ..functions import (SPARK_UDFS, is_nan, is_inf, to_date_time, to_timestamp, calc_asym,
-                         SPARK_QUERY_FUNCS, spark_sql_func, spark_query_func)
+                         is_nan_series, is_inf_series, to_timestamp_series, calc_asym_series,
+                         SPARK_QUERY_FUNCS, spark_sql_func, spark_query_func, query_tables)
 
 UDFS = dict(is_nan=dict(func=is_nan, ret_type='BooleanType'),
             is_inf=dict(func=is_inf, ret_type='BooleanType'),
@@ -88,6 +92,41 @@ class UdfTest(unittest.TestCase):
             self.assertAlmostEqual(res, exp_res, places=10,
                                    msg='unexpected asymmetry value for {}'.format(str(vals)))
 
+    def test_vectorized_udfs(self):
+        """Test vectorized versions of Spark UDFs"""
+
+        # compare with row-based functions
+        test_vals = pd.Series([None, 'None', ' nan', 'foo', 1, np.nan, np.inf, -np.inf], dtype=object)
+        self.assertListEqual(is_nan_series(test_vals).tolist(), [is_nan(x) for x in test_vals],
+                             'unexpected NaN/null/None results')
+        self.assertListEqual(is_inf_series(pd.Series([0., np.nan, np.inf, -np.inf])).tolist(),
+                             [False, False, True, True], 'unexpected infinity results')
+        test_vals = pd.Series(['2017-01-01', '2017-02-03 04:05:06', 'foo', None])
+        res = to_timestamp_series(test_vals, tz_in='Europe/Amsterdam')
+        self.assertListEqual(res[:2].tolist(), [to_timestamp(x, tz_in='Europe/Amsterdam') for x in test_vals[:2]],
+                             'unexpected timestamp results')
+        self.assertListEqual(res.isnull().tolist(), [False, False, True, True], 'unexpected timestamp nulls')
+
+        # ambiguous and non-existent local times, and values with a time zone, cannot be localized
+        test_vals = pd.Series(['2017-10-29 02:30', '2017-03-26 02:30', '2017-10-29 04:30', '2017-10-29 04:30+01:00'])
+        res = to_timestamp_series(test_vals, tz_in='Europe/Amsterdam')
+        self.assertListEqual([None if pd.isnull(x) else x for x in res],
+                             [to_timestamp(x, tz_in='Europe/Amsterdam') for x in test_vals],
+                             'unexpected timestamp results for local times')
+        self.assertListEqual(res.isnull().tolist(), [True, True, False, True], 'unexpected timestamp nulls')
+
+        # mixed UTC offsets
+        test_vals = pd.Series(['2017-01-01 00:00+01:00', '2017-01-01 00:00+02:00', 'foo'])
+        res = to_timestamp_series(test_vals)
+        self.assertListEqual([None if pd.isnull(x) else x for x in res], [to_timestamp(x) for x in test_vals],
+                             'unexpected timestamp results for mixed UTC offsets')
+        res = to_timestamp_series(test_vals.replace('foo', '2017-01-01 00:00'), tz_in='Europe/Amsterdam')
+        self.assertListEqual(res.isnull().tolist(), [True, True, False], 'unexpected timestamp nulls')
+        self.assertEqual(res[2], to_timestamp('2017-01-01 00:00', tz_in='Europe/Amsterdam'))
+
+        res = calc_asym_series(pd.Series([1.0, 'one', -1]), pd.Series([3.0, 'one', 3]))
+        self.assertListEqual(res.fillna(-99.).tolist(), [0.5, -99., 1.0], 'unexpected asymmetry values')
+
     def test_udf_dict(self):
         """Test dictionary of Spark UDFs"""
 
@@ -134,3 +173,10 @@ class FunctionsTest(unittest.TestCase):
             else:
                 with self.assertRaises(res):
                     spark_query_func(val)
+
+    def test_query_tables(self):
+        """Test finding table names in SQL query"""
+
+        query = 'SELECT t.id, `Table.Two`.x FROM TABLE1 t JOIN `table.two` ON t.id = `Table.Two`.id'
+        names = ['table1', 'Table.Two', 'table3', 'id_table', 42]
+        self.assertListEqual(query_tables(query, names), ['table1', 'Table.Two'], 'unexpected referenced tables')
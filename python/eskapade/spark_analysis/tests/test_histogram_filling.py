@@ -0,0 +1,127 @@
+import math
+import unittest
+import mock
+
+import numpy as np
+
+from ..histogram_filling import uniform_bin_edges, bin_index, fill_histograms
+
+
+def _expr(val):
+    """Get mock expression for expression or literal value"""
+
+    return val if isinstance(val, Expr) else Expr(lambda v: val)
+
+
+class Expr(object):
+    """Mock Spark SQL expression, evaluated on a single column value
+
+    Null values are represented by None and propagate through operations.
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, val):
+        return self.func(val)
+
+    def _op(self, other, op):
+        other = _expr(other)
+
+        def func(v):
+            args = self(v), other(v)
+            return None if any(a is None for a in args) else op(*args)
+
+        return Expr(func)
+
+    def __ge__(self, other):
+        return self._op(other, lambda a, b: not math.isnan(a) and (math.isnan(b) or a >= b))
+
+    def __le__(self, other):
+        return self._op(other, lambda a, b: math.isnan(b) or (not math.isnan(a) and a <= b))
+
+    def __lt__(self, other):
+        return self._op(other, lambda a, b: not math.isnan(a) and (math.isnan(b) or a < b))
+
+    def __eq__(self, other):
+        return self._op(other, lambda a, b: a == b or (math.isnan(a) and math.isnan(b)))
+
+    def __sub__(self, other):
+        return self._op(other, lambda a, b: a - b)
+
+    def __truediv__(self, other):
+        return self._op(other, lambda a, b: a / b)
+
+    def __and__(self, other):
+        other = _expr(other)
+        return Expr(lambda v: False if False in (self(v), other(v)) else None if None in (self(v), other(v)) else True)
+
+    def __invert__(self):
+        return Expr(lambda v: None if self(v) is None else not self(v))
+
+    def cast(self, typ):
+        return Expr(lambda v: None if self(v) is None else int(self(v)))
+
+    def when(self, cond, val):
+        return When(self.cases + [(cond, _expr(val))])
+
+    def otherwise(self, val):
+        return When(self.cases, _expr(val))
+
+
+class When(Expr):
+    """Mock conditional expression"""
+
+    def __init__(self, cases, default=None):
+        self.cases = cases
+        Expr.__init__(self, lambda v: next((e(v) for c, e in cases if c(v) is True), default(v) if default else None))
+
+
+class Functions(object):
+    """Mock Spark SQL functions"""
+
+    col = staticmethod(lambda name: Expr(lambda v: v))
+    lit = staticmethod(_expr)
+    isnan = staticmethod(lambda e: Expr(lambda v: e(v) is not None and math.isnan(e(v))))
+    floor = staticmethod(lambda e: Expr(lambda v: None if e(v) is None else math.floor(e(v))))
+    least = staticmethod(lambda *es: Expr(lambda v: min((e(v) for e in es if e(v) is not None), default=None)))
+    when = staticmethod(lambda cond, val: When([(cond, _expr(val))]))
+
+
+@mock.patch('eskapade.spark_analysis.histogram_filling.F', Functions)
+class HistogramFillingTest(unittest.TestCase):
+    """Tests for filling histograms with Spark SQL expressions"""
+
+    def test_uniform_bin_edges(self):
+        """Test edges of bins of equal width"""
+
+        self.assertListEqual(uniform_bin_edges(0., 1., 4), [0., .25, .5, .75, 1.])
+        self.assertListEqual(uniform_bin_edges(2., 2., 4), [2., 2.], 'no single bin for equal edges')
+        self.assertListEqual(uniform_bin_edges(None, 1., 4), [])
+        self.assertListEqual(uniform_bin_edges(0., None, 4), [])
+
+    def test_bin_index(self):
+        """Test bin-index expressions"""
+
+        nan = float('nan')
+        below_high = np.nextafter(1., 0.)
+        for edges, vals_idx in [(uniform_bin_edges(0., 1., 3), [(0., 0), (.5, 1), (1., 2), (below_high, 2),
+                                                                 (-.1, None), (1.1, None), (nan, None), (None, None)]),
+                                ([0., 1., 3.], [(0., 0), (1., 1), (2., 1), (3., 1), (3.1, None), (nan, None)]),
+                                ([2., 2.], [(2., 0), (1., None), (nan, None)]),
+                                ([], [(0., None), (nan, None)])]:
+            index = bin_index('x', edges)
+            for val, idx in vals_idx:
+                self.assertEqual(index(val), idx, 'unexpected index of value {0!r} for edges {1!s}'.format(val, edges))
+
+    def test_integral_bins(self):
+        """Test numbers of bins of integral types"""
+
+        df = mock.Mock(name='df')
+        with mock.patch('eskapade.spark_analysis.histogram_filling.column_ranges') as mock_ranges, \
+                mock.patch('eskapade.spark_analysis.histogram_filling.fill_bin_counts') as mock_counts:
+            mock_ranges.return_value = {'x': (0., 1.)}
+            mock_counts.return_value = {'x': {0: 5, 1: 2}}
+            hists = fill_histograms(df, {'x': np.int64(2)})
+        mock_ranges.assert_called_once_with(df, ['x'])
+        self.assertTupleEqual(hists['x'], ([0., .5, 1.], [5, 2]))
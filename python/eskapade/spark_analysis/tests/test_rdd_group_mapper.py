@@ -0,0 +1,64 @@
+import unittest
+import mock
+
+import pyspark
+
+from eskapade import ProcessManager, DataStore
+
+from ..links import RddGroupMapper
+
+
+class RddGroupMapperTest(unittest.TestCase):
+    """Tests for the link to apply maps on groups in Spark RDDs"""
+
+    def setUp(self):
+        self.rdd = mock.Mock(name='rdd', spec=pyspark.RDD)
+        ProcessManager().service(DataStore)['rdd'] = self.rdd
+
+    def test_combiner(self):
+        """Test combining values per key"""
+
+        ds = ProcessManager().service(DataStore)
+        combiner = (mock.Mock(name='create'), mock.Mock(name='merge_value'), mock.Mock(name='merge_combiners'))
+        group_map = mock.Mock(name='group_map')
+        link = RddGroupMapper(read_key='rdd', store_key='res', combiner=combiner, group_map=group_map,
+                              num_group_partitions=10)
+        link.initialize()
+        link.execute()
+        self.rdd.combineByKey.assert_called_once_with(*combiner, numPartitions=10)
+        self.rdd.groupByKey.assert_not_called()
+        self.rdd.combineByKey.return_value.mapValues.assert_called_once_with(group_map)
+        self.assertIs(ds['res'], self.rdd.combineByKey.return_value.mapValues.return_value, 'result not stored')
+
+        # combined values are output as they are without group map
+        link = RddGroupMapper(read_key='rdd', store_key='res', combiner=list(combiner))
+        link.initialize()
+        self.rdd.reset_mock()
+        link.execute()
+        self.rdd.combineByKey.return_value.mapValues.assert_not_called()
+        self.assertIs(ds['res'], self.rdd.combineByKey.return_value, 'result not stored')
+
+        # combiner consists of three functions
+        for comb in (combiner[:2], combiner[:2] + ('no_func',)):
+            link = RddGroupMapper(read_key='rdd', combiner=comb)
+            self.assertRaises(TypeError, link.initialize)
+
+    def test_group_map(self):
+        """Test applying map on groups"""
+
+        ds = ProcessManager().service(DataStore)
+        group_map = mock.Mock(name='group_map')
+        link = RddGroupMapper(read_key='rdd', store_key='res', group_map=group_map, flatten_output_groups=True)
+        link.initialize()
+        link.execute()
+        self.rdd.groupByKey.assert_called_once_with(numPartitions=None)
+        self.rdd.combineByKey.assert_not_called()
+        self.rdd.groupByKey.return_value.flatMapValues.assert_called_once_with(group_map)
+        self.assertIs(ds['res'], self.rdd.groupByKey.return_value.flatMapValues.return_value, 'result not stored')
+
+        # group map is required without combiner
+        self.assertRaises(ValueError, RddGroupMapper(read_key='rdd').initialize)
+
+    def tearDown(self):
+        from eskapade.core import execution
+        execution.reset_eskapade()
@@ -0,0 +1,85 @@
+import unittest
+import mock
+
+import pyspark
+
+from eskapade import ProcessManager, DataStore
+
+from ..links import SparkDataToCsv
+
+
+class SparkDataToCsvTest(unittest.TestCase):
+    """Tests for the link to write Spark data to CSV files"""
+
+    def test_compression(self):
+        """Test compression options per output format"""
+
+        codec = 'org.apache.hadoop.io.compress.{}Codec'.format
+        for file_format, kwargs, exp_comp in [('csv', dict(compression_codec=codec('BZip2')), 'bzip2'),
+                                              ('parquet', dict(compression_codec=codec('Gzip')), 'gzip'),
+                                              ('parquet', dict(compression='zstd'), 'zstd'),
+                                              ('csv', dict(compression_codec='no.such.Codec'), None)]:
+            link = SparkDataToCsv(read_key='df', output_path='hdfs:/out', file_format=file_format, **kwargs)
+            link.initialize()
+            self.assertEqual(link.compression, exp_comp, 'unexpected compression for {}'.format(kwargs))
+
+        for file_format, kwargs in [('parquet', dict(compression_codec=codec('BZip2'))),
+                                    ('parquet', dict(compression_codec=codec('Default'))),
+                                    ('csv', dict(compression='zstd'))]:
+            link = SparkDataToCsv(read_key='df', output_path='hdfs:/out', file_format=file_format, **kwargs)
+            self.assertRaises(RuntimeError, link.initialize)
+
+    def test_write_df(self):
+        """Test writing data frames with the data-frame writer"""
+
+        ds = ProcessManager().service(DataStore)
+        spark_df = mock.Mock(name='spark_df', spec=pyspark.sql.DataFrame)
+        spark_df.columns = ['a', 'b']
+        spark_df.rdd.getNumPartitions.return_value = 4
+        ds['df'] = spark_df
+
+        # coalesce into fewer files, with partitioning, records limit and compression
+        link = SparkDataToCsv(read_key='df', output_path='hdfs:/out', mode='overwrite', num_files=2,
+                              partition_by='a', max_records_per_file=100, compression='gzip', sep=';', header=True)
+        link.initialize()
+        link.execute()
+        spark_df.coalesce.assert_called_once_with(2)
+        spark_df.repartition.assert_not_called()
+        writer = spark_df.coalesce.return_value.write
+        writer.mode.assert_called_once_with('overwrite')
+        writer = writer.mode.return_value
+        writer.partitionBy.assert_called_once_with('a')
+        writer = writer.partitionBy.return_value
+        writer.option.assert_called_once_with('maxRecordsPerFile', 100)
+        writer = writer.option.return_value
+        writer.option.assert_called_once_with('compression', 'gzip')
+        writer = writer.option.return_value
+        writer.csv.assert_called_once_with('hdfs:/out', sep=';', header=True)
+        writer.parquet.assert_not_called()
+
+        # repartition into more files
+        spark_df.reset_mock()
+        link = SparkDataToCsv(read_key='df', output_path='hdfs:/out', mode='overwrite', num_files=8)
+        link.initialize()
+        link.execute()
+        spark_df.coalesce.assert_not_called()
+        spark_df.repartition.assert_called_once_with(8)
+        writer = spark_df.repartition.return_value.write.mode.return_value
+        writer.partitionBy.assert_not_called()
+        writer.option.assert_not_called()
+        writer.csv.assert_called_once_with('hdfs:/out', sep=',', header=False)
+
+        # keep partitioning of data frame
+        spark_df.reset_mock()
+        link = SparkDataToCsv(read_key='df', output_path='hdfs:/out', mode='overwrite', num_files=0,
+                              file_format='parquet')
+        link.initialize()
+        link.execute()
+        spark_df.coalesce.assert_not_called()
+        spark_df.repartition.assert_not_called()
+        spark_df.write.mode.assert_called_once_with('overwrite')
+        spark_df.write.mode.return_value.parquet.assert_called_once_with('hdfs:/out')
+
+    def tearDown(self):
+        from eskapade.core import execution
+        execution.reset_eskapade()
@@ -0,0 +1,43 @@
+import unittest
+import mock
+
+import pandas as pd
+import pyspark
+
+from eskapade import ProcessManager, DataStore
+
+from ..links import SparkDfConverter
+
+
+class SparkDfConverterTest(unittest.TestCase):
+    """Tests for the link to convert Spark data frames"""
+
+    @mock.patch('eskapade.spark_analysis.data_conversion.iter_pandas_chunks')
+    def test_chunks(self, mock_iter_chunks):
+        """Test conversion into chunks of pandas data frames"""
+
+        ds = ProcessManager().service(DataStore)
+        spark_df = mock.Mock(name='spark_df', spec=pyspark.sql.DataFrame)
+        ds['df'] = spark_df
+        chunks = [pd.DataFrame({'x': [1, 2]}), pd.DataFrame({'x': [3]})]
+        mock_iter_chunks.return_value = iter(chunks)
+
+        # process methods are applied on each chunk
+        link = SparkDfConverter(read_key='df', store_key='pdfs', output_format='pd', chunk_size=2,
+                                process_methods=[(pd.DataFrame.add, (1,), {}), 'reset_index'])
+        link.initialize()
+        link.execute()
+        mock_iter_chunks.assert_called_once_with(spark_df, 2)
+        pdfs = list(ds['pdfs'])
+        self.assertEqual(len(pdfs), 2)
+        self.assertListEqual(pdfs[0]['x'].tolist(), [2, 3])
+        self.assertListEqual(pdfs[1]['x'].tolist(), [4])
+        self.assertListEqual(list(pdfs[1].columns), ['index', 'x'])
+
+        # chunks are transferred without Arrow
+        link = SparkDfConverter(read_key='df', output_format='pd', chunk_size=2, arrow_batch_size=1000)
+        self.assertRaises(RuntimeError, link.initialize)
+
+    def tearDown(self):
+        from eskapade.core import execution
+        execution.reset_eskapade()
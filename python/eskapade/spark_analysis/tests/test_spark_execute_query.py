@@ -0,0 +1,58 @@
+import unittest
+import mock
+
+import pandas as pd
+import pyspark
+
+from eskapade import ProcessManager, DataStore
+
+from ..links import SparkExecuteQuery
+
+
+class SparkExecuteQueryTest(unittest.TestCase):
+    """Tests for the link to execute SQL queries on Spark dataframes"""
+
+    @mock.patch('eskapade.spark_analysis.SparkManager.get_session')
+    def test_execute(self, mock_get_session):
+        """Test registration of views and persistence of query results"""
+
+        ds = ProcessManager().service(DataStore)
+        mock_sql = mock_get_session.return_value.sql
+        mock_sql.side_effect = lambda query: mock.Mock(name='result')
+        ds['df1'] = mock.Mock(name='df1', spec=pyspark.sql.DataFrame)
+        ds['df2'] = mock.Mock(name='df2', spec=pyspark.sql.DataFrame)
+        ds['other'] = pd.DataFrame()
+
+        link = SparkExecuteQuery(store_key='result', query='SELECT * FROM `DF1` JOIN other', persist=True)
+        link.initialize()
+
+        # only referenced data frames are registered as views
+        link.execute()
+        ds['df1'].createOrReplaceTempView.assert_called_once_with('df1')
+        ds['df2'].createOrReplaceTempView.assert_not_called()
+        mock_sql.assert_called_once_with('SELECT * FROM `DF1` JOIN other')
+        result = ds['result']
+        result.persist.assert_called_once_with(pyspark.StorageLevel.MEMORY_AND_DISK)
+
+        # result is reused for the same input data frames
+        link.execute()
+        self.assertEqual(mock_sql.call_count, 1, 'query executed again for the same input')
+        self.assertIs(ds['result'], result, 'persisted result not reused')
+
+        # result is released if the input data frames change
+        ds['df1'] = mock.Mock(name='df1_new', spec=pyspark.sql.DataFrame)
+        link.execute()
+        self.assertEqual(mock_sql.call_count, 2, 'query not executed for new input')
+        result.unpersist.assert_called_once_with()
+        new_result = ds['result']
+        self.assertIsNot(new_result, result, 'result not updated for new input')
+        self.assertEqual(len(link._cache), 1, 'unexpected number of cached results')
+
+        # result is released at finalize
+        link.finalize()
+        new_result.unpersist.assert_called_once_with()
+        self.assertFalse(link._cache, 'cache not cleared at finalize')
+
+    def tearDown(self):
+        from eskapade.core import execution
+        execution.reset_eskapade()
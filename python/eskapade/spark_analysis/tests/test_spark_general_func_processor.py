@@ -0,0 +1,129 @@
+import unittest
+import mock
+
+import pyspark
+from pyspark.sql.functions import PandasUDFType
+
+from eskapade import ProcessManager, DataStore
+
+from ..links import SparkGeneralFuncProcessor
+
+
+class SparkGeneralFuncProcessorTest(unittest.TestCase):
+    """Tests for the link to apply general functions on groups in Spark data"""
+
+    def setUp(self):
+        self.rdd = mock.Mock(name='rdd')
+        self.spark_df = mock.Mock(name='spark_df', spec=pyspark.sql.DataFrame)
+        self.spark_df.columns = ['a', 'b']
+        self.spark_df.rdd = self.rdd
+        ProcessManager().service(DataStore)['df'] = self.spark_df
+
+    def test_return_map(self):
+        """Test default map of group keys and function results"""
+
+        combiner = (lambda r: [r], lambda c, r: c + [r], lambda c1, c2: c1 + c2)
+        func = lambda group, columns: [len(list(group))]
+        for kwargs, row, exp_res in [(dict(generalfunc=func), ((1, 'x'), [2, 3]), (1, 'x', 2, 3)),
+                                     (dict(mode='combine', combiner=combiner), ((1,), 5), (1, 5)),
+                                     (dict(mode='combine', combiner=combiner, generalfunc=func), ((1,), [5]), (1, 5))]:
+            link = SparkGeneralFuncProcessor(readKey='df', storeKey='res', groupby=['a'], **kwargs)
+            link.initialize()
+            self.assertTupleEqual(link.return_map(row), exp_res, 'unexpected default return map')
+
+        link = SparkGeneralFuncProcessor(readKey='df', storeKey='res', mode='combine', combiner=combiner[:2])
+        self.assertRaises(TypeError, link.initialize)
+
+    def test_combine(self):
+        """Test combining rows of groups"""
+
+        ds = ProcessManager().service(DataStore)
+        combiner = (mock.Mock(name='create'), mock.Mock(name='merge_value'), mock.Mock(name='merge_combiners'))
+        func = mock.Mock(name='func', return_value=[3])
+        link = SparkGeneralFuncProcessor(readKey='df', storeKey='res', groupby=['a'], mode='combine',
+                                         combiner=combiner, generalfunc=func, function_args=dict(x=1),
+                                         nb_partitions=10)
+        link.initialize()
+        link.execute()
+        self.assertListEqual(link.columns, ['a', 'b'], 'columns not taken from dataframe')
+
+        # rows of dataframe are mapped to (group key, row) pairs through its rdd
+        self.rdd.map.assert_called_once_with(mock.ANY)
+        row = dict(a=1, b=2)
+        self.assertTupleEqual(self.rdd.map.call_args[0][0](row), ((1,), row), 'unexpected group key-value pair')
+
+        # rows are combined with the three combiner functions
+        pairs = self.rdd.map.return_value
+        pairs.combineByKey.assert_called_once_with(*combiner, numPartitions=10)
+        pairs.groupByKey.assert_not_called()
+
+        # general function is applied on combined values
+        comb = pairs.combineByKey.return_value
+        comb.mapValues.assert_called_once_with(mock.ANY)
+        self.assertListEqual(comb.mapValues.call_args[0][0]('comb'), [3])
+        func.assert_called_once_with('comb', ['a', 'b'], x=1)
+        comb.mapValues.return_value.map.assert_called_once_with(link.return_map)
+        self.assertIs(ds['res'], comb.mapValues.return_value.map.return_value, 'result not stored')
+
+    def test_group(self):
+        """Test applying function on groups of rows"""
+
+        ds = ProcessManager().service(DataStore)
+        func = mock.Mock(name='func', return_value=[3])
+        link = SparkGeneralFuncProcessor(readKey='df', storeKey='res', groupby=['a'], generalfunc=func,
+                                         nb_partitions=10)
+        link.initialize()
+        link.execute()
+        pairs = self.rdd.map.return_value
+        pairs.groupByKey.assert_called_once_with()
+        pairs.combineByKey.assert_not_called()
+        parts = pairs.groupByKey.return_value.repartition
+        parts.assert_called_once_with(10)
+        self.assertListEqual(parts.return_value.mapValues.call_args[0][0]('group'), [3])
+        func.assert_called_once_with('group', ['a', 'b'])
+        self.assertIs(ds['res'], parts.return_value.mapValues.return_value.map.return_value, 'result not stored')
+
+        # rdd input requires columns
+        ds['df'] = self.rdd
+        link = SparkGeneralFuncProcessor(readKey='df', storeKey='res', groupby=['a'], generalfunc=func)
+        link.initialize()
+        self.assertRaises(RuntimeError, link.execute)
+
+    def test_pandas(self):
+        """Test applying function as grouped-map pandas UDF"""
+
+        ds = ProcessManager().service(DataStore)
+        func = mock.Mock(name='func', return_value='pdf_out')
+        link = SparkGeneralFuncProcessor(readKey='df', storeKey='res', groupby=['a'], mode='pandas',
+                                         generalfunc=func, function_args=dict(x=1), schema='a long, n long')
+        link.initialize()
+
+        # apply function with applyInPandas
+        grouped = mock.Mock(name='grouped', spec=['applyInPandas', 'apply'])
+        self.spark_df.groupBy.return_value = grouped
+        link.execute()
+        self.spark_df.groupBy.assert_called_once_with('a')
+        grouped.applyInPandas.assert_called_once_with(mock.ANY, schema='a long, n long')
+        self.assertEqual(grouped.applyInPandas.call_args[0][0]('pdf'), 'pdf_out')
+        func.assert_called_once_with('pdf', x=1)
+        grouped.apply.assert_not_called()
+        self.assertIs(ds['res'], grouped.applyInPandas.return_value, 'result not stored')
+
+        # fall back to grouped-map pandas UDF without applyInPandas
+        grouped = mock.Mock(name='grouped', spec=['apply'])
+        self.spark_df.groupBy.return_value = grouped
+        with mock.patch('eskapade.spark_analysis.links.sparkgeneralfuncprocessor.pandas_udf') as mock_udf:
+            link.execute()
+        mock_udf.assert_called_once_with(mock.ANY, 'a long, n long', PandasUDFType.GROUPED_MAP)
+        grouped.apply.assert_called_once_with(mock_udf.return_value)
+        self.assertIs(ds['res'], grouped.apply.return_value, 'result not stored')
+
+        # pandas mode requires a dataframe and a schema
+        ds['df'] = self.rdd
+        self.assertRaises(TypeError, link.execute)
+        link = SparkGeneralFuncProcessor(readKey='df', mode='pandas', generalfunc=func)
+        self.assertRaises(ValueError, link.initialize)
+
+    def tearDown(self):
+        from eskapade.core import execution
+        execution.reset_eskapade()
@@ -0,0 +1,71 @@
+import unittest
+import mock
+
+import pyspark
+
+from eskapade import ProcessManager, DataStore
+
+from ..links import SparkHistogrammarFiller
+
+
+class SparkHistogrammarFillerTest(unittest.TestCase):
+    """Tests for the link to fill histogrammar histograms with Spark"""
+
+    @mock.patch('histogrammar.sparksql.addMethods')
+    @mock.patch('histogrammar.UntypedLabel')
+    def test_single_pass(self, mock_label, mock_add_methods):
+        """Test filling of all histograms in a single pass"""
+
+        # create mock data frame
+        ds = ProcessManager().service(DataStore)
+        spark_df = mock.Mock(name='spark_df', spec=pyspark.sql.dataframe.DataFrame)
+        spark_df.columns = ['x', 'y']
+        spark_df.dtypes = [('x', 'double'), ('y', 'string')]
+        ds['df'] = spark_df
+        idf = spark_df.alias.return_value
+
+        # fill each sub-histogram of a label with one entry in two bins
+        labels = []
+
+        def label(**hists):
+            lab = mock.Mock(name='label')
+
+            def fill(df):
+                for hist in hists.values():
+                    for key in (1, 2):
+                        hist.bins[key] = hist.bins.get(key, 0) + 1
+
+            lab.fill.sparksql.side_effect = fill
+            labels.append(lab)
+            return lab
+
+        mock_label.side_effect = label
+
+        link = SparkHistogrammarFiller(read_key='df', store_key='hists', columns=['x', 'y'], drop_keys={'x': [2]},
+                                       store_at_finalize=True)
+        link.initialize()
+        with mock.patch.object(link, 'construct_empty_hist', side_effect=lambda df, cols: mock.Mock(bins={})) \
+                as mock_construct:
+            # fill all histograms in one aggregation
+            link.execute()
+            hists = dict(link._hists)
+            mock_label.assert_called_once_with(x=hists['x'], y=hists['y'])
+            labels[0].fill.sparksql.assert_called_once_with(idf)
+            mock_add_methods.assert_called_once_with(idf)
+            self.assertDictEqual(hists['x'].bins, {1: 1}, 'requested keys not dropped')
+            self.assertDictEqual(hists['y'].bins, {1: 1, 2: 1})
+
+            # accumulate into existing histograms
+            link.execute()
+            self.assertEqual(mock_construct.call_count, 2, 'histograms not constructed once per column')
+            self.assertEqual(len(labels), 2, 'histograms not filled in one aggregation per execute')
+            mock_label.assert_called_with(x=hists['x'], y=hists['y'])
+            labels[1].fill.sparksql.assert_called_once_with(idf)
+            self.assertIs(link._hists['x'], hists['x'], 'histogram not updated in place')
+            self.assertIs(link._hists['y'], hists['y'], 'histogram not updated in place')
+            self.assertDictEqual(hists['x'].bins, {1: 2}, 'requested keys not dropped')
+            self.assertDictEqual(hists['y'].bins, {1: 2, 2: 2})
+
+    def tearDown(self):
+        from eskapade.core import execution
+        execution.reset_eskapade()
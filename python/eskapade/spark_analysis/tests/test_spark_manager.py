@@ -1,3 +1,4 @@
+import json
 import unittest
 import mock
 
@@ -6,7 +7,7 @@ import pyspark
 from eskapade import ProcessManager, ConfigObject
 
 from ..spark_manager import SparkManager
-from ..functions import SPARK_UDFS
+from ..functions import SPARK_UDFS, SPARK_PANDAS_UDFS
 
 
 class SparkManagerTest(unittest.TestCase):
@@ -103,10 +104,8 @@ class SparkManagerTest(unittest.TestCase):
         created_session.getOrCreate.assert_called_once()
         self.assertIs(session, created_session, 'incorrect session returned')
         self.assertIs(mock_sm._session, created_session, 'incorrect session set')
-        # check UDF calls
-        udf_calls = [mock.call.udf.register(name=n, f='{}_func'.format(n),
-                                            returnType=getattr(mock_types, '{}_type'.format(n))()) for n in SPARK_UDFS]
-        created_session.assert_has_calls(udf_calls, any_order=True)
+        # check UDF registration
+        mock_sm._register_udfs.assert_called_once_with(True)
         mock_sm.reset_mock()
         mock_es_utils.reset_mock()
         mock_builder.reset_mock()
@@ -145,6 +144,36 @@ class SparkManagerTest(unittest.TestCase):
         mock_builder.reset_mock()
         created_session.reset_mock()
 
+    @mock.patch.dict('eskapade.spark_analysis.functions.SPARK_PANDAS_UDFS', clear=True)
+    @mock.patch.dict('eskapade.spark_analysis.functions.SPARK_UDFS', clear=True)
+    @mock.patch('pyspark.sql.functions.pandas_udf')
+    @mock.patch('pyspark.sql.types')
+    def test_register_udfs(self, mock_types, mock_pandas_udf):
+        """Test registration of Spark UDFs"""
+
+        # create mock UDFs
+        SPARK_UDFS['foo'] = dict(func='foo_func', ret_type='foo_type')
+        SPARK_UDFS['bar'] = dict(func='bar_func', ret_type='bar_type')
+        SPARK_PANDAS_UDFS['foo'] = dict(func='foo_vec_func', ret_type='foo_type')
+        mock_pandas_udf.side_effect = lambda f, t: 'pandas_udf_{}'.format(f)
+        mock_sm = mock.Mock(name='spark_manager')
+
+        # test registration of row-based UDFs
+        SparkManager._register_udfs(mock_sm, vectorized=False)
+        udf_calls = [mock.call.udf.register(name=n, f='{}_func'.format(n),
+                                            returnType=getattr(mock_types, '{}_type'.format(n))()) for n in SPARK_UDFS]
+        mock_sm._session.assert_has_calls(udf_calls, any_order=True)
+        mock_pandas_udf.assert_not_called()
+        mock_sm.reset_mock()
+
+        # test registration of vectorized UDFs, with row-based UDFs if there is no vectorized version
+        with mock.patch.dict('sys.modules', pyarrow=mock.Mock(name='pyarrow')):
+            SparkManager._register_udfs(mock_sm, vectorized=True)
+        mock_pandas_udf.assert_called_once_with('foo_vec_func', mock_types.foo_type())
+        udf_calls = [mock.call.udf.register(name='foo', f='pandas_udf_foo_vec_func'),
+                     mock.call.udf.register(name='bar', f='bar_func', returnType=mock_types.bar_type())]
+        mock_sm._session.assert_has_calls(udf_calls, any_order=True)
+
     def test_get_session(self):
         """Test retrieving of already running Spark session"""
 
@@ -365,3 +394,98 @@ class SparkManagerTest(unittest.TestCase):
         SparkManager.finish(mock_sm)
         mock_session.stop.assert_called_once_with()
         self.assertIs(mock_sm._session, None)
+
+    @mock.patch('eskapade.spark_analysis.spark_manager.ProcessManager')
+    def test_caching_policy(self, mock_pm):
+        """Test caching of data frames with multiple readers"""
+
+        # create mock links and data frames
+        reader = mock.Mock(name='reader', spec=['store_key'], store_key='df1')
+        links = [mock.Mock(name='link1', spec=['read_key'], read_key='df1'),
+                 mock.Mock(name='link2', spec=['read_key', 'query'], read_key='df2', query='SELECT * FROM df1'),
+                 mock.Mock(name='link3', spec=['read_keys'], read_keys=['df1', 'df2']),
+                 mock.Mock(name='link4', spec=['readKey'], readKey='df2')]
+        mock_pm.return_value.chains = [mock.Mock(links=[reader] + links[:2]), mock.Mock(links=links[2:])]
+        dfs = dict((k, mock.Mock(name=k, spec=pyspark.sql.DataFrame, is_cached=False)) for k in ('df1', 'df2'))
+        mock_pm.return_value.service.return_value = dfs
+
+        # test persisting at first reader and unpersisting after last reader
+        sm = SparkManager()
+        sm.set_caching_policy('MEMORY_ONLY')
+        with self.assertRaises(ValueError):
+            sm.set_caching_policy('NO_SUCH_LEVEL')
+        for link in [reader] + links:
+            sm.link_started(link)
+            sm.link_executed(link)
+            if link is links[0]:
+                dfs['df1'].persist.assert_called_once_with(pyspark.StorageLevel.MEMORY_ONLY)
+                dfs['df1'].unpersist.assert_not_called()
+            if link is links[2]:
+                dfs['df1'].unpersist.assert_called_once_with()
+                dfs['df2'].unpersist.assert_not_called()
+        dfs['df1'].persist.assert_called_once_with(pyspark.StorageLevel.MEMORY_ONLY)
+        dfs['df1'].unpersist.assert_called_once_with()
+        dfs['df2'].persist.assert_called_once_with(pyspark.StorageLevel.MEMORY_ONLY)
+        dfs['df2'].unpersist.assert_called_once_with()
+        self.assertDictEqual(sm._cached, {})
+
+    @mock.patch('time.sleep')
+    @mock.patch('urllib.request.urlopen')
+    def test_metrics_collection(self, mock_urlopen, mock_sleep):
+        """Test collection of Spark metrics per link"""
+
+        # create Spark manager with mock session
+        sm = SparkManager()
+        sm.set_metrics_collection()
+        sm._session = mock.Mock(name='spark_session')
+        sc = sm._session.sparkContext
+        sc.uiWebUrl = 'http://localhost:4040'
+        sc.applicationId = 'app-1'
+        tracker = sc.statusTracker.return_value
+        tracker.getJobIdsForGroup.return_value = [0, 1]
+        tracker.getJobInfo.side_effect = lambda i: mock.Mock(jobId=i, stageIds=[2 * i, 2 * i + 1])
+        stage = dict(status='COMPLETE', numCompleteTasks=4, numFailedTasks=0, executorRunTime=100, inputBytes=10,
+                     shuffleReadBytes=20, shuffleWriteBytes=30, memoryBytesSpilled=0, diskBytesSpilled=5)
+        mock_urlopen.return_value.__enter__.return_value.read.return_value = json.dumps([stage]).encode()
+
+        # test recording jobs of executed link
+        link = mock.Mock(name='link', spec=['name'])
+        link.name = 'my_link'
+        sm.link_started(link)
+        group = sc.setJobGroup.call_args[0][0]
+        sm.link_executed(link)
+        tracker.getJobIdsForGroup.assert_called_once_with(group)
+        tracker.getJobInfo.assert_not_called()
+        mock_urlopen.assert_not_called()
+        self.assertDictEqual(sm.link_metrics, {}, 'metrics collected before end of run')
+
+        # jobs are not counted twice in repeated executions
+        sm.link_started(link)
+        tracker.getJobIdsForGroup.return_value = [0, 1, 2]
+        sm.link_executed(link)
+
+        # test metrics collected at end of run
+        sm.run_finished()
+        mock_urlopen.assert_any_call('http://localhost:4040/api/v1/applications/app-1/stages/5', timeout=10)
+        self.assertEqual(mock_urlopen.call_count, 6)
+        mock_sleep.assert_not_called()
+        metrics = sm.link_metrics[link]
+        self.assertEqual(metrics['jobs'], 3)
+        self.assertEqual(metrics['stages'], 6)
+        self.assertEqual(metrics['tasks'], 24)
+        self.assertEqual(metrics['shuffle_write_bytes'], 180)
+        self.assertEqual(metrics['disk_spill_bytes'], 30)
+
+        # test polling of active stages
+        tracker.getJobIdsForGroup.return_value = [0]
+        tracker.getJobInfo.side_effect = lambda i: mock.Mock(jobId=i, stageIds=[0])
+        active = dict(stage, status='ACTIVE', numCompleteTasks=1)
+        mock_urlopen.return_value.__enter__.return_value.read.side_effect = [json.dumps([active]).encode(),
+                                                                            json.dumps([stage]).encode()]
+        sm.link_metrics.clear()
+        sm._link_jobs.clear()
+        sm.link_started(link)
+        sm.link_executed(link)
+        sm.run_finished()
+        mock_sleep.assert_called_once_with(mock.ANY)
+        self.assertEqual(sm.link_metrics[link]['tasks'], 4)
@@ -0,0 +1,103 @@
+import unittest
+import mock
+
+from eskapade import ProcessManager, DataStore
+
+from ..links import SparkWithColumn
+
+
+class Col(str):
+    """Mock column, identified by a string"""
+
+    def alias(self, name):
+        return '{0:s} AS {1:s}'.format(self, name)
+
+
+class SparkWithColumnTest(unittest.TestCase):
+    """Tests for the link to create new columns in Spark dataframes"""
+
+    def setUp(self):
+        self.func = mock.Mock(name='func', side_effect=lambda *cols: mock.Mock(alias=lambda name: 'new_' + name))
+
+    def test_parse_spec(self):
+        """Test parsing of new-column specifications"""
+
+        func = self.func
+        link = SparkWithColumn(read_key='df', columns=[('a', func, ['x']), dict(new_column='b', func=func)])
+        link.initialize()
+        self.assertListEqual(link._specs, [('a', func, ('x',)), ('b', func, None)], 'unexpected column specifications')
+        self.assertEqual(link.store_key, 'df', 'store key not set to read key')
+
+        with mock.patch('pyspark.sql.functions.pandas_udf') as mock_udf:
+            self.assertEqual(link._parse_spec(dict(new_column='c', func=func, ret_type='double'))[1],
+                             mock_udf.return_value, 'vectorized function not wrapped in pandas UDF')
+            mock_udf.assert_called_once_with(func, 'double')
+
+        for spec, exc in [(('a',), ValueError), (dict(new_column='a'), ValueError),
+                          (dict(new_column='a', func=func, foo=1), ValueError), (('a', 'no_func'), TypeError),
+                          (('', func), TypeError)]:
+            self.assertRaises(exc, link._parse_spec, spec)
+        link = SparkWithColumn(read_key='df', columns=[('a', func), ('a', func)])
+        self.assertRaises(ValueError, link.initialize)
+        link = SparkWithColumn(read_key='df')
+        self.assertRaises(ValueError, link.initialize)
+
+    @mock.patch('pyspark.sql.functions.col', side_effect=lambda name: Col('col_' + name))
+    def test_projection(self, mock_col):
+        """Test projection of new columns"""
+
+        ds = ProcessManager().service(DataStore)
+        link = SparkWithColumn(read_key='df', store_key='new_df', columns=[('x', self.func, ['a.b']), ('y', self.func)])
+        link.initialize()
+
+        # select existing and new columns by quoted names
+        spark_df = mock.Mock(name='spark_df', spec=['columns', 'select', 'withColumn'])
+        spark_df.columns = ['x', 'a.b']
+        ds['df'] = spark_df
+        link.execute()
+        spark_df.select.assert_called_once_with('new_x', 'col_`a.b`', 'new_y')
+        self.assertListEqual(self.func.call_args_list, [mock.call('col_`a.b`'), mock.call('col_`x`', 'col_`a.b`')],
+                             'unexpected function input columns')
+        self.assertIs(ds['new_df'], spark_df.select.return_value, 'projected dataframe not stored')
+
+        # select columns by position if existing column names are not unique
+        spark_df = mock.Mock(name='spark_df', spec=['columns', 'select', 'withColumn'])
+        spark_df.columns = ['x', 'a.b', 'x']
+        ds['df'] = spark_df
+        link.execute()
+        spark_df.withColumn.assert_not_called()
+        spark_df.select.assert_called_once_with('*', 'new_x', 'new_y')
+        tmp_df = spark_df.select.return_value
+        tmp_df.toDF.assert_called_once_with('_col0', '_col1', '_col2', '_col3', '_col4')
+        tmp_df.toDF.return_value.select.assert_called_once_with('col_`_col3` AS x', 'col_`_col1` AS a.b',
+                                                                'col_`_col3` AS x', 'col_`_col4` AS y')
+        self.assertIs(ds['new_df'], tmp_df.toDF.return_value.select.return_value, 'projected dataframe not stored')
+
+        # add all columns at once with withColumns if available
+        spark_df = mock.Mock(name='spark_df', spec=['columns', 'withColumns'])
+        spark_df.columns = ['x', 'a.b']
+        ds['df'] = spark_df
+        link.execute()
+        spark_df.withColumns.assert_called_once_with({'x': 'new_x', 'y': 'new_y'})
+
+    @mock.patch('pyspark.sql.functions.col', side_effect=lambda name: Col('col_' + name))
+    def test_exclude(self, mock_col):
+        """Test exclusion of selected columns from function input"""
+
+        ds = ProcessManager().service(DataStore)
+        spark_df = mock.Mock(name='spark_df', spec=['columns', 'withColumns'])
+        spark_df.columns = ['x', 'a.b', 'z']
+        ds['df'] = spark_df
+        col_ab = mock.Mock(name='col_ab')
+        col_ab._jc.toString.return_value = '`a.b`'
+        for col_select, exp_cols in [(['x'], ('col_`a.b`', 'col_`z`')), (['x', col_ab], ('col_`z`',))]:
+            self.func.reset_mock()
+            link = SparkWithColumn(read_key='df', store_key='new_df', new_column='y', func=self.func,
+                                   col_select=col_select, col_usage='exclude')
+            link.initialize()
+            link.execute()
+            self.func.assert_called_once_with(*exp_cols)
+
+    def tearDown(self):
+        from eskapade.core import execution
+        execution.reset_eskapade()
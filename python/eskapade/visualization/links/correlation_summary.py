@@ -17,19 +17,37 @@ import os
 import pandas as pd
 import numpy as np
 import tabulate
-#from sklearn.feature_selection import mutual_info_regression
+from numpy.random import RandomState
 
 from eskapade import ProcessManager, ConfigObject, Link, DataStore, StatusCode
 from eskapade.core import persistence
 from eskapade import visualization
+from eskapade.analysis.correlation import binned_correlations, CorrelationAccumulator, N_BINS, N_RANK_BINS, \
+    ACCUMULATED_CORRS
 
-#ALL_CORRS = ['pearson', 'kendall', 'spearman', 'mutual_information', 'correlation_ratio']
 ALL_CORRS = ['pearson', 'kendall', 'spearman', 'correlation_ratio']
+OPTIONAL_CORRS = ['mutual_information']
 LINEAR_CORRS = ['pearson', 'kendall', 'spearman']
+BINNED_CORRS = ['mutual_information', 'correlation_ratio']
 
 
 class CorrelationSummary(Link):
-    """Create a heatmap of correlations between dataframe variables"""
+    """Create a heatmap of correlations between dataframe variables
+
+    Correlation ratios and mutual information are computed from the columns
+    binned into integer codes, in blocks of columns or column pairs, which
+    can be processed in parallel processes.  Optionally, the correlations
+    are computed on a random subsample of the records, and statistical
+    errors are estimated from the spread of the correlations in disjoint
+    parts of the (sub)sample.
+
+    In accumulate mode, the correlations are computed from statistics that
+    are updated with each input dataframe, e.g. in a loop over data chunks,
+    such that the full dataset does not need to fit in memory.  The
+    correlation matrices and report pages are then created at finalize.
+    Pearson, Spearman and correlation-ratio matrices can be accumulated; see
+    eskapade.analysis.correlation.CorrelationAccumulator for details.
+    """
 
     def __init__(self, **kwargs):
         """Initialize CorrelationSummary instance
@@ -38,23 +56,44 @@ class CorrelationSummary(Link):
         :param str read_key: key of input dataframe to read from data store
         :param str store_key: key of correlations dataframe in data store
         :param str results_path: path to save correlation summary pdf
-        :param list methods: method(s) of computing correlations
+        :param list methods: method(s) of computing correlations; mutual_information is only computed if specified
+                             (default: all accumulated methods in accumulate mode, else all but mutual_information)
         :param str pages_key: data store key of existing report pages
+        :param int n_bins: number of bins per column for binned correlation methods (default 11)
+        :param int n_jobs: number of parallel processes for binned correlation methods and plotting (default 1)
+        :param int sample_size: number of randomly selected records to compute correlations with (default all)
+        :param int n_error_samples: number of disjoint parts of the sample to estimate errors with (default 0: none)
+        :param int seed: seed of random-number generator for sampling (default: random seed of ConfigObject)
+        :param bool accumulate: accumulate correlation statistics over executions and create report at finalize
+        :param int n_rank_bins: number of quantile bins per column to approximate ranks with in accumulate mode
+        :param dict ranges: value ranges (min, max) per column of correlation-ratio bins in accumulate mode
+                            (default: ranges of first input dataframe; values outside the ranges go into the edge bins)
         """
 
         # initialize Link, pass name from kwargs
         Link.__init__(self, kwargs.pop('name', 'correlation_summary'))
 
         # process arguments
-        self._process_kwargs(kwargs, read_key='', store_key='', results_path='', methods=ALL_CORRS, pages_key='')
+        self._process_kwargs(kwargs, read_key='', store_key='', results_path='', methods=None, pages_key='',
+                             n_bins=N_BINS, n_jobs=1, sample_size=0, n_error_samples=0, seed=None,
+                             accumulate=False, n_rank_bins=N_RANK_BINS, ranges=None)
         self.check_extra_kwargs(kwargs)
 
     def initialize(self):
         """Initialize CorrelationSummary"""
 
         # check input arguments
-        self.check_arg_types(read_key=str, store_key=str, results_path=str, methods=list, pages_key=str)
+        if self.methods is None:
+            self.methods = list(ACCUMULATED_CORRS) if self.accumulate else list(ALL_CORRS)
+        self.check_arg_types(read_key=str, store_key=str, results_path=str, methods=list, pages_key=str,
+                             n_bins=int, n_jobs=int, sample_size=int, n_error_samples=int)
         self.check_arg_vals('read_key')
+        assert self.n_bins > 0, 'number of bins must be positive'
+        assert self.sample_size >= 0, 'sample size must not be negative'
+        assert self.n_error_samples != 1, 'errors require at least two samples'
+        assert not (self.accumulate and (self.sample_size or self.n_error_samples)), \
+            'sampling and error estimation are not supported in accumulate mode'
+        self.check_arg_types(allow_none=True, ranges=dict)
 
         # get I/O configuration
         io_conf = ProcessManager().service(ConfigObject).io_conf()
@@ -82,13 +121,28 @@ class CorrelationSummary(Link):
 
         # check methods
         for method in self.methods:
-            if method not in ALL_CORRS:
+            if method not in ALL_CORRS + OPTIONAL_CORRS:
                 logstring = '"{}" is not a valid correlation method, please use one of {}'
-                logstring = logstring.format(method, ', '.join(['"' + m + '"' for m in ALL_CORRS]))
+                logstring = logstring.format(method, ', '.join(['"' + m + '"' for m in ALL_CORRS + OPTIONAL_CORRS]))
                 raise AssertionError(logstring)
 
+        # take seed for sampling from ConfigObject if not specified
+        if self.seed is None:
+            settings = ProcessManager().service(ConfigObject)
+            if 'seed' in settings:
+                self.seed = settings['seed']
+            elif 'seeds' in settings:
+                self.seed = settings['seeds'].get(self.name)
+
         # initialize attributes
         self.pages = []
+        self._plot_jobs = []
+        self._accumulator = None
+        if self.accumulate:
+            methods = [m for m in self.methods if m not in ACCUMULATED_CORRS]
+            assert not methods, 'correlation methods {} cannot be accumulated'.format(methods)
+            self._accumulator = CorrelationAccumulator(self.methods, n_bins=self.n_bins, n_rank_bins=self.n_rank_bins,
+                                                       ranges=self.ranges)
 
         return StatusCode.Success
 
@@ -101,14 +155,32 @@ class CorrelationSummary(Link):
         from matplotlib import colors
 
         # fetch and check input data frame
-        # drop all-nan columns right away
-        df = ds.get(self.read_key, None).dropna(how='all', axis=1)
+        df = ds.get(self.read_key, None)
         if not isinstance(df, pd.DataFrame):
             self.log().critical('no Pandas data frame "%s" found in data store for %s', self.read_key, str(self))
             raise RuntimeError('no input data found for %s' % str(self))
+
+        # only update statistics in accumulate mode
+        if self.accumulate:
+            self.log().debug('Updating correlation statistics with %d records of "%s"', len(df.index), self.read_key)
+            self._accumulator.update(df)
+            return StatusCode.Success
+
+        # drop all-nan columns right away
+        df = df.dropna(how='all', axis=1)
         n_df = len(df.index)
         assert n_df, 'Pandas data frame "%s" frame has zero length' % self.read_key
 
+        # select random subsample
+        rng = RandomState(self.seed)
+        if 0 < self.sample_size < n_df:
+            self.log().debug('Selecting random sample of %d out of %d records', self.sample_size, n_df)
+            df = df.take(np.sort(rng.choice(n_df, self.sample_size, replace=False)))
+            n_df = self.sample_size
+
+        # split sample into disjoint parts for error estimation
+        err_parts = np.array_split(rng.permutation(n_df), self.n_error_samples) if self.n_error_samples else []
+
         # create report pages
         if self.pages_key:
             self.pages = ds.get(self.pages_key, [])
@@ -117,99 +189,111 @@ class CorrelationSummary(Link):
         # below, create report pages
         # for each correlation create resulting heatmap
         cors_list = []
+        errors_list = []
 
         for method in self.methods:
             # compute correlations between all numerical variables
             self.log().debug('Computing "%s" correlations of dataframe "%s"', method, self.read_key)
+            cors = self._correlations(df, method)
+            cols = list(cors.columns)
+
+            # estimate errors from spread of correlations in parts of sample
+            errors = None
+            if err_parts:
+                self.log().debug('Estimating errors of "%s" correlations from %d samples', method, len(err_parts))
+                part_cors = np.stack([self._correlations(df.take(p), method).values for p in err_parts])
+                errors = pd.DataFrame(np.nanstd(part_cors, axis=0, ddof=1) / np.sqrt(len(err_parts)),
+                                      columns=cols, index=cors.index)
+            errors_list.append(errors)
+
+            # plot correlations and add report page
+            cors_list.append(self._add_page(method, cors, n_df, errors))
+
+        # render plots and save correlations to datastore if requested
+        self._render_plots()
+        self._store(cors_list, errors_list if err_parts else None)
+
+        return StatusCode.Success
+
+    def _add_page(self, method, cors, n_df, errors=None):
+        """Plot correlation matrix and add page with plot and statistics to report"""
+
+        cols = list(cors.columns)
 
-            # mutual info, from sklearn
-            if method == 'mutual_information':
-                # numerical columns only
-                cols = df.select_dtypes(include=[np.number]).columns
-
-                # initialize correlation matrix
-                n = len(cols)
-                cors = np.zeros((n, n))
-                for i, c in enumerate(cols):
-                    # compare each column to all of the columns
-                    cors[i, :] = mutual_info_regression(df[cols], df[c])
-
-                cors = pd.DataFrame(cors, columns=cols, index=cols)
-
-            elif method == 'correlation_ratio':
-                # numerical columns only
-                cols = df.select_dtypes(include=[np.number]).columns
-
-                # choose bins for each column
-                bins = {c: len(np.histogram(df[c])[1]) for c in cols}
-
-                # sort rows into bins
-                for c in cols:
-                    df[str(c) + '_bin'] = pd.cut(df[c], bins[c])
-
-                # initialize correlation matrix
-                n = len(cols)
-                cors = np.zeros((n, n))
-
-                for i, x in enumerate(cols):
-                    # definition from Wikipedia "correlation ratio"
-                    xbin = str(x) + '_bin'
-                    y_given_x = (df.groupby(xbin))[cols]
-                    weighted_var_y_bar = (y_given_x.count() * (y_given_x.mean() - df.mean()) ** 2).sum()
-                    weighted_var_y = df[cols].count() * df[cols].var()
-                    cors[i, :] = weighted_var_y_bar / weighted_var_y
-
-                cors = pd.DataFrame(cors, columns=cols, index=cols)
-
-            else:
-                cors = df.corr(method=method)
-                cols = list(cors.columns)
-
-            # replace column names with indices, as with numpy matrix, for plotting function below
-            n = len(cols)
-            cors.columns = range(n)
-
-            # keep for potential later usage
-            cors_list.append(cors)
-
-            # plot settings
-            title = '{0:s} correlation matrix'.format(method.capitalize())
-            vmin = -1 if method in LINEAR_CORRS else 0
-            vmax = 1
-            color_map = 'RdYlGn' if method in LINEAR_CORRS else 'YlGn'
-            fname = '_'.join(['correlations', self.read_key.replace(' ', ''), method]) + '.pdf'
-            fpath = os.path.join(self.results_path, fname)
-
-            # create nice looking plot
-            self.log().debug('Saving correlation heatmap as {}'.format(fpath))
-            visualization.vis_utils.plot_correlation_matrix(cors, cols, cols, fpath, title, vmin, vmax, color_map)
-
-            # statistics table for report page
-            n_unique = (n * n - n) / 2 if method is not 'correlation_ratio' else n * n
-            stats = [('entries', n_df), ('bins', n * n), ('unique', n_unique),
-                     ('> 0', (cors.values.ravel() > 0).sum()),
-                     ('< 0', (cors.values.ravel() < 0).sum()),
-                     ('avg', np.average(cors.values.ravel())),
-                     ('max', max(cors.values.ravel())),
-                     ('min', min(cors.values.ravel()))] if n > 0 else []
-            stats_table = tabulate.tabulate(stats, tablefmt='latex')
-
-            # add plot and table as page to report
-            self.pages.append(self.page_template.replace('VAR_LABEL', title)
-                              .replace('VAR_STATS_TABLE', stats_table)
-                              .replace('VAR_HISTOGRAM_PATH', fpath))
-
-        # save correlations to datastore if requested
+        # replace column names with indices, as with numpy matrix, for plotting function below
+        n = len(cols)
+        cors.columns = range(n)
+
+        # plot settings
+        title = '{0:s} correlation matrix'.format(method.capitalize())
+        vmin = -1 if method in LINEAR_CORRS else 0
+        vmax = 1 if method != 'mutual_information' else max(1, np.nanmax(cors.values, initial=0))
+        color_map = 'RdYlGn' if method in LINEAR_CORRS else 'YlGn'
+        fname = '_'.join(['correlations', self.read_key.replace(' ', ''), method]) + '.pdf'
+        fpath = os.path.join(self.results_path, fname)
+
+        # create nice looking plot, rendered by _render_plots()
+        self.log().debug('Saving correlation heatmap as {}'.format(fpath))
+        self._plot_jobs.append((visualization.vis_utils.plot_correlation_matrix,
+                                (cors, cols, cols, fpath, title, vmin, vmax, color_map), {}))
+
+        # statistics table for report page
+        n_unique = (n * n - n) / 2 if method != 'correlation_ratio' else n * n
+        stats = [('entries', n_df), ('bins', n * n), ('unique', n_unique),
+                 ('> 0', (cors.values.ravel() > 0).sum()),
+                 ('< 0', (cors.values.ravel() < 0).sum()),
+                 ('avg', np.average(cors.values.ravel())),
+                 ('max', max(cors.values.ravel())),
+                 ('min', min(cors.values.ravel()))] if n > 0 else []
+        if errors is not None and n > 0:
+            stats.append(('avg error', np.nanmean(errors.values)))
+        stats_table = tabulate.tabulate(stats, tablefmt='latex')
+
+        # add plot and table as page to report
+        self.pages.append(self.page_template.replace('VAR_LABEL', title)
+                          .replace('VAR_STATS_TABLE', stats_table)
+                          .replace('VAR_HISTOGRAM_PATH', fpath))
+
+        return cors
+
+    def _render_plots(self):
+        """Render plots of added pages"""
+
+        plot_jobs, self._plot_jobs = self._plot_jobs, []
+        visualization.vis_utils.render_plots(plot_jobs, n_workers=self.n_jobs)
+
+    def _store(self, cors_list, errors_list=None):
+        """Store correlations and report pages in data store"""
+
+        ds = ProcessManager().service(DataStore)
         if self.store_key:
             ds[self.store_key] = cors_list
+            if errors_list is not None:
+                ds[self.store_key + '_errors'] = errors_list
         if self.pages_key:
             ds[self.pages_key] = self.pages
 
-        return StatusCode.Success
+    def _correlations(self, df, method):
+        """Compute correlation matrix of numerical columns with specified method"""
+
+        if method in BINNED_CORRS:
+            return binned_correlations(df.select_dtypes(include=[np.number]), method, self.n_bins, self.n_jobs)
+        return df.corr(method=method, numeric_only=True)
 
     def finalize(self):
         """Finalize CorrelationSummary"""
 
+        # create correlation matrices from accumulated statistics
+        if self.accumulate:
+            acc = self._accumulator
+            self.log().debug('Computing correlations from statistics of %d records', acc.n_records)
+            if self.pages_key:
+                self.pages = ProcessManager().service(DataStore).get(self.pages_key, [])
+                assert isinstance(self.pages, list), 'Pages key %s does not refer to a list' % self.pages_key
+            cors_list = [self._add_page(m, acc.correlations(m), acc.n_records) for m in self.methods]
+            self._render_plots()
+            self._store(cors_list)
+
         # write report file
         with open('{}/report.tex'.format(self.results_path), 'w') as report_file:
             report_file.write(
@@ -33,6 +33,9 @@ class DfBoxplot(Link):
     * a nicely scaled plot of the boxplots per group of the column
 
     Example is available in: tutorials/esk304_df_boxplot.py
+
+    The statistics of all groupings are computed first, after which the
+    boxplots are rendered, optionally in parallel processes.
     """
 
     def __init__(self, **kwargs):
@@ -47,6 +50,7 @@ class DfBoxplot(Link):
                the full list is taken from statistics.ArrayStats.get_latex_table
                defaults to: ['count', 'mean', 'min', 'max']
         :param str pages_key: data store key of existing report pages
+        :param int n_workers: number of parallel processes to render plots in (default 1)
         """
 
         # initialize Link
@@ -54,7 +58,8 @@ class DfBoxplot(Link):
 
         # process keyword arguments
         self._process_kwargs(kwargs, read_key='', results_path='', column=None, cause_columns=None,
-                             var_labels={}, var_units={}, statistics=['count', 'mean', 'min', 'max'], pages_key='')
+                             var_labels={}, var_units={}, statistics=['count', 'mean', 'min', 'max'], pages_key='',
+                             n_workers=1)
         self.check_extra_kwargs(kwargs)
 
         # initialize attributes
@@ -64,7 +69,7 @@ class DfBoxplot(Link):
         """Inititialize DfBoxplot link"""
 
         # check input arguments
-        self.check_arg_types(read_key=str, pages_key=str)
+        self.check_arg_types(read_key=str, pages_key=str, n_workers=int)
         self.check_arg_types(recurse=True, allow_none=True, column=str, cause_columns=list, statistics=list)
         self.check_arg_vals('read_key')
 
@@ -118,6 +123,7 @@ class DfBoxplot(Link):
             assert isinstance(self.pages, list), 'Pages key %s does not refer to a list' % self.pages_key
 
         # create report page for each plot
+        plot_jobs = []
         for col in self.cause_columns:
             # output column name
             self.log().debug('processing cause column "%s"', col)
@@ -135,10 +141,12 @@ class DfBoxplot(Link):
             stats = statistics.GroupByStats(data, self.column, groupby=col, unit=self.var_units.get(self.column, ''),
                                             label=var_label)
 
-            # 3. plot and store histogram of column variable
+            # 3. plot and store histogram of column variable, with only the columns needed for the plot
             box_file_name = 'boxplot_{}.pdf'.format(col)
             pdf_file_name = '{0:s}/{1:s}'.format(self.results_path, box_file_name)
-            visualization.vis_utils.box_plot(data, col, self.column, pdf_file_name=pdf_file_name)
+            plot_data = data[[col, self.column]] if col != self.column else data[[col]]
+            plot_jobs.append((visualization.vis_utils.box_plot, (plot_data, col, self.column),
+                              dict(pdf_file_name=pdf_file_name)))
 
             # 4. create overview table of column variable with a group-by applied by GroupByStats
             stats_table = stats.get_latex_table(get_stats=self.statistics)
@@ -148,6 +156,9 @@ class DfBoxplot(Link):
                                                 .replace('VAR_STATS_TABLE', stats_table)
                                                 .replace('VAR_HISTOGRAM_PATH', box_file_name))
 
+        # render boxplots
+        visualization.vis_utils.render_plots(plot_jobs, n_workers=self.n_workers)
+
         # storage
         if self.pages_key:
             ds[self.pages_key] = self.pages
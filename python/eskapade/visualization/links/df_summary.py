@@ -15,7 +15,9 @@
 # * LICENSE.                                                                       *
 # **********************************************************************************
 
+import hashlib
 import os
+import pickle
 import pandas as pd
 import numpy as np
 import tabulate
@@ -39,6 +41,23 @@ class DfSummary(Link):
 
     Example 2 is available in: tutorials/esk303_histogram_filling_plotting.py
     Empty histograms are automatically skipped from processing.
+
+    The statistics and histograms of all columns are computed first, after
+    which the plots are rendered, optionally in parallel processes.  The
+    report pages are assembled in column order.
+
+    In incremental mode, a fingerprint of each column is computed from the
+    column data and its plot settings.  The pages of columns with the same
+    fingerprint as in the previous run are taken from a cache file, with the
+    existing plot files, and only pages of changed columns are recreated.
+
+    In accumulate mode, the input dataframes of all executions, e.g. chunks
+    of a large dataset read in a loop, are summarized in a single pass: the
+    histograms, null counts and moments of all columns are accumulated
+    without keeping the column data (see
+    eskapade.analysis.statistics.SummaryAccumulator).  The tables and plots
+    are derived from these at finalize.  Statistics other than the moments
+    and counts, e.g. quantiles, are computed from fine-binned histograms.
     """
 
     def __init__(self, **kwargs):
@@ -54,6 +73,11 @@ class DfSummary(Link):
         :param dict var_bins: dict of column names with the number of bins per column. Default per column is 30.
         :param str hist_y_label: y-axis label to plot for all columns. Default is 'Bin Counts'.
         :param str pages_key: data store key of existing report pages
+        :param int n_workers: number of parallel processes to render plots in (default 1)
+        :param bool incremental: reuse pages of unchanged columns from the previous run (default False)
+        :param str cache_path: path of cache file for incremental mode (default: <results_path>/<name>_cache.pkl)
+        :param bool accumulate: accumulate column summaries over executions and create report at finalize
+        :param int n_fine_bins: number of fine histogram bins per numeric column in accumulate mode (default 1000)
         """
 
         # initialize Link
@@ -63,20 +87,26 @@ class DfSummary(Link):
         self._process_kwargs(kwargs, read_key='', results_path='', columns=[],
                              hist_keys=[],
                              var_labels={}, var_units={}, var_bins={},
-                             hist_y_label='Bin counts', pages_key='')
+                             hist_y_label='Bin counts', pages_key='', n_workers=1,
+                             incremental=False, cache_path='', accumulate=False, n_fine_bins=1000)
         self.check_extra_kwargs(kwargs)
 
         # initialize attributes
         self.pages = []
         self.nan_counts = []
+        self._plot_jobs = []
+        self._cache = {}
+        self._new_cache = {}
+        self._accumulator = None
 
     def initialize(self):
         """Inititialize DfSummary link"""
 
         # check input arguments
-        self.check_arg_types(read_key=str, pages_key=str)
+        self.check_arg_types(read_key=str, pages_key=str, n_workers=int, cache_path=str)
         self.check_arg_types(recurse=True, allow_none=True, columns=str, hist_keys=str, var_labels=str, var_units=str)
         self.check_arg_vals('read_key')
+        assert not (self.accumulate and self.incremental), 'accumulate and incremental modes cannot be combined'
 
         # get I/O configuration
         io_conf = ProcessManager().service(ConfigObject).io_conf()
@@ -102,6 +132,19 @@ class DfSummary(Link):
             self.log().debug('Making output directory %s', self.results_path)
             os.makedirs(self.results_path)
 
+        # load cached pages of previous run
+        if self.incremental:
+            if not self.cache_path:
+                self.cache_path = os.path.join(self.results_path, '{}_cache.pkl'.format(self.name))
+            if os.path.isfile(self.cache_path):
+                with open(self.cache_path, 'rb') as cache_file:
+                    self._cache = pickle.load(cache_file)
+                self.log().debug('Loaded %d cached pages from "%s"', len(self._cache), self.cache_path)
+
+        # create accumulator of column summaries
+        if self.accumulate:
+            self._accumulator = statistics.SummaryAccumulator(n_fine_bins=self.n_fine_bins)
+
         # add hist_keys to columns, ensure sum is a unique set
         self.columns += self.hist_keys
         self.columns = sorted(list(set(self.columns)))
@@ -132,12 +175,26 @@ class DfSummary(Link):
         else:
             self.assert_data_type(data)
 
+        # only update column summaries in accumulate mode
+        if self.accumulate:
+            if not isinstance(data, pd.DataFrame):
+                raise TypeError('accumulate mode requires pandas dataframe as input')
+            if not self.columns:
+                self.columns = self.get_all_columns(data)
+            self.log().debug('Updating column summaries with %d records of "%s"', len(data.index), self.read_key)
+            self._accumulator.update(data[self.columns])
+            return StatusCode.Success
+
         # create report page for histogram
         if self.pages_key:
             self.pages = ds.get(self.pages_key, [])
             if not isinstance(self.pages, list):
                 raise TypeError('pages key "{}" does not refer to a list'.format(self.pages_key))
 
+        # collect null counts and pages of this execution for the cache
+        self.nan_counts = []
+        self._new_cache = {}
+
         # determine all possible columns, used for comparison below
         all_columns = self.get_all_columns(data)
         if not self.columns:
@@ -158,18 +215,15 @@ class DfSummary(Link):
             nan_hist = self.nan_counts, self.columns
             self.process_nan_histogram(nan_hist, self.get_length(data))
 
-        # storage
-        if self.pages_key:
-            ds[self.pages_key] = self.pages
+        # render plots of all pages
+        self.render_plots()
 
-        return StatusCode.Success
-
-    def finalize(self):
-        """Finalize DfSummary"""
+        # pages of this execution replace the cached pages, as their plots are overwritten
+        if self.incremental:
+            self._cache = self._new_cache
 
         # storage
         if self.pages_key:
-            ds = ProcessManager().service(DataStore)
             ds[self.pages_key] = self.pages
 
         return StatusCode.Success
@@ -177,12 +231,56 @@ class DfSummary(Link):
     def finalize(self):
         """Finalize DfSummary"""
 
+        # create report pages from accumulated column summaries
+        if self.accumulate and self._accumulator.columns is not None:
+            self.process_accumulated(self._accumulator)
+
+        # store cached pages for the next run
+        if self.incremental:
+            with open(self.cache_path, 'wb') as cache_file:
+                pickle.dump(self._cache, cache_file)
+
         # write report file
         with open('{}/report.tex'.format(self.results_path), 'w') as report_file:
             report_file.write(self.report_template.replace('INPUT_PAGES', ''.join(self.pages)))
 
         return StatusCode.Success
 
+    def add_plot(self, plot_func, *args, **kwargs):
+        """Add plot to be rendered by render_plots()
+
+        :param plot_func: plot function from visualization.vis_utils
+        :param args: positional arguments of plot function
+        :param kwargs: keyword arguments of plot function
+        """
+
+        self._plot_jobs.append((plot_func, args, kwargs))
+
+    def render_plots(self):
+        """Render added plots"""
+
+        plot_jobs, self._plot_jobs = self._plot_jobs, []
+        visualization.vis_utils.render_plots(plot_jobs, n_workers=self.n_workers)
+
+    def fingerprint(self, col, sample):
+        """Compute fingerprint of column data and its plot settings
+
+        :param str col: name of the series
+        :param sample: input pandas series object
+        :returns: fingerprint, or None if the column data cannot be hashed
+        :rtype: str
+        """
+
+        settings = (col, str(sample.dtype), self.var_labels.get(col, col), self.var_units.get(col, ''),
+                    self.var_bins.get(col, NUMBER_OF_BINS), self.hist_y_label, self.results_path, self.page_template)
+        fp = hashlib.sha1(repr(settings).encode('utf-8'))
+        try:
+            fp.update(pd.util.hash_pandas_object(sample, index=False).values.tobytes())
+        except TypeError:
+            self.log().debug('Cannot compute fingerprint of column "%s"', col)
+            return None
+        return fp.hexdigest()
+
     def assert_data_type(self, data):
         """Check type of input data
 
@@ -253,11 +351,25 @@ class DfSummary(Link):
         :param sample: input pandas series object
         """
 
+        # reuse page of unchanged column from previous run
+        fprint = self.fingerprint(col, sample) if self.incremental else None
+        cached = self._cache.get(col)
+        if fprint is not None and cached and cached['fingerprint'] == fprint \
+                and (cached['page'] is None or os.path.isfile(cached['pdf_file_name'])):
+            self.log().debug('Column "%s" is unchanged; reusing page', col)
+            self._new_cache[col] = cached
+            self.nan_counts.append(cached['nan_count'])
+            if cached['page'] is not None:
+                self.pages.append(cached['page'])
+            return
+
         # skip columns consisting entirely of nans
         nan_cnt = sample.isnull().sum()
         self.nan_counts.append(nan_cnt)
         if nan_cnt == len(sample.index):
             self.log().debug('Column "%s" consists of nans only; skipping', col)
+            if fprint is not None:
+                self._new_cache[col] = dict(fingerprint=fprint, nan_count=nan_cnt, page=None, pdf_file_name='')
             return
 
         # 1. create statistics object for column
@@ -278,15 +390,74 @@ class DfSummary(Link):
         pdf_file_name = '{0:s}/{1:s}'.format(self.results_path, hist_file_name)
 
         # 3. plot histogram of column variable
-        visualization.vis_utils.plot_histogram(nphist, x_label=x_label, y_label=y_label, is_num=is_num, is_ts=is_ts,
-                                               pdf_file_name=pdf_file_name)
+        self.add_plot(visualization.vis_utils.plot_histogram, nphist, x_label=x_label, y_label=y_label, is_num=is_num,
+                      is_ts=is_ts, pdf_file_name=pdf_file_name)
 
         # create overview table of column variable
         stats_table = stats.get_latex_table()
 
         # create page string for report
-        self.pages.append(self.page_template.replace('VAR_LABEL', var_label).replace('VAR_STATS_TABLE', stats_table)
-                                            .replace('VAR_HISTOGRAM_PATH', hist_file_name))
+        page = self.page_template.replace('VAR_LABEL', var_label).replace('VAR_STATS_TABLE', stats_table)\
+                                 .replace('VAR_HISTOGRAM_PATH', hist_file_name)
+        self.pages.append(page)
+        if fprint is not None:
+            self._new_cache[col] = dict(fingerprint=fprint, nan_count=nan_cnt, page=page, pdf_file_name=pdf_file_name)
+
+    def process_accumulated(self, acc):
+        """Create statistics of and plot accumulated column summaries
+
+        :param acc: accumulated column summaries
+        :type acc: eskapade.analysis.statistics.SummaryAccumulator
+        """
+
+        ds = ProcessManager().service(DataStore)
+        if self.pages_key:
+            self.pages = ds.get(self.pages_key, [])
+            if not isinstance(self.pages, list):
+                raise TypeError('pages key "{}" does not refer to a list'.format(self.pages_key))
+
+        for col in acc.columns:
+            self.log().debug('Processing accumulated summary of "%s"', col)
+            nan_cnt = acc.nan_counts[col]
+            self.nan_counts.append(nan_cnt)
+            bin_labels, bin_counts = acc.histogram(col)
+            if not len(bin_counts):
+                self.log().debug('Column "%s" consists of nans only; skipping', col)
+                continue
+
+            # statistics from histogram, with exact counts and moments
+            var_label = self.var_labels.get(col, col)
+            stats = statistics.ArrayStats(bin_labels, col, weights=bin_counts, unit=self.var_units.get(col, ''),
+                                          label=var_label)
+            stats.create_stats()
+            col_props = stats.get_col_props()
+            stat_vals = dict(count=acc.n_records, nan=nan_cnt) if nan_cnt else dict(count=acc.n_records)
+            if col_props['is_num']:
+                stat_vals.update(acc.moments(col))
+            drop = ['distinct'] if col_props['is_num'] and not col_props['is_int'] else []
+            stats.set_stats(stat_vals, drop=drop)
+
+            # rebin fine histogram for plotting
+            nphist = stats.make_histogram(var_bins=self.var_bins.get(col, NUMBER_OF_BINS))
+            x_label = stats.get_x_label()
+            y_label = self.hist_y_label if self.hist_y_label else None
+            hist_file_name = 'hist_{}.pdf'.format(col)
+            pdf_file_name = '{0:s}/{1:s}'.format(self.results_path, hist_file_name)
+            self.add_plot(visualization.vis_utils.plot_histogram, nphist, x_label=x_label, y_label=y_label,
+                          is_num=col_props['is_num'], is_ts=col_props['is_ts'], pdf_file_name=pdf_file_name)
+
+            # create page string for report
+            stats_table = stats.get_latex_table()
+            self.pages.append(self.page_template.replace('VAR_LABEL', var_label)
+                              .replace('VAR_STATS_TABLE', stats_table).replace('VAR_HISTOGRAM_PATH', hist_file_name))
+
+        # add nan histogram and render plots
+        self.process_nan_histogram((self.nan_counts, acc.columns), acc.n_records)
+        self.render_plots()
+
+        # storage
+        if self.pages_key:
+            ds[self.pages_key] = self.pages
 
     def process_1d_histogram(self, name, hist):
         """Create statistics of and plot input 1d histogram
@@ -337,8 +508,8 @@ class DfSummary(Link):
         pdf_file_name = '{0:s}/{1:s}'.format(self.results_path, hist_file_name)
 
         # matplotlib plot of histogram
-        visualization.vis_utils.plot_histogram(nphist, x_label=x_label, y_label=y_label, is_num=is_num, is_ts=is_ts,
-                                               pdf_file_name=pdf_file_name)
+        self.add_plot(visualization.vis_utils.plot_histogram, nphist, x_label=x_label, y_label=y_label, is_num=is_num,
+                      is_ts=is_ts, pdf_file_name=pdf_file_name)
 
         # create overview table of histogram statistics
         stats_table = stats.get_latex_table()
@@ -393,8 +564,8 @@ class DfSummary(Link):
         pdf_file_name = '{0:s}/{1:s}'.format(self.results_path, hist_file_name)
 
         # plot the 2d histogram
-        visualization.vis_utils.plot_2d_histogram(nphist, x_lim=hist.x_lim(), y_lim=hist.y_lim(), title=var_label,
-                                                  x_label=xlab, y_label=ylab, pdf_file_name=pdf_file_name)
+        self.add_plot(visualization.vis_utils.plot_2d_histogram, nphist, x_lim=hist.x_lim(), y_lim=hist.y_lim(),
+                      title=var_label, x_label=xlab, y_label=ylab, pdf_file_name=pdf_file_name)
 
         # create page string for report
         page_templ = self.page_template
@@ -416,8 +587,8 @@ class DfSummary(Link):
         y_label = self.hist_y_label if self.hist_y_label else None
         hist_file_name = 'hist_NaNs.pdf'
         pdf_file_name = '{0:s}/{1:s}'.format(self.results_path, hist_file_name)
-        visualization.vis_utils.plot_histogram(nphist, x_label=x_label, y_label=y_label, is_num=False, is_ts=False,
-                                               pdf_file_name=pdf_file_name)
+        self.add_plot(visualization.vis_utils.plot_histogram, nphist, x_label=x_label, y_label=y_label, is_num=False,
+                      is_ts=False, pdf_file_name=pdf_file_name)
         table = [('count', '{:d}'.format(n_data))]
         stats_table = tabulate.tabulate(table, tablefmt='latex')
         self.pages.append(self.page_template.replace('VAR_LABEL', var_label).replace('VAR_STATS_TABLE', stats_table)
@@ -0,0 +1,101 @@
+import tempfile
+import unittest
+import mock
+import numpy as np
+import pandas as pd
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+class CorrelationSummaryTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(CorrelationSummaryTest, self).set_up_observers(observers)
+
+    def test_initialize(self):
+        from eskapade import ProcessManager, ConfigObject
+        from eskapade.visualization import CorrelationSummary
+        from eskapade.core.definitions import RandomSeeds
+
+        settings = ProcessManager().service(ConfigObject)
+        settings['analysisName'] = 'CorrelationSummaryTest'
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # mutual information is only computed on request
+            link = CorrelationSummary(read_key='test_input', results_path=tmp_dir)
+            link.initialize()
+            self.assertNotIn('mutual_information', link.methods)
+            link = CorrelationSummary(read_key='test_input', results_path=tmp_dir, methods=['mutual_information'])
+            link.initialize()
+
+            # seed for sampling is taken from ConfigObject
+            settings['seeds'] = RandomSeeds(default=99)
+            link = CorrelationSummary(read_key='test_input', results_path=tmp_dir)
+            link.initialize()
+            self.assertIsNone(link.seed)
+            settings['seeds']['correlation_summary'] = 7
+            link = CorrelationSummary(read_key='test_input', results_path=tmp_dir)
+            link.initialize()
+            self.assertEqual(link.seed, 7)
+            settings['seed'] = 42
+            link = CorrelationSummary(read_key='test_input', results_path=tmp_dir)
+            link.initialize()
+            self.assertEqual(link.seed, 42)
+            link = CorrelationSummary(read_key='test_input', results_path=tmp_dir, seed=13)
+            link.initialize()
+            self.assertEqual(link.seed, 13)
+
+    def test_accumulate_methods(self):
+        from eskapade import ProcessManager, ConfigObject
+        from eskapade.visualization import CorrelationSummary
+        from eskapade.analysis.correlation import ACCUMULATED_CORRS
+
+        settings = ProcessManager().service(ConfigObject)
+        settings['analysisName'] = 'CorrelationSummaryTest'
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            link = CorrelationSummary(read_key='test_input', results_path=tmp_dir, accumulate=True)
+            link.initialize()
+            self.assertListEqual(link.methods, list(ACCUMULATED_CORRS))
+            link = CorrelationSummary(read_key='test_input', results_path=tmp_dir, accumulate=True,
+                                      methods=['kendall'])
+            self.assertRaises(AssertionError, link.initialize)
+
+            # sampling is not supported in accumulate mode
+            for kwargs in (dict(sample_size=100), dict(n_error_samples=5)):
+                link = CorrelationSummary(read_key='test_input', results_path=tmp_dir, accumulate=True, **kwargs)
+                self.assertRaises(AssertionError, link.initialize)
+
+    def test_accumulate_ranges(self):
+        from eskapade import ProcessManager, ConfigObject, DataStore
+        from eskapade.visualization import CorrelationSummary
+
+        settings = ProcessManager().service(ConfigObject)
+        settings['analysisName'] = 'CorrelationSummaryTest'
+        ds = ProcessManager().service(DataStore)
+        rng = np.random.RandomState(42)
+        df = pd.DataFrame({'x': rng.uniform(0., 10., 1000)})
+        df['y'] = np.sin(df['x']) + rng.normal(scale=0.1, size=1000)
+        chunks = [df[df['x'] < 5.], df[df['x'] >= 5.]]
+
+        # with fixed ranges, correlation ratios do not depend on the order of the chunks
+        cors = []
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch('eskapade.visualization.vis_utils.render_plots'):
+            for order in (chunks, chunks[::-1]):
+                link = CorrelationSummary(read_key='test_input', store_key='cors', results_path=tmp_dir,
+                                          accumulate=True, methods=['correlation_ratio'],
+                                          ranges={'x': (0., 10.), 'y': (-1.5, 1.5)})
+                link.initialize()
+                for chunk in order:
+                    ds['test_input'] = chunk
+                    link.execute()
+                link.finalize()
+                cors.append(ds['cors'][0])
+        np.testing.assert_allclose(cors[0].values, cors[1].values)
+        self.assertGreater(cors[0].values[0, 1], 0.8)
+
+    def tearDown(self):
+        super(CorrelationSummaryTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
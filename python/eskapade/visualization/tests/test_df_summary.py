@@ -0,0 +1,122 @@
+import os
+import pickle
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from eskapade.tests.observers import MockDataStoreObserver, TestCaseObservable
+
+
+class DfSummaryTest(unittest.TestCase, TestCaseObservable):
+
+    def setUp(self):
+        observers = [MockDataStoreObserver()]
+        super(DfSummaryTest, self).set_up_observers(observers)
+
+    def test_incremental(self):
+        from eskapade import ProcessManager, DataStore, ConfigObject
+        from eskapade.visualization import DfSummary
+
+        settings = ProcessManager().service(ConfigObject)
+        settings['analysisName'] = 'DfSummaryTest'
+        ds = ProcessManager().service(DataStore)
+        df = pd.DataFrame({'a': np.arange(100.), 'b': np.arange(100) % 7})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            def run_summary():
+                link = DfSummary(read_key='test_input', results_path=tmp_dir, incremental=True)
+                link.initialize()
+                link.execute()
+                link.finalize()
+                return link.pages
+
+            ds['test_input'] = df
+            pages = run_summary()
+            paths = [os.path.join(tmp_dir, 'hist_{}.pdf'.format(c)) for c in ('a', 'b')]
+
+            # change one column: only its plot is recreated
+            os.utime(paths[0], ns=(0, 0))
+            os.utime(paths[1], ns=(0, 0))
+            ds['test_input'] = df.assign(b=df['b'] * 2)
+            pages_new = run_summary()
+            self.assertEqual(os.stat(paths[0]).st_mtime_ns, 0)
+            self.assertNotEqual(os.stat(paths[1]).st_mtime_ns, 0)
+            self.assertEqual(pages_new[0], pages[0])
+            self.assertEqual(len(pages_new), len(pages))
+
+            # repeated execution: pages are compared with the plots of the previous execution
+            link = DfSummary(read_key='test_input', results_path=tmp_dir, incremental=True)
+            link.initialize()
+            ds['test_input'] = df
+            link.execute()
+            os.utime(paths[1], ns=(0, 0))
+            cache_mtime = os.stat(link.cache_path).st_mtime_ns
+            ds['test_input'] = df.assign(b=df['b'] * 2)
+            link.execute()
+            self.assertNotEqual(os.stat(paths[1]).st_mtime_ns, 0)
+            self.assertEqual(os.stat(link.cache_path).st_mtime_ns, cache_mtime, 'cache written before finalize')
+            link.finalize()
+            with open(link.cache_path, 'rb') as cache_file:
+                cache = pickle.load(cache_file)
+            self.assertEqual(cache['b']['fingerprint'], link.fingerprint('b', link.get_sample(ds['test_input'], 'b')))
+
+    def test_parallel_plots(self):
+        from eskapade import ProcessManager, DataStore, ConfigObject
+        from eskapade.visualization import DfSummary
+
+        settings = ProcessManager().service(ConfigObject)
+        settings['analysisName'] = 'DfSummaryTest'
+        ds = ProcessManager().service(DataStore)
+        ds['test_input'] = pd.DataFrame({'a': np.arange(100.), 'b': np.arange(100) % 7})
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            link = DfSummary(read_key='test_input', results_path=tmp_dir, n_workers=2)
+            link.initialize()
+            link.execute()
+            link.finalize()
+            for col in ('a', 'b'):
+                path = os.path.join(tmp_dir, 'hist_{}.pdf'.format(col))
+                self.assertTrue(os.path.isfile(path) and os.path.getsize(path) > 0,
+                                'plot of {} not rendered'.format(col))
+
+    def test_accumulate(self):
+        from eskapade import ProcessManager, DataStore, ConfigObject
+        from eskapade.visualization import DfSummary
+
+        settings = ProcessManager().service(ConfigObject)
+        settings['analysisName'] = 'DfSummaryTest'
+        ds = ProcessManager().service(DataStore)
+        rng = np.random.RandomState(42)
+        df = pd.DataFrame({'x': rng.normal(size=1000), 'i': rng.randint(0, 5, 1000),
+                           'c': rng.choice(['u', 'v', 'w'], 1000)})
+        df.loc[::10, 'x'] = np.nan
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            link = DfSummary(read_key='test_input', results_path=tmp_dir, pages_key='test_pages', accumulate=True)
+            link.initialize()
+            for start in range(0, 1000, 300):
+                ds['test_input'] = df.iloc[start:start + 300]
+                link.execute()
+            self.assertFalse(link.pages)
+            link.finalize()
+
+            # one page per column and one for nan counts
+            self.assertEqual(len(ds['test_pages']), 4)
+            self.assertListEqual(link.nan_counts, [0, 0, 100])
+            for col in ('c', 'i', 'x', 'NaNs'):
+                self.assertTrue(os.path.isfile(os.path.join(tmp_dir, 'hist_{}.pdf'.format(col))))
+
+        # exact moments and counts
+        acc = link._accumulator
+        mom = acc.moments('x')
+        self.assertEqual(mom['filled'], 900)
+        self.assertAlmostEqual(mom['mean'], df['x'].mean())
+        self.assertAlmostEqual(mom['std'], df['x'].std())
+        self.assertListEqual(acc.histogram('i')[1].tolist(), df['i'].value_counts().sort_index().tolist())
+        self.assertDictEqual(dict(zip(*acc.histogram('c'))), df['c'].value_counts().to_dict())
+
+    def tearDown(self):
+        super(DfSummaryTest, self).tear_down_observers()
+        from eskapade.core import execution
+        execution.reset_eskapade()
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+import mock
+import numpy as np
+
+from eskapade.visualization import vis_utils
+
+
+class RenderPlotsTest(unittest.TestCase):
+
+    def plot_jobs(self, tmp_dir):
+        hist = (np.array([1, 3, 2]), np.array([0., 1., 2., 3.]))
+        return [(vis_utils.plot_histogram, (hist, 'x_{:d}'.format(i)),
+                 dict(pdf_file_name=os.path.join(tmp_dir, 'hist_{:d}.pdf'.format(i)))) for i in range(3)]
+
+    def test_parallel(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            vis_utils.render_plots(self.plot_jobs(tmp_dir), n_workers=2)
+            for i in range(3):
+                path = os.path.join(tmp_dir, 'hist_{:d}.pdf'.format(i))
+                self.assertTrue(os.path.isfile(path) and os.path.getsize(path) > 0, 'plot {} not rendered'.format(i))
+
+    def test_serial_fallback(self):
+        # without fork, the plots are rendered in the main process
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with mock.patch('multiprocessing.get_all_start_methods', return_value=['spawn']), \
+                    mock.patch('eskapade.visualization.vis_utils.ProcessPoolExecutor') as executor:
+                vis_utils.render_plots(self.plot_jobs(tmp_dir), n_workers=2)
+            executor.assert_not_called()
+            self.assertEqual(len(os.listdir(tmp_dir)), 3, 'plots not rendered')
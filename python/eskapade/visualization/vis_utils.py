@@ -1,3 +1,6 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 import logging
@@ -7,6 +10,45 @@ NUM_NS_DAY = 24 * 3600 * int(1e9)
 log = logging.getLogger(__name__)
 
 
+def _init_plot_worker():
+    """Select non-interactive matplotlib backend in plot worker process"""
+
+    import matplotlib
+    matplotlib.use('agg', force=True)
+
+
+def render_plots(plot_jobs, n_workers=1):
+    """Render plots, in parallel processes if requested
+
+    Each plot job is a tuple of a plot function of this module, e.g.
+    plot_histogram, with its positional and keyword arguments.  The jobs
+    are executed in order, or distributed over n_workers processes, which
+    render with the non-interactive "agg" backend.  The arguments are
+    passed on to the workers, so they should contain only the data needed
+    for the plot.  The plots are rendered in the main process if processes
+    cannot be forked on this platform.
+
+    :param list plot_jobs: (function, args, kwargs) tuples
+    :param int n_workers: number of parallel processes (default 1)
+    """
+
+    if n_workers > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+        log.debug('Processes cannot be forked; rendering plots in main process')
+        n_workers = 1
+    if n_workers <= 1 or len(plot_jobs) <= 1:
+        for func, args, kwargs in plot_jobs:
+            func(*args, **kwargs)
+        return
+
+    log.debug('Rendering %d plots in %d processes', len(plot_jobs), n_workers)
+    ctx = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(plot_jobs)), mp_context=ctx,
+                             initializer=_init_plot_worker) as executor:
+        futures = [executor.submit(func, *args, **kwargs) for func, args, kwargs in plot_jobs]
+        for future in futures:
+            future.result()
+
+
 def plot_histogram(hist, x_label, y_label=None, is_num=True, is_ts=False, pdf_file_name='', top=20):
     """Create and plot histogram of column values
 